@@ -0,0 +1,124 @@
+# Times AudioMerger and AudioOverlapMerger collecting 10 s to 80 s of 16 kHz
+# audio in frames of 1024 samples (overlapping by half for the overlap
+# merger), with the growable AudioBuffer, with the buffer allocated for the
+# EXPECTED_LENGTH, and with the original np.concatenate per frame. The
+# time of the buffer grows linearly with the duration, the time of
+# np.concatenate quadratically. All must produce the same output.
+#
+# Both mergers are also run in a WavReader -> AudioSplitter -> merger graph
+# by the BFS runner and by a compiled schedule, with EXPECTED_LENGTH linked
+# to the NUM_SAMPLES of the splitter and unlinked.
+
+from benchmark_utils import *
+from graph_runner import *
+from wavreader import *
+from audio_splitter import *
+from audio_merger import *
+from audio_overlap_merger import *
+
+SAMPLING_RATE = 16000
+DURATIONS = [10, 20, 40, 80]
+FRAME_LENGTH = 1024
+OFFSET = FRAME_LENGTH / 2
+
+def make_frames(num_samples, offset):
+    samples = np.random.RandomState(0).randn(num_samples) * 3000
+    positions = range(0, num_samples - FRAME_LENGTH + 1, offset)
+    return [samples[position:position + FRAME_LENGTH] for position in positions]
+
+def merge(merger, frames, expected_length):
+    for index, frame in enumerate(frames):
+        merger.inputs["INPUT_DATA"] = frame
+        merger.inputs["FINAL_INPUT"] = index == len(frames) - 1
+        if expected_length is not None:
+            merger.inputs["EXPECTED_LENGTH"] = expected_length
+        merger.compute()
+    return merger.outputs["OUTPUT_DATA"]
+
+def run_merger(overlap, frames, expected_length=None):
+    if overlap:
+        merger = AudioOverlapMerger()
+        merger.initialize({"OFFSET": OFFSET})
+    else:
+        merger = AudioMerger()
+        merger.initialize({})
+    return merge(merger, frames, expected_length)
+
+# The original accumulation of both mergers.
+def legacy_merge(overlap, frames):
+    data = None
+    position = 0
+    for frame in frames:
+        if data is None:
+            data = np.copy(frame)
+        elif overlap:
+            length = data.shape[0] - position
+            data[position:] += frame[:length]
+            data = np.concatenate([data, frame[length:]])
+        else:
+            data = np.concatenate([data, frame])
+        position += OFFSET
+    return data.astype(np.int16)
+
+def build_graph(input_filename, overlap, link_expected_length):
+    graph_runner = GraphRunner()
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    audio_splitter = AudioSplitter()
+    if overlap:
+        audio_splitter.initialize({"SPLIT_LENGTH": FRAME_LENGTH, "SPLIT_OFFSET": OFFSET})
+        merger = AudioOverlapMerger()
+        merger.initialize({"OFFSET": OFFSET})
+    else:
+        audio_splitter.initialize({"SPLIT_LENGTH": FRAME_LENGTH, "SPLIT_OFFSET": None})
+        merger = AudioMerger()
+        merger.initialize({})
+
+    graph_runner.addRoot(wavreader)
+    wavreader.addChild(audio_splitter, {"DATA": "INPUT_DATA"})
+    audio_splitter.addChild(merger, {"OUTPUT_DATA": "INPUT_DATA", "FINISHED": "FINAL_INPUT"})
+    if link_expected_length:
+        audio_splitter.addChild(merger, {"NUM_SAMPLES": "EXPECTED_LENGTH"})
+    merger.addChild(audio_splitter, {"INPUT_CONSUMED": "READY"})
+    return graph_runner, merger
+
+# Runs the splitter -> merger graph with and without compiling it and
+# checks that both give the same output.
+def check_graph(overlap, link_expected_length):
+    input_filename = write_test_wav(SAMPLING_RATE * DURATIONS[0])
+    outputs = []
+    for compile_graph in [False, True]:
+        graph_runner, merger = build_graph(input_filename, overlap, link_expected_length)
+        if compile_graph:
+            graph_runner.compile()
+        with Quiet():
+            graph_runner.run()
+        outputs.append(merger.outputs["OUTPUT_DATA"])
+    os.remove(input_filename)
+    assert outputs[0] is not None and outputs[0].shape[0] > 0
+    assert np.array_equal(outputs[0], outputs[1])
+
+def main():
+    for overlap in [False, True]:
+        for link_expected_length in [False, True]:
+            check_graph(overlap, link_expected_length)
+
+    print "seconds to merge frames of %d samples" % FRAME_LENGTH
+    print "%-10s %-8s %10s %10s %10s %14s" % ("merger", "audio s", "buffer", "expected",
+                                              "concatenate", "buffer us/s")
+    for overlap in [False, True]:
+        for duration in DURATIONS:
+            num_samples = duration * SAMPLING_RATE
+            frames = make_frames(num_samples, OFFSET if overlap else FRAME_LENGTH)
+            reference = legacy_merge(overlap, frames)
+            assert np.array_equal(run_merger(overlap, frames), reference)
+            assert np.array_equal(run_merger(overlap, frames, num_samples), reference)
+            buffer_time = best_time(lambda: run_merger(overlap, frames))
+            expected_time = best_time(lambda: run_merger(overlap, frames, num_samples))
+            legacy_time = best_time(lambda: legacy_merge(overlap, frames), repeat=1)
+            print "%-10s %-8d %10.3f %10.3f %10.3f %14.1f" % (
+                "overlap" if overlap else "merger", duration, buffer_time, expected_time,
+                legacy_time, 1e6 * buffer_time / duration)
+
+if __name__ == '__main__':
+    main()
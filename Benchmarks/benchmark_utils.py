@@ -0,0 +1,55 @@
+# Shared helpers for the benchmark scripts in this directory.
+#
+# The benchmarks build graphs directly in python, in the same way as the
+# scripts written by the GraphGenerator, so the module directories of the
+# repository are added to the python path here.
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from scipy.io import wavfile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+MODULE_DIRS = ['Standard', 'Graph', 'Effects', 'Vocoder', os.path.join('Vocoder', 'Operations')]
+
+for module_dir in reversed(MODULE_DIRS):
+    path = os.path.join(REPO_ROOT, module_dir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Writes a mono 16 bit wav file of white noise and returns its path.
+def write_test_wav(num_samples, sampling_rate=16000, seed=0):
+    random_state = np.random.RandomState(seed)
+    data = (random_state.randn(num_samples) * 3000).astype(np.int16)
+    handle, filename = tempfile.mkstemp(suffix='.wav')
+    os.close(handle)
+    wavfile.write(filename, sampling_rate, data)
+    return filename
+
+def temp_wav_filename():
+    handle, filename = tempfile.mkstemp(suffix='.wav')
+    os.close(handle)
+    return filename
+
+# Returns the best wall time of repeat calls to fn().
+def best_time(fn, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        fn()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+# Silences the progress output printed by the graph runner.
+class Quiet(object):
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def __exit__(self, *args):
+        sys.stdout.close()
+        sys.stdout = self.stdout
@@ -0,0 +1,113 @@
+# Compares single frame execution of a spectral graph against block mode,
+# in which the AudioSplitter emits FRAMES_PER_CYCLE frames per graph cycle:
+#
+#   WavReader -> AudioSplitter -> FFT -> FrequencyAbsoluter -> IFFT -> AudioOverlapMerger -> WavWriter
+#
+# Every block size must produce the same output as single frame execution.
+# A block that reaches a transformer that only takes single frames, here a
+# FIRFilter behind the IFFT, must be rejected before the graph runs.
+
+from benchmark_utils import *
+from graph_runner import *
+from wavreader import *
+from wavwriter import *
+from audio_splitter import *
+from audio_overlap_merger import *
+from fft import *
+from ifft import *
+from frequency_absoluter import *
+from fir_filter import *
+
+NUM_SAMPLES = 16000 * 5
+FFT_LENGTH = 256
+HOPSIZE = 128
+BLOCK_SIZES = [1, 8, 64, 512]
+
+def build_graph(input_filename, output_filename, frames_per_cycle=None):
+    graph_runner = GraphRunner()
+
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    audio_splitter = AudioSplitter()
+    audio_splitter.initialize({"SPLIT_LENGTH": FFT_LENGTH, "SPLIT_OFFSET": HOPSIZE,
+                               "FRAMES_PER_CYCLE": frames_per_cycle})
+    fft = FFT()
+    fft.initialize({"FFT_LENGTH": FFT_LENGTH})
+    frequency_absoluter = FrequencyAbsoluter()
+    frequency_absoluter.initialize({})
+    ifft = IFFT()
+    ifft.initialize({"IFFT_LENGTH": FFT_LENGTH})
+    audio_merger = AudioOverlapMerger()
+    audio_merger.initialize({"OFFSET": HOPSIZE})
+    wavwriter = WavWriter()
+    wavwriter.initialize({"FILENAME": output_filename})
+
+    graph_runner.addRoot(wavreader)
+    wavreader.addChild(audio_splitter, {"DATA": "INPUT_DATA"})
+    wavreader.addChild(wavwriter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+    audio_splitter.addChild(fft, {"OUTPUT_DATA": "SAMPLES"})
+    fft.addChild(frequency_absoluter, {"FREQUENCIES": "FREQUENCIES"})
+    frequency_absoluter.addChild(ifft, {"ABSOLUTE_FREQUENCIES": "FREQUENCIES"})
+    ifft.addChild(audio_merger, {"SAMPLES": "INPUT_DATA"})
+    audio_splitter.addChild(audio_merger, {"FINISHED": "FINAL_INPUT"})
+    audio_merger.addChild(audio_splitter, {"INPUT_CONSUMED": "READY"})
+    audio_merger.addChild(wavwriter, {"OUTPUT_DATA": "DATA"})
+    return graph_runner
+
+# Runs AudioSplitter -> FFT -> IFFT -> FIRFilter and returns the error.
+def check_rejected(frames_per_cycle):
+    graph_runner = GraphRunner()
+    audio_splitter = AudioSplitter()
+    audio_splitter.initialize({"SPLIT_LENGTH": FFT_LENGTH, "SPLIT_OFFSET": HOPSIZE,
+                               "FRAMES_PER_CYCLE": frames_per_cycle})
+    audio_splitter.inputs["INPUT_DATA"] = np.zeros(FFT_LENGTH * 4)
+    fft = FFT()
+    fft.initialize({"FFT_LENGTH": FFT_LENGTH})
+    ifft = IFFT()
+    ifft.initialize({"IFFT_LENGTH": FFT_LENGTH})
+    fir_filter = FIRFilter()
+    fir_filter.initialize({"FILTER_TYPE": "LOWPASS", "FILTER_LENGTH": 31, "LOW_CUTOFF": 1000})
+    fir_filter.inputs["SAMPLING_RATE"] = 16000
+
+    graph_runner.addRoot(audio_splitter)
+    audio_splitter.addChild(fft, {"OUTPUT_DATA": "SAMPLES"})
+    fft.addChild(ifft, {"FREQUENCIES": "FREQUENCIES"})
+    ifft.addChild(fir_filter, {"SAMPLES": "SAMPLES"})
+    try:
+        with Quiet():
+            graph_runner.run()
+    except ValueError as error:
+        assert fft.outputs == {}
+        return error
+    return None
+
+def main():
+    assert check_rejected(None) is None
+    assert "FIRFilter SAMPLES" in str(check_rejected(8))
+
+    input_filename = write_test_wav(NUM_SAMPLES)
+    output_filename = temp_wav_filename()
+
+    def run(frames_per_cycle):
+        graph_runner = build_graph(input_filename, output_filename, frames_per_cycle)
+        with Quiet():
+            graph_runner.run()
+
+    single_time = best_time(lambda: run(None))
+    reference = wavfile.read(output_filename)[1]
+    num_frames = (NUM_SAMPLES - FFT_LENGTH) / HOPSIZE
+
+    print "Frames: %d of %d samples" % (num_frames, FFT_LENGTH)
+    print "%-16s %10s %12s %10s" % ("frames/cycle", "time s", "us/frame", "speedup")
+    print "%-16s %10.3f %12.1f %10.2fx" % ("single", single_time, 1e6 * single_time / num_frames, 1.0)
+    for frames_per_cycle in BLOCK_SIZES:
+        block_time = best_time(lambda: run(frames_per_cycle))
+        assert np.array_equal(wavfile.read(output_filename)[1], reference)
+        print "%-16d %10.3f %12.1f %10.2fx" % (frames_per_cycle, block_time,
+            1e6 * block_time / num_frames, single_time / block_time)
+
+    for filename in [input_filename, output_filename]:
+        os.remove(filename)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+# Compares the FFT backends of fft_backends.py for FFT_LENGTH 64 to 8192,
+# transforming one frame per call (as in single frame graphs) and a block
+# of frames per call (as with an AudioSplitter in block mode).
+
+from benchmark_utils import *
+from fft_backends import *
+
+FFT_LENGTHS = [64, 128, 256, 512, 1024, 2048, 4096, 8192]
+BACKENDS = ['RECURSIVE', 'ITERATIVE', 'NUMPY']
+BLOCK_SAMPLES = 2 ** 16
+
+# Returns the best time of one call to fn(x) in microseconds, repeating the
+# call often enough to measure short transforms.
+def time_call(fn, x):
+    repeat = max(1, 2 ** 14 / x.size)
+    return 1e6 * best_time(lambda: [fn(x) for i in range(repeat)]) / repeat
+
+def main():
+    random_state = np.random.RandomState(0)
+    for frames_label, num_frames in [('1 frame', lambda n: 1), ('block', lambda n: BLOCK_SAMPLES / n)]:
+        print "us per call, %s per call" % frames_label
+        print "%-8s %8s" % ("length", "frames") + "".join("%12s" % name for name in BACKENDS)
+        for n in FFT_LENGTHS:
+            x = random_state.randn(num_frames(n), n)
+            if x.shape[0] == 1:
+                x = x[0]
+            reference = np.fft.fft(x)
+            times = []
+            for name in BACKENDS:
+                backend = get_fft_backend(name)
+                assert np.allclose(backend.fft(x), reference)
+                assert np.allclose(backend.ifft(reference), x)
+                times.append(time_call(backend.fft, x))
+            print "%-8d %8d" % (n, num_frames(n)) + "".join("%12.1f" % t for t in times)
+        print
+
+if __name__ == '__main__':
+    main()
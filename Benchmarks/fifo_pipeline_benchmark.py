@@ -0,0 +1,95 @@
+# Compares the READY/INPUT_CONSUMED handshake against FIFO edges on a
+# spectral graph:
+#
+#   WavReader -> AudioSplitter -> FFT -> FrequencyAbsoluter -> IFFT -> AudioOverlapMerger -> WavWriter
+#
+# With the handshake, the splitter waits until the merger has consumed a
+# frame, so every frame passes through the whole chain alone. With FIFO
+# inputs and no READY link, the splitter emits a frame every cycle and the
+# stages of the chain work on consecutive frames in the same cycle, which
+# a ThreadedExecutor can run in parallel.
+
+from benchmark_utils import *
+from graph_runner import *
+from threaded_executor import *
+from wavreader import *
+from wavwriter import *
+from audio_splitter import *
+from audio_overlap_merger import *
+from fft import *
+from ifft import *
+from frequency_absoluter import *
+
+NUM_SAMPLES = 16000 * 2
+FFT_LENGTH = 256
+HOPSIZE = 128
+FIFO_CAPACITY = 8
+
+def build_graph(input_filename, output_filename, pipelined):
+    graph_runner = GraphRunner()
+
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    audio_splitter = AudioSplitter()
+    audio_splitter.initialize({"SPLIT_LENGTH": FFT_LENGTH, "SPLIT_OFFSET": HOPSIZE})
+    fft = FFT()
+    fft.initialize({"FFT_LENGTH": FFT_LENGTH})
+    frequency_absoluter = FrequencyAbsoluter()
+    frequency_absoluter.initialize({})
+    ifft = IFFT()
+    ifft.initialize({"IFFT_LENGTH": FFT_LENGTH})
+    audio_merger = AudioOverlapMerger()
+    audio_merger.initialize({"OFFSET": HOPSIZE})
+    wavwriter = WavWriter()
+    wavwriter.initialize({"FILENAME": output_filename})
+    if pipelined:
+        for transformer in [fft, frequency_absoluter, ifft, audio_merger]:
+            transformer.setFifoCapacity(FIFO_CAPACITY)
+
+    graph_runner.addRoot(wavreader)
+    wavreader.addChild(audio_splitter, {"DATA": "INPUT_DATA"})
+    wavreader.addChild(wavwriter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+    audio_splitter.addChild(fft, {"OUTPUT_DATA": "SAMPLES"})
+    fft.addChild(frequency_absoluter, {"FREQUENCIES": "FREQUENCIES"})
+    frequency_absoluter.addChild(ifft, {"ABSOLUTE_FREQUENCIES": "FREQUENCIES"})
+    ifft.addChild(audio_merger, {"SAMPLES": "INPUT_DATA"})
+    audio_splitter.addChild(audio_merger, {"FINISHED": "FINAL_INPUT"})
+    if not pipelined:
+        audio_merger.addChild(audio_splitter, {"INPUT_CONSUMED": "READY"})
+    audio_merger.addChild(wavwriter, {"OUTPUT_DATA": "DATA"})
+    return graph_runner
+
+def main():
+    input_filename = write_test_wav(NUM_SAMPLES)
+    output_filename = temp_wav_filename()
+
+    print "%-12s %-10s %8s %10s" % ("edges", "executor", "cycles", "time s")
+    reference = None
+    for pipelined in [False, True]:
+        for num_workers in [None, 4]:
+            cycles = []
+            def run():
+                graph_runner = build_graph(input_filename, output_filename, pipelined)
+                executor = None
+                if num_workers is not None:
+                    executor = ThreadedExecutor(num_workers)
+                    graph_runner.setExecutor(executor)
+                with Quiet():
+                    graph_runner.run()
+                if executor is not None:
+                    executor.close()
+                cycles.append(graph_runner.num_cycles)
+
+            elapsed = best_time(run)
+            output = wavfile.read(output_filename)[1]
+            if reference is None:
+                reference = output
+            assert np.array_equal(output, reference)
+            print "%-12s %-10s %8d %10.3f" % ("fifo" if pipelined else "handshake",
+                "threads" if num_workers else "sequential", cycles[-1], elapsed)
+
+    for filename in [input_filename, output_filename]:
+        os.remove(filename)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Compares splitting 10 s of 16 kHz audio into 4 to 32 bands with one
+# FilterBank against one FIRFilter per band with the same filters, checks
+# that both produce the same bands and that the bands add up to the input.
+
+from benchmark_utils import *
+from filter_bank import *
+from fir_filter import *
+
+SAMPLING_RATE = 16000
+NUM_SAMPLES = SAMPLING_RATE * 10
+FILTER_LENGTH = 511
+NUM_BANDS = [4, 8, 16, 32]
+
+# Returns num_bands adjacent bands from 0 Hz to the Nyquist frequency, with
+# edges logarithmically spaced from 50 Hz.
+def band_edges(num_bands):
+    edges = np.geomspace(50, SAMPLING_RATE / 2, num_bands + 1).astype(int)
+    edges[0] = 0
+    return list(edges[:-1]), list(edges[1:])
+
+def run_filter_bank(samples, low_cutoffs, high_cutoffs):
+    filter_bank = FilterBank()
+    filter_bank.initialize({"LOW_CUTOFF": low_cutoffs, "HIGH_CUTOFF": high_cutoffs,
+                            "FILTER_LENGTH": FILTER_LENGTH})
+    filter_bank.inputs["SAMPLES"] = samples
+    filter_bank.inputs["SAMPLING_RATE"] = SAMPLING_RATE
+    filter_bank.compute()
+    return filter_bank.outputs
+
+def run_fir_filters(samples, low_cutoffs, high_cutoffs):
+    outputs = {}
+    for band in range(len(low_cutoffs)):
+        # FIRFilter designs a LOWPASS filter from its LOW_CUTOFF and a
+        # HIGHPASS filter from its HIGH_CUTOFF.
+        if low_cutoffs[band] == 0:
+            configs = {"FILTER_TYPE": "LOWPASS", "LOW_CUTOFF": high_cutoffs[band]}
+        elif high_cutoffs[band] >= SAMPLING_RATE / 2:
+            configs = {"FILTER_TYPE": "HIGHPASS", "HIGH_CUTOFF": low_cutoffs[band]}
+        else:
+            configs = {"FILTER_TYPE": "BANDPASS", "LOW_CUTOFF": low_cutoffs[band],
+                       "HIGH_CUTOFF": high_cutoffs[band]}
+        configs.update({"FILTER_LENGTH": FILTER_LENGTH, "WINDOW": "HAMMING"})
+        fir_filter = FIRFilter()
+        fir_filter.initialize(configs)
+        fir_filter.inputs["SAMPLES"] = samples
+        fir_filter.inputs["SAMPLING_RATE"] = SAMPLING_RATE
+        fir_filter.compute()
+        outputs["BAND_" + str(band)] = fir_filter.outputs["FILTERED_SAMPLES"]
+    return outputs
+
+def main():
+    samples = (np.random.RandomState(0).randn(NUM_SAMPLES) * 3000).astype(np.int16)
+
+    print "ms to split %d samples" % NUM_SAMPLES
+    print "%-8s %12s %12s %8s %12s" % ("bands", "FIRFilter", "FilterBank", "speedup", "sum error")
+    for num_bands in NUM_BANDS:
+        low_cutoffs, high_cutoffs = band_edges(num_bands)
+        outputs = run_filter_bank(samples, low_cutoffs, high_cutoffs)
+        fir_outputs = run_fir_filters(samples, low_cutoffs, high_cutoffs)
+        for key in outputs:
+            assert np.abs(outputs[key].astype(np.int32) - fir_outputs[key]).max() <= 1
+        # The bands add up to the delayed input, up to the rounding of each band.
+        delay = (FILTER_LENGTH - 1) / 2
+        error = np.abs(sum(band.astype(np.int32) for band in outputs.values())[delay:] -
+                       samples[:-delay]).max()
+        assert error <= num_bands
+        fir_time = best_time(lambda: run_fir_filters(samples, low_cutoffs, high_cutoffs))
+        bank_time = best_time(lambda: run_filter_bank(samples, low_cutoffs, high_cutoffs))
+        print "%-8d %12.1f %12.1f %7.1fx %12d" % (num_bands, 1e3 * fir_time, 1e3 * bank_time,
+                                                 fir_time / bank_time, error)
+
+if __name__ == '__main__':
+    main()
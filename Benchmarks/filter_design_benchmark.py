@@ -0,0 +1,61 @@
+# Times the design of the FIR filters of a graph with many identical bands:
+# the original per-tap python loop, the vectorized design without cache and
+# the cached design of filter_design.py. Also reports the stopband
+# attenuation of a 1 kHz lowpass filter for each window.
+
+from benchmark_utils import *
+from filter_design import *
+
+SAMPLING_RATE = 16000
+NUM_FILTERS = 64
+FILTER_LENGTHS = [64, 256, 1024]
+
+# The original FIRFilter.compute_bandpass_coefficients().
+def legacy_bandpass(filter_length, low_cutoff, high_cutoff, sampling_rate):
+    coefficients = np.zeros((filter_length,), dtype=np.float)
+    alpha = 2.0 * np.pi * float(low_cutoff) / sampling_rate
+    beta = 2.0 * np.pi * float(high_cutoff) / sampling_rate
+    for n in range(0, filter_length):
+        nn = n - (float(filter_length - 1) / 2.0)
+        if (nn == 0):
+            coefficients[n] = (beta - alpha) / np.pi
+        else:
+            coefficients[n] = (np.sin(nn * beta) - np.sin(nn * alpha)) / (nn * np.pi)
+    return coefficients
+
+# Largest gain in dB above 1.25 times the cutoff frequency.
+def stopband_attenuation(coefficients, cutoff):
+    response = np.abs(np.fft.rfft(coefficients, 1 << 16))
+    frequencies = np.arange(response.shape[0]) * float(SAMPLING_RATE) / (1 << 16)
+    return -20 * np.log10(np.max(response[frequencies > 1.25 * cutoff]))
+
+def main():
+    print "ms to design %d identical BANDPASS filters" % NUM_FILTERS
+    print "%-8s %12s %12s %12s" % ("taps", "legacy", "vectorized", "cached")
+    for filter_length in FILTER_LENGTHS:
+        reference = legacy_bandpass(filter_length, 300, 3000, SAMPLING_RATE)
+        assert np.allclose(design_fir_filter('BANDPASS', filter_length, SAMPLING_RATE, 300, 3000),
+                           reference)
+        legacy_time = best_time(lambda: [legacy_bandpass(filter_length, 300, 3000, SAMPLING_RATE)
+                                         for i in range(NUM_FILTERS)])
+        vectorized_time = best_time(lambda: [compute_fir_coefficients(
+            'BANDPASS', filter_length, SAMPLING_RATE, 300, 3000, 'RECTANGULAR', None)
+            for i in range(NUM_FILTERS)])
+        def cached():
+            filter_cache.clear()
+            for i in range(NUM_FILTERS):
+                design_fir_filter('BANDPASS', filter_length, SAMPLING_RATE, 300, 3000)
+        cached_time = best_time(cached)
+        print "%-8d %12.2f %12.2f %12.2f" % (filter_length, 1e3 * legacy_time,
+                                             1e3 * vectorized_time, 1e3 * cached_time)
+    print
+
+    print "stopband attenuation in dB of a 1 kHz LOWPASS filter"
+    print "%-8s" % "taps" + "".join("%12s" % window for window in WINDOW_TYPES)
+    for filter_length in FILTER_LENGTHS:
+        print "%-8d" % filter_length + "".join("%12.1f" % stopband_attenuation(
+            design_fir_filter('LOWPASS', filter_length, SAMPLING_RATE, 1000, window=window), 1000)
+            for window in WINDOW_TYPES)
+
+if __name__ == '__main__':
+    main()
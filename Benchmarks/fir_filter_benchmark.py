@@ -0,0 +1,73 @@
+# Compares the convolution methods of FIRFilter for filter lengths of 16 to
+# 2048 taps on 10 s of 16 kHz audio, filtered at once and in blocks of 256
+# samples, and checks that block-wise filtering matches whole-signal
+# filtering. The original per-sample python loop is timed on 4000 samples and
+# extrapolated to the full length.
+
+from benchmark_utils import *
+from fir_filter import *
+
+NUM_SAMPLES = 16000 * 10
+LEGACY_SAMPLES = 4000
+BLOCK_LENGTH = 256
+FILTER_LENGTHS = [16, 64, 256, 512, 1024, 2048]
+# (column name, CONVOLUTION, FFT_BACKEND).
+CONVOLUTIONS = [('DIRECT', 'DIRECT', None), ('FFT', 'FFT', 'ITERATIVE'), ('FFT NP', 'FFT', 'NUMPY')]
+
+def create_filter(filter_length, convolution):
+    name, method, backend = convolution
+    fir_filter = FIRFilter()
+    fir_filter.initialize({"FILTER_TYPE": "LOWPASS", "FILTER_LENGTH": filter_length,
+                           "LOW_CUTOFF": 1000, "CONVOLUTION": method, "FFT_BACKEND": backend})
+    fir_filter.inputs["SAMPLING_RATE"] = 16000
+    return fir_filter
+
+def filter_blocks(fir_filter, samples, block_length):
+    filtered = []
+    for start in range(0, samples.shape[0], block_length):
+        fir_filter.inputs["SAMPLES"] = samples[start:start + block_length]
+        fir_filter.compute()
+        filtered.append(fir_filter.outputs["FILTERED_SAMPLES"])
+    return np.concatenate(filtered)
+
+# The original FIRFilter.compute(), which keeps the history in a list.
+def legacy_filter(fir_filter, samples):
+    fir_filter.compute_coefficients(16000)
+    sample_history = []
+    filtered_samples = np.zeros((samples.shape[0],), dtype=np.int16)
+    for i in range(0, samples.shape[0]):
+        result = 0.0
+        sample_history.insert(0, samples[i])
+        if len(sample_history) > fir_filter.filter_length:
+            sample_history = sample_history[:-1]
+        for j in range(0, len(sample_history)):
+            result += sample_history[j] * fir_filter.coefficients[j]
+        filtered_samples[i] = result
+    return filtered_samples
+
+def main():
+    samples = (np.random.RandomState(0).randn(NUM_SAMPLES) * 3000).astype(np.int16)
+
+    print "seconds to filter %d samples" % NUM_SAMPLES
+    print "%-8s %12s" % ("taps", "legacy") + "".join(
+        "%12s %12s" % (name + " all", name + " blk") for name, method, backend in CONVOLUTIONS)
+    for filter_length in FILTER_LENGTHS:
+        legacy_input = samples[:LEGACY_SAMPLES]
+        legacy_output = legacy_filter(create_filter(filter_length, CONVOLUTIONS[0]), legacy_input)
+        legacy_time = best_time(lambda: legacy_filter(create_filter(filter_length, CONVOLUTIONS[0]),
+                                                       legacy_input), repeat=1)
+        times = []
+        for convolution in CONVOLUTIONS:
+            whole = filter_blocks(create_filter(filter_length, convolution), samples, NUM_SAMPLES)
+            blocks = filter_blocks(create_filter(filter_length, convolution), samples, BLOCK_LENGTH)
+            assert np.abs(whole.astype(np.int32) - blocks).max() <= 1
+            assert np.abs(whole[:LEGACY_SAMPLES].astype(np.int32) - legacy_output).max() <= 1
+            times.append(best_time(lambda: filter_blocks(create_filter(filter_length, convolution),
+                                                         samples, NUM_SAMPLES)))
+            times.append(best_time(lambda: filter_blocks(create_filter(filter_length, convolution),
+                                                         samples, BLOCK_LENGTH)))
+        print "%-8d %12.2f" % (filter_length, legacy_time * NUM_SAMPLES / LEGACY_SAMPLES) + \
+            "".join("%12.4f" % t for t in times)
+
+if __name__ == '__main__':
+    main()
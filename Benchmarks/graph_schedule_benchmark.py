@@ -0,0 +1,103 @@
+# Compares the BFS graph runner against replaying a compiled schedule
+# on the same frame based graph:
+#
+#   WavReader -> AudioSplitter -> FrequencyAbsoluter (x CHAIN_LENGTH) -> AudioMerger -> WavWriter
+#
+# Small frames are used so that the cost of graph plumbing dominates.
+#
+# Also checks that inputs which initialize() did not declare are accepted:
+# set directly they do not affect readiness, and linked they are waited for.
+
+from benchmark_utils import *
+from graph_runner import *
+from wavreader import *
+from wavwriter import *
+from audio_splitter import *
+from audio_merger import *
+from frequency_absoluter import *
+
+NUM_SAMPLES = 16000 * 10
+SPLIT_LENGTH = 32
+CHAIN_LENGTH = 4
+
+def build_graph(input_filename, output_filename):
+    graph_runner = GraphRunner()
+
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    audio_splitter = AudioSplitter()
+    audio_splitter.initialize({"SPLIT_LENGTH": SPLIT_LENGTH, "SPLIT_OFFSET": None})
+    audio_merger = AudioMerger()
+    audio_merger.initialize({})
+    wavwriter = WavWriter()
+    wavwriter.initialize({"FILENAME": output_filename})
+
+    graph_runner.addRoot(wavreader)
+    wavreader.addChild(audio_splitter, {"DATA": "INPUT_DATA"})
+    wavreader.addChild(wavwriter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+
+    previous, previous_key = audio_splitter, "OUTPUT_DATA"
+    for i in range(CHAIN_LENGTH):
+        frequency_absoluter = FrequencyAbsoluter()
+        frequency_absoluter.initialize({})
+        previous.addChild(frequency_absoluter, {previous_key: "FREQUENCIES"})
+        previous, previous_key = frequency_absoluter, "ABSOLUTE_FREQUENCIES"
+
+    previous.addChild(audio_merger, {previous_key: "INPUT_DATA"})
+    audio_splitter.addChild(audio_merger, {"FINISHED": "FINAL_INPUT"})
+    audio_merger.addChild(audio_splitter, {"INPUT_CONSUMED": "READY"})
+    audio_merger.addChild(wavwriter, {"OUTPUT_DATA": "DATA"})
+    return graph_runner
+
+def check_undeclared_inputs():
+    child = FrequencyAbsoluter()
+    child.initialize({})
+    child.setInput("UNDECLARED", 1)
+    assert child.inputs["UNDECLARED"] == 1 and child.ready_mask == 0
+
+    first = FrequencyAbsoluter()
+    first.initialize({})
+    second = FrequencyAbsoluter()
+    second.initialize({})
+    first.addChild(child, {"ABSOLUTE_FREQUENCIES": "FREQUENCIES"})
+    second.addChild(child, {"ABSOLUTE_FREQUENCIES": "UNDECLARED"})
+    first.outputs["ABSOLUTE_FREQUENCIES"] = np.ones(4)
+    second.outputs["ABSOLUTE_FREQUENCIES"] = np.zeros(4)
+    assert first.notifyChildren() == []
+    assert second.notifyChildren() == [child]
+    assert np.array_equal(child.inputs["UNDECLARED"], np.zeros(4))
+
+def main():
+    check_undeclared_inputs()
+
+    input_filename = write_test_wav(NUM_SAMPLES)
+    bfs_filename = temp_wav_filename()
+    schedule_filename = temp_wav_filename()
+
+    def run_bfs():
+        build_graph(input_filename, bfs_filename).run()
+
+    def run_schedule():
+        graph_runner = build_graph(input_filename, schedule_filename)
+        graph_runner.compile()
+        graph_runner.run()
+
+    with Quiet():
+        bfs_time = best_time(run_bfs)
+        schedule_time = best_time(run_schedule)
+
+    bfs_output = wavfile.read(bfs_filename)[1]
+    schedule_output = wavfile.read(schedule_filename)[1]
+    assert np.array_equal(bfs_output, schedule_output)
+
+    num_frames = NUM_SAMPLES / SPLIT_LENGTH
+    print "Frames:            %d" % num_frames
+    print "BFS runner:        %.3f s (%.1f us/frame)" % (bfs_time, 1e6 * bfs_time / num_frames)
+    print "Compiled schedule: %.3f s (%.1f us/frame)" % (schedule_time, 1e6 * schedule_time / num_frames)
+    print "Speedup:           %.2fx" % (bfs_time / schedule_time)
+
+    for filename in [input_filename, bfs_filename, schedule_filename]:
+        os.remove(filename)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Compares full and half spectrum processing on a robotization graph in
+# block mode:
+#
+#   WavReader -> AudioSplitter -> FFT -> FrequencyAbsoluter -> IFFT -> AudioOverlapMerger -> WavWriter
+#
+# In half spectrum mode FFT, FrequencyAbsoluter and IFFT only handle the
+# FFT_LENGTH / 2 + 1 bins up to the Nyquist frequency. Both modes must
+# produce the same output up to rounding of the final samples.
+
+from benchmark_utils import *
+from graph_runner import *
+from wavreader import *
+from wavwriter import *
+from audio_splitter import *
+from audio_overlap_merger import *
+from fft import *
+from ifft import *
+from frequency_absoluter import *
+
+NUM_SAMPLES = 16000 * 10
+FFT_LENGTHS = [256, 1024, 4096]
+FRAMES_PER_CYCLE = 64
+BACKENDS = ['ITERATIVE', 'NUMPY']
+
+def build_graph(input_filename, output_filename, fft_length, backend, half_spectrum):
+    graph_runner = GraphRunner()
+
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    audio_splitter = AudioSplitter()
+    audio_splitter.initialize({"SPLIT_LENGTH": fft_length, "SPLIT_OFFSET": fft_length / 2,
+                               "FRAMES_PER_CYCLE": FRAMES_PER_CYCLE})
+    fft = FFT()
+    fft.initialize({"FFT_LENGTH": fft_length, "FFT_BACKEND": backend, "HALF_SPECTRUM": half_spectrum})
+    frequency_absoluter = FrequencyAbsoluter()
+    frequency_absoluter.initialize({})
+    ifft = IFFT()
+    ifft.initialize({"IFFT_LENGTH": fft_length, "FFT_BACKEND": backend, "HALF_SPECTRUM": half_spectrum})
+    audio_merger = AudioOverlapMerger()
+    audio_merger.initialize({"OFFSET": fft_length / 2})
+    wavwriter = WavWriter()
+    wavwriter.initialize({"FILENAME": output_filename})
+
+    graph_runner.addRoot(wavreader)
+    wavreader.addChild(audio_splitter, {"DATA": "INPUT_DATA"})
+    wavreader.addChild(wavwriter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+    audio_splitter.addChild(fft, {"OUTPUT_DATA": "SAMPLES"})
+    fft.addChild(frequency_absoluter, {"FREQUENCIES": "FREQUENCIES"})
+    frequency_absoluter.addChild(ifft, {"ABSOLUTE_FREQUENCIES": "FREQUENCIES"})
+    ifft.addChild(audio_merger, {"SAMPLES": "INPUT_DATA"})
+    audio_splitter.addChild(audio_merger, {"FINISHED": "FINAL_INPUT"})
+    audio_merger.addChild(audio_splitter, {"INPUT_CONSUMED": "READY"})
+    audio_merger.addChild(wavwriter, {"OUTPUT_DATA": "DATA"})
+    return graph_runner
+
+def main():
+    input_filename = write_test_wav(NUM_SAMPLES)
+    output_filename = temp_wav_filename()
+
+    def run(fft_length, backend, half_spectrum):
+        graph_runner = build_graph(input_filename, output_filename, fft_length, backend, half_spectrum)
+        with Quiet():
+            graph_runner.run()
+
+    print "%-8s %-10s %10s %10s %8s" % ("length", "backend", "full s", "half s", "speedup")
+    for fft_length in FFT_LENGTHS:
+        for backend in BACKENDS:
+            full_time = best_time(lambda: run(fft_length, backend, False))
+            full_output = wavfile.read(output_filename)[1].astype(np.int32)
+            half_time = best_time(lambda: run(fft_length, backend, True))
+            half_output = wavfile.read(output_filename)[1].astype(np.int32)
+            assert np.abs(full_output - half_output).max() <= 1
+            print "%-8d %-10s %10.3f %10.3f %7.2fx" % (fft_length, backend, full_time, half_time,
+                                                      full_time / half_time)
+
+    for filename in [input_filename, output_filename]:
+        os.remove(filename)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Compares the resynthesis chain of a phase vocoder graph against the ISTFT
+# transformer on 60 s of 16 kHz audio, after an STFT:
+#
+#   chain: WavReader -> STFT -> IFFT -> VocoderResynthesizer -> AudioOverlapMerger -> WavWriter
+#   istft: WavReader -> STFT -> ISTFT -> WavWriter
+#
+# The ISTFT without NORMALIZE must produce the output of the chain. With
+# NORMALIZE it must reconstruct the input, except for the first and last
+# samples, where the window sum almost vanishes and is not divided by.
+#
+# Since the AudioOverlapMerger collects its output in an AudioBuffer, the
+# chain and the ISTFT take about the same time; the ISTFT saves the
+# intermediate arrays between the transformers of the chain.
+
+from benchmark_utils import *
+from graph_runner import *
+from wavreader import *
+from wavwriter import *
+from audio_overlap_merger import *
+from ifft import *
+from stft import *
+from istft import *
+from vocoder_resynthesizer import *
+
+NUM_SAMPLES = 16000 * 60 + 100
+FFT_LENGTH = 1024
+HOP = 256
+
+def build_graph(input_filename, output_filename, use_istft, normalize=False):
+    graph_runner = GraphRunner()
+
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    stft = STFT()
+    stft.initialize({"FFT_LENGTH": FFT_LENGTH, "HOP": HOP, "HALF_SPECTRUM": True})
+    wavwriter = WavWriter()
+    wavwriter.initialize({"FILENAME": output_filename})
+
+    graph_runner.addRoot(wavreader)
+    wavreader.addChild(wavwriter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+    wavreader.addChild(stft, {"DATA": "SAMPLES"})
+    if use_istft:
+        istft = ISTFT()
+        istft.initialize({"FFT_LENGTH": FFT_LENGTH, "HOP": HOP, "HALF_SPECTRUM": True,
+                          "NORMALIZE": normalize})
+        stft.addChild(istft, {"FREQUENCIES": "FREQUENCIES"})
+        istft.addChild(wavwriter, {"OUTPUT_DATA": "DATA"})
+    else:
+        ifft = IFFT()
+        ifft.initialize({"IFFT_LENGTH": FFT_LENGTH, "FFT_BACKEND": "NUMPY", "HALF_SPECTRUM": True})
+        resynthesizer = VocoderResynthesizer()
+        resynthesizer.initialize({"FFT_LENGTH": FFT_LENGTH})
+        audio_merger = AudioOverlapMerger()
+        audio_merger.initialize({"OFFSET": HOP})
+        stft.addChild(ifft, {"FREQUENCIES": "FREQUENCIES"})
+        stft.addChild(audio_merger, {"FINISHED": "FINAL_INPUT"})
+        ifft.addChild(resynthesizer, {"SAMPLES": "INPUT_SAMPLES"})
+        resynthesizer.addChild(audio_merger, {"OUTPUT_SAMPLES": "INPUT_DATA"})
+        audio_merger.addChild(wavwriter, {"OUTPUT_DATA": "DATA"})
+    return graph_runner
+
+def main():
+    input_filename = write_test_wav(NUM_SAMPLES)
+    output_filename = temp_wav_filename()
+
+    def run(use_istft, normalize=False):
+        graph_runner = build_graph(input_filename, output_filename, use_istft, normalize)
+        with Quiet():
+            graph_runner.run()
+        return wavfile.read(output_filename)[1].astype(np.int32)
+
+    reference = run(False)
+    assert np.abs(run(True) - reference).max() <= 1
+    reconstructed = run(True, True)
+    original = wavfile.read(input_filename)[1][:reconstructed.shape[0]]
+    assert np.abs(reconstructed - original)[HOP:-HOP].max() <= 1
+
+    print "seconds to resynthesize %d frames of %d samples" % (
+        (NUM_SAMPLES - FFT_LENGTH) / HOP + 1, FFT_LENGTH)
+    for label, use_istft, normalize in [("chain", False, False), ("istft", True, False),
+                                        ("istft, normalized", True, True)]:
+        print "%-20s %10.3f" % (label, best_time(lambda: run(use_istft, normalize)))
+
+    for filename in [input_filename, output_filename]:
+        os.remove(filename)
+
+if __name__ == '__main__':
+    main()
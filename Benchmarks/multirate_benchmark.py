@@ -0,0 +1,118 @@
+# Compares a 500 Hz FIR lowpass of 60 s of 16 kHz audio computed at the
+# full rate with the same filter computed at a quarter of the rate:
+#
+#   full rate:  WavReader -> FIRFilter (1023 taps) -> WavWriter
+#   multirate:  WavReader -> Decimator (4) -> FIRFilter (255 taps) -> Interpolator (4) -> WavWriter
+#
+# Both FIR filters have the same transition width in Hz. The FIRFilter of
+# the multirate graph designs its coefficients from the SAMPLING_RATE
+# output of the Decimator. Both graphs are run on the whole file at once
+# and with the reader output split into blocks of 4096 samples.
+#
+# The multirate output is delayed by the two resamplers and differs in the
+# delay of its FIR filter. Shifted by DELAY samples, it must match the full
+# rate output up to ERROR_TOLERANCE of its RMS. The block outputs, which
+# end at the last complete block, must equal the whole file outputs.
+
+from benchmark_utils import *
+from graph_runner import *
+from wavreader import *
+from wavwriter import *
+from audio_splitter import *
+from audio_merger import *
+from fir_filter import *
+from resampler import *
+
+NUM_SAMPLES = 16000 * 60
+FACTOR = 4
+FULL_RATE_TAPS = 1023
+CUTOFF = 500
+BLOCK_LENGTH = 4096
+HALF_LENGTH = 10
+# The delay of the Decimator and the Interpolator, HALF_LENGTH samples at
+# the low rate each, and of the FIR filters, in samples at the full rate.
+DELAY = (2 * HALF_LENGTH + (FULL_RATE_TAPS / FACTOR - 1) / 2) * FACTOR - (FULL_RATE_TAPS - 1) / 2
+ERROR_TOLERANCE = 0.01
+
+def build_graph(input_filename, output_filename, multirate, block_length):
+    graph_runner = GraphRunner()
+
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    wavwriter = WavWriter()
+    wavwriter.initialize({"FILENAME": output_filename})
+    fir_filter = FIRFilter()
+    fir_filter.initialize({"FILTER_TYPE": "LOWPASS", "LOW_CUTOFF": CUTOFF, "WINDOW": "HAMMING",
+                           "FILTER_LENGTH": FULL_RATE_TAPS / FACTOR if multirate else FULL_RATE_TAPS})
+
+    graph_runner.addRoot(wavreader)
+    source, source_key = wavreader, "DATA"
+    if block_length is not None:
+        audio_splitter = AudioSplitter()
+        audio_splitter.initialize({"SPLIT_LENGTH": block_length, "SPLIT_OFFSET": None})
+        audio_merger = AudioMerger()
+        audio_merger.initialize({})
+        wavreader.addChild(audio_splitter, {"DATA": "INPUT_DATA"})
+        audio_splitter.addChild(audio_merger, {"FINISHED": "FINAL_INPUT"})
+        audio_merger.addChild(audio_splitter, {"INPUT_CONSUMED": "READY"})
+        audio_merger.addChild(wavwriter, {"OUTPUT_DATA": "DATA"})
+        source, source_key = audio_splitter, "OUTPUT_DATA"
+        sink, sink_key = audio_merger, "INPUT_DATA"
+    else:
+        sink, sink_key = wavwriter, "DATA"
+    wavreader.addChild(wavwriter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+
+    if multirate:
+        decimator = Decimator()
+        decimator.initialize({"FACTOR": FACTOR, "HALF_LENGTH": HALF_LENGTH})
+        interpolator = Interpolator()
+        interpolator.initialize({"FACTOR": FACTOR, "HALF_LENGTH": HALF_LENGTH})
+        source.addChild(decimator, {source_key: "SAMPLES"})
+        wavreader.addChild(decimator, {"SAMPLING_RATE": "SAMPLING_RATE"})
+        decimator.addChild(fir_filter, {"RESAMPLED_SAMPLES": "SAMPLES"})
+        decimator.addChild(fir_filter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+        fir_filter.addChild(interpolator, {"FILTERED_SAMPLES": "SAMPLES"})
+        decimator.addChild(interpolator, {"SAMPLING_RATE": "SAMPLING_RATE"})
+        interpolator.addChild(sink, {"RESAMPLED_SAMPLES": sink_key})
+    else:
+        source.addChild(fir_filter, {source_key: "SAMPLES"})
+        wavreader.addChild(fir_filter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+        fir_filter.addChild(sink, {"FILTERED_SAMPLES": sink_key})
+    return graph_runner
+
+def main():
+    input_filename = write_test_wav(NUM_SAMPLES)
+    output_filename = temp_wav_filename()
+
+    def run(multirate, block_length):
+        graph_runner = build_graph(input_filename, output_filename, multirate, block_length)
+        with Quiet():
+            graph_runner.run()
+        return wavfile.read(output_filename)[1]
+
+    # Relative RMS error of the multirate output, away from the edges.
+    full_rate = run(False, None).astype(np.float64)
+    multirate = run(True, None).astype(np.float64)
+    edge = FULL_RATE_TAPS
+    error = multirate[DELAY + edge:] - full_rate[edge:full_rate.shape[0] - DELAY]
+    relative_error = np.sqrt(np.mean(error ** 2)) / np.std(full_rate)
+    assert relative_error < ERROR_TOLERANCE
+
+    for multirate_graph, whole in [(False, full_rate), (True, multirate)]:
+        blocks = run(multirate_graph, BLOCK_LENGTH)
+        assert np.array_equal(blocks, whole[:blocks.shape[0]])
+
+    print "relative RMS error of the multirate output: %.4f" % relative_error
+    print "seconds to lowpass %d samples" % NUM_SAMPLES
+    print "%-12s %12s %12s %8s" % ("input", "full rate", "multirate", "speedup")
+    for label, block_length in [("whole file", None), ("blocks", BLOCK_LENGTH)]:
+        full_time = best_time(lambda: run(False, block_length))
+        multirate_time = best_time(lambda: run(True, block_length))
+        print "%-12s %12.3f %12.3f %7.1fx" % (label, full_time, multirate_time,
+                                             full_time / multirate_time)
+
+    for filename in [input_filename, output_filename]:
+        os.remove(filename)
+
+if __name__ == '__main__':
+    main()
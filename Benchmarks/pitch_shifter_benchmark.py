@@ -0,0 +1,74 @@
+# Measures the frames per second of PitchShifter on half spectra of 1024
+# point FFTs, one frame per call and in blocks of 64 frames as sent by an
+# AudioSplitter in block mode, and checks that both match the original
+# per-bin python loop (with the missing imaginary unit of its np.exp call
+# restored).
+
+from benchmark_utils import *
+from pitch_shifter import *
+
+FFT_LENGTH = 1024
+NUM_BINS = FFT_LENGTH / 2 + 1
+HOPSIZE = FFT_LENGTH / 4
+NUM_FRAMES = 4096
+LEGACY_FRAMES = 64
+FRAMES_PER_CYCLE = 64
+PITCH_SHIFT_FACTOR = 1.5
+
+def create_pitch_shifter():
+    pitch_shifter = PitchShifter()
+    pitch_shifter.initialize({"FFT_LENGTH": FFT_LENGTH, "PITCH_SHIFT_FACTOR": PITCH_SHIFT_FACTOR,
+                              "ANALYSIS_HOPSIZE": HOPSIZE})
+    return pitch_shifter
+
+def shift_blocks(pitch_shifter, spectra, frames_per_cycle):
+    output = []
+    for start in range(0, spectra.shape[0], frames_per_cycle):
+        if frames_per_cycle == 1:
+            pitch_shifter.inputs["INPUT_FREQUENCIES"] = spectra[start]
+        else:
+            pitch_shifter.inputs["INPUT_FREQUENCIES"] = spectra[start:start + frames_per_cycle]
+        pitch_shifter.compute()
+        output.append(pitch_shifter.outputs["OUTPUT_FREQUENCIES"].reshape(-1, NUM_BINS))
+    return np.concatenate(output)
+
+# The original PitchShifter.compute(), one frame per call.
+def legacy_shift(spectra):
+    pitch_shifter = create_pitch_shifter()
+    pitch_shifter.initialize_phases(NUM_BINS)
+    omega = pitch_shifter.omega
+    prev_phase = np.zeros((NUM_BINS,), dtype=np.float)
+    new_phase = np.zeros((NUM_BINS,), dtype=np.float)
+    output = np.zeros(spectra.shape, dtype=np.complex)
+    for frame in range(spectra.shape[0]):
+        magnitude = np.abs(spectra[frame])
+        phase = np.angle(spectra[frame])
+        for i in range(0, NUM_BINS):
+            delta_phase = omega[i] + pitch_shifter.phasewrap(phase[i] - prev_phase[i] - omega[i])
+            prev_phase[i] = phase[i]
+            new_phase[i] = pitch_shifter.phasewrap(new_phase[i] + delta_phase*PITCH_SHIFT_FACTOR)
+            output[frame, i] = magnitude[i] * np.exp(1j * new_phase[i])
+    return output
+
+def main():
+    random_state = np.random.RandomState(0)
+    frames = random_state.randn(NUM_FRAMES, FFT_LENGTH) * 3000
+    spectra = np.fft.rfft(frames)
+
+    legacy_output = legacy_shift(spectra[:LEGACY_FRAMES])
+    legacy_time = best_time(lambda: legacy_shift(spectra[:LEGACY_FRAMES]), repeat=1)
+    frame_output = shift_blocks(create_pitch_shifter(), spectra, 1)
+    block_output = shift_blocks(create_pitch_shifter(), spectra, FRAMES_PER_CYCLE)
+    assert np.allclose(frame_output[:LEGACY_FRAMES], legacy_output, atol=1e-6 * np.abs(spectra).max())
+    assert np.allclose(block_output, frame_output, atol=1e-6 * np.abs(spectra).max())
+
+    frame_time = best_time(lambda: shift_blocks(create_pitch_shifter(), spectra, 1))
+    block_time = best_time(lambda: shift_blocks(create_pitch_shifter(), spectra, FRAMES_PER_CYCLE))
+
+    print "frames per second, %d bins" % NUM_BINS
+    print "%-24s %12.0f" % ("legacy", LEGACY_FRAMES / legacy_time)
+    print "%-24s %12.0f" % ("vectorized, 1 frame", NUM_FRAMES / frame_time)
+    print "%-24s %12.0f" % ("vectorized, %d frames" % FRAMES_PER_CYCLE, NUM_FRAMES / block_time)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# Measures the ProcessExecutor on two graphs:
+#
+# 1. Multi-band FIR filtering, WavReader -> FIRFilter (x NUM_BANDS) -> WavWriter,
+#    comparing sequential execution against one worker per band, once with
+#    short filters and once with long DIRECT filters over a longer signal,
+#    where the compute time of every worker is far above the cost of
+#    passing its input through /dev/shm. The speedup of the long filters
+#    needs as many cores as bands.
+# 2. The frame based graph of graph_schedule_benchmark.py with every
+#    transformer placed on its own worker, reporting the shared memory
+#    transfer overhead of every edge against the compute time of its consumer,
+#    and checking that no shared memory segment is left after the run.
+
+from benchmark_utils import *
+from graph_runner import *
+from process_executor import *
+from wavreader import *
+from wavwriter import *
+from fir_filter import *
+import graph_schedule_benchmark
+
+NUM_SAMPLES = 8000
+NUM_BANDS = 3
+FILTER_LENGTH = 32
+BANDS = [(None, 500), (500, 2000), (2000, None)]
+LARGE_NUM_SAMPLES = 16000 * 10
+LARGE_FILTER_LENGTH = 1023
+
+def build_band_graph(input_filename, output_filenames, filter_length=FILTER_LENGTH, convolution="AUTO"):
+    graph_runner = GraphRunner()
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    graph_runner.addRoot(wavreader)
+
+    for band in range(NUM_BANDS):
+        low_cutoff, high_cutoff = BANDS[band]
+        if low_cutoff is None:
+            filter_type = "LOWPASS"
+            low_cutoff = high_cutoff
+        elif high_cutoff is None:
+            filter_type = "HIGHPASS"
+            high_cutoff = low_cutoff
+        else:
+            filter_type = "BANDPASS"
+
+        fir_filter = FIRFilter()
+        fir_filter.initialize({"FILTER_TYPE": filter_type, "FILTER_LENGTH": filter_length,
+                               "LOW_CUTOFF": low_cutoff, "HIGH_CUTOFF": high_cutoff,
+                               "CONVOLUTION": convolution})
+        wavwriter = WavWriter()
+        wavwriter.initialize({"FILENAME": output_filenames[band]})
+
+        wavreader.addChild(fir_filter, {"DATA": "SAMPLES"})
+        wavreader.addChild(fir_filter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+        wavreader.addChild(wavwriter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+        fir_filter.addChild(wavwriter, {"FILTERED_SAMPLES": "DATA"})
+
+    return graph_runner
+
+def run_band_graph(input_filename, output_filenames, num_workers, *args):
+    graph_runner = build_band_graph(input_filename, output_filenames, *args)
+    executor = None
+    if num_workers > 0:
+        executor = ProcessExecutor(graph_runner.roots, num_workers=num_workers)
+        graph_runner.setExecutor(executor)
+
+    start = time.time()
+    with Quiet():
+        graph_runner.run()
+    elapsed = time.time() - start
+
+    if executor is not None:
+        executor.close()
+    return elapsed, executor
+
+def main():
+    input_filename = write_test_wav(NUM_SAMPLES)
+
+    # Multi-band graph.
+    sequential_filenames = [temp_wav_filename() for band in range(NUM_BANDS)]
+    process_filenames = [temp_wav_filename() for band in range(NUM_BANDS)]
+    sequential_time, executor = run_band_graph(input_filename, sequential_filenames, 0)
+    process_time, executor = run_band_graph(input_filename, process_filenames, NUM_BANDS)
+    for band in range(NUM_BANDS):
+        assert np.array_equal(wavfile.read(sequential_filenames[band])[1],
+                              wavfile.read(process_filenames[band])[1])
+
+    print "Multi-band FIR graph (%d bands, %d taps, %d samples)" % (NUM_BANDS, FILTER_LENGTH, NUM_SAMPLES)
+    print "Sequential:        %.3f s" % sequential_time
+    print "Process executor:  %.3f s with %d workers (%.2fx)" % (process_time, NUM_BANDS,
+                                                              sequential_time / process_time)
+    print
+    print executor.report()
+    print
+
+    # Multi-band graph with long filters.
+    large_filename = write_test_wav(LARGE_NUM_SAMPLES)
+    args = (LARGE_FILTER_LENGTH, "DIRECT")
+    sequential_time, executor = run_band_graph(large_filename, sequential_filenames, 0, *args)
+    process_time, executor = run_band_graph(large_filename, process_filenames, NUM_BANDS, *args)
+    for band in range(NUM_BANDS):
+        assert np.array_equal(wavfile.read(sequential_filenames[band])[1],
+                              wavfile.read(process_filenames[band])[1])
+    transfer_time = sum(stats[2] + stats[3] for stats in executor.edge_stats.itervalues())
+    compute_time = sum(stats[1] for stats in executor.compute_stats.itervalues())
+    assert transfer_time < 0.1 * compute_time
+
+    print "Multi-band FIR graph (%d bands, %d taps, %d samples, %d cores)" % (NUM_BANDS,
+        LARGE_FILTER_LENGTH, LARGE_NUM_SAMPLES, cpu_count())
+    print "Sequential:        %.3f s" % sequential_time
+    print "Process executor:  %.3f s with %d workers (%.2fx)" % (process_time, NUM_BANDS,
+                                                              sequential_time / process_time)
+    print "Transfer:          %.1f ms for %.1f ms of compute" % (1e3 * transfer_time, 1e3 * compute_time)
+    print
+    print executor.report()
+    print
+
+    # Frame based graph with every transformer on its own worker.
+    output_filename = temp_wav_filename()
+    graph_runner = graph_schedule_benchmark.build_graph(input_filename, output_filename)
+    num_transformers = len(discover_transformers(graph_runner.roots)[0])
+    executor = ProcessExecutor(graph_runner.roots, num_workers=num_transformers,
+                               assignment=range(num_transformers))
+    graph_runner.setExecutor(executor)
+    with Quiet():
+        graph_runner.run()
+    # Segments are removed once no transformer will map them anymore.
+    assert os.listdir(executor.shared_memory_dir) == []
+    executor.close()
+
+    print "Frame graph, one transformer per worker (SPLIT_LENGTH %d)" % graph_schedule_benchmark.SPLIT_LENGTH
+    print executor.report()
+
+    for filename in [input_filename, large_filename, output_filename] + sequential_filenames + process_filenames:
+        os.remove(filename)
+
+if __name__ == '__main__':
+    main()
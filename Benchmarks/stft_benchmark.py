@@ -0,0 +1,147 @@
+# Compares the analysis chain of a phase vocoder graph against the STFT
+# transformer on 10 s of 16 kHz audio:
+#
+#   chain: WavReader -> AudioSplitter -> VocoderAnalyzer -> FFT -> IFFT -> VocoderResynthesizer -> AudioOverlapMerger -> WavWriter
+#   stft:  WavReader -> STFT -> IFFT -> VocoderResynthesizer -> AudioOverlapMerger -> WavWriter
+#
+# The chain runs one frame per graph cycle or FRAMES_PER_CYCLE frames per
+# cycle, the STFT transforms all frames in one cycle. All graphs must
+# produce the same output.
+#
+# The STFT must also send the frames of the AudioSplitter, whose last frame
+# is the last one that ends before the end of the signal. This is checked
+# on the spectra for signals with a whole number of hops after the first
+# frame, with other lengths, and with a signal shorter than one frame,
+# transformed at once and block by block.
+
+from benchmark_utils import *
+from graph_runner import *
+from wavreader import *
+from wavwriter import *
+from audio_splitter import *
+from audio_overlap_merger import *
+from fft import *
+from ifft import *
+from stft import *
+from vocoder_analyzer import *
+from vocoder_resynthesizer import *
+
+# A whole number of hops after the first frame, so the last frame ends at
+# the last sample and is dropped.
+NUM_SAMPLES = 16000 * 10
+FFT_LENGTH = 1024
+HOP = 256
+FRAMES_PER_CYCLE = 64
+
+def build_graph(input_filename, output_filename, use_stft, frames_per_cycle=None):
+    graph_runner = GraphRunner()
+
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    ifft = IFFT()
+    ifft.initialize({"IFFT_LENGTH": FFT_LENGTH, "FFT_BACKEND": "NUMPY", "HALF_SPECTRUM": True})
+    resynthesizer = VocoderResynthesizer()
+    resynthesizer.initialize({"FFT_LENGTH": FFT_LENGTH})
+    audio_merger = AudioOverlapMerger()
+    audio_merger.initialize({"OFFSET": HOP})
+    wavwriter = WavWriter()
+    wavwriter.initialize({"FILENAME": output_filename})
+
+    graph_runner.addRoot(wavreader)
+    wavreader.addChild(wavwriter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+    if use_stft:
+        stft = STFT()
+        stft.initialize({"FFT_LENGTH": FFT_LENGTH, "HOP": HOP, "HALF_SPECTRUM": True})
+        wavreader.addChild(stft, {"DATA": "SAMPLES"})
+        stft.addChild(ifft, {"FREQUENCIES": "FREQUENCIES"})
+        stft.addChild(audio_merger, {"FINISHED": "FINAL_INPUT"})
+    else:
+        audio_splitter = AudioSplitter()
+        audio_splitter.initialize({"SPLIT_LENGTH": FFT_LENGTH, "SPLIT_OFFSET": HOP,
+                                   "FRAMES_PER_CYCLE": frames_per_cycle})
+        analyzer = VocoderAnalyzer()
+        analyzer.initialize({"FFT_LENGTH": FFT_LENGTH})
+        fft = FFT()
+        fft.initialize({"FFT_LENGTH": FFT_LENGTH, "FFT_BACKEND": "NUMPY", "HALF_SPECTRUM": True})
+        wavreader.addChild(audio_splitter, {"DATA": "INPUT_DATA"})
+        audio_splitter.addChild(analyzer, {"OUTPUT_DATA": "INPUT_SAMPLES"})
+        analyzer.addChild(fft, {"OUTPUT_SAMPLES": "SAMPLES"})
+        fft.addChild(ifft, {"FREQUENCIES": "FREQUENCIES"})
+        audio_splitter.addChild(audio_merger, {"FINISHED": "FINAL_INPUT"})
+        audio_merger.addChild(audio_splitter, {"INPUT_CONSUMED": "READY"})
+    ifft.addChild(resynthesizer, {"SAMPLES": "INPUT_SAMPLES"})
+    resynthesizer.addChild(audio_merger, {"OUTPUT_SAMPLES": "INPUT_DATA"})
+    audio_merger.addChild(wavwriter, {"OUTPUT_DATA": "DATA"})
+    return graph_runner
+
+# Returns the spectra of the frames of an AudioSplitter, an analyzer and an
+# FFT, computed without a graph.
+def splitter_spectra(samples):
+    audio_splitter = AudioSplitter()
+    audio_splitter.initialize({"SPLIT_LENGTH": FFT_LENGTH, "SPLIT_OFFSET": HOP,
+                               "FRAMES_PER_CYCLE": FRAMES_PER_CYCLE})
+    analyzer = VocoderAnalyzer()
+    analyzer.initialize({"FFT_LENGTH": FFT_LENGTH})
+    fft = FFT()
+    fft.initialize({"FFT_LENGTH": FFT_LENGTH, "HALF_SPECTRUM": True})
+
+    spectra = []
+    audio_splitter.inputs["INPUT_DATA"] = samples
+    while audio_splitter.outputs.get("FINISHED") != True:
+        audio_splitter.compute()
+        analyzer.inputs["INPUT_SAMPLES"] = audio_splitter.outputs["OUTPUT_DATA"]
+        analyzer.compute()
+        fft.inputs["SAMPLES"] = analyzer.outputs["OUTPUT_SAMPLES"]
+        fft.compute()
+        spectra.append(fft.outputs["FREQUENCIES"])
+    return np.concatenate(spectra)
+
+# Returns the spectra of the STFT, fed with blocks of block_length samples.
+def stft_spectra(samples, block_length):
+    stft = STFT()
+    stft.initialize({"FFT_LENGTH": FFT_LENGTH, "HOP": HOP, "HALF_SPECTRUM": True})
+    stft.wireInput("FINAL_INPUT", None)
+    spectra = []
+    for start in range(0, samples.shape[0], block_length):
+        stft.inputs["SAMPLES"] = samples[start:start + block_length]
+        stft.inputs["FINAL_INPUT"] = start + block_length >= samples.shape[0]
+        stft.compute()
+        spectra.append(stft.outputs["FREQUENCIES"])
+    return np.concatenate(spectra)
+
+def check_frames(num_samples):
+    samples = (np.random.RandomState(0).randn(num_samples) * 3000).astype(np.int16)
+    reference = splitter_spectra(samples)
+    for block_length in [num_samples, 1000, HOP]:
+        spectra = stft_spectra(samples, block_length)
+        assert spectra.shape == reference.shape
+        assert np.allclose(spectra, reference)
+
+def main():
+    for num_samples in [FFT_LENGTH + 10 * HOP, FFT_LENGTH + 10 * HOP + 1,
+                        FFT_LENGTH + 10 * HOP - 1, FFT_LENGTH + 1, FFT_LENGTH, FFT_LENGTH / 2]:
+        check_frames(num_samples)
+
+    input_filename = write_test_wav(NUM_SAMPLES)
+    output_filename = temp_wav_filename()
+
+    def run(use_stft, frames_per_cycle=None):
+        graph_runner = build_graph(input_filename, output_filename, use_stft, frames_per_cycle)
+        with Quiet():
+            graph_runner.run()
+        return wavfile.read(output_filename)[1].astype(np.int32)
+
+    reference = run(True)
+    print "seconds for %d frames of %d samples" % (-(-(NUM_SAMPLES - FFT_LENGTH) // HOP), FFT_LENGTH)
+    for label, use_stft, frames_per_cycle in [("chain, 1 frame", False, None),
+                                              ("chain, %d frames" % FRAMES_PER_CYCLE, False,
+                                               FRAMES_PER_CYCLE),
+                                              ("stft", True, None)]:
+        assert np.abs(run(use_stft, frames_per_cycle) - reference).max() <= 1
+        print "%-20s %10.3f" % (label, best_time(lambda: run(use_stft, frames_per_cycle)))
+
+    for filename in [input_filename, output_filename]:
+        os.remove(filename)
+
+if __name__ == '__main__':
+    main()
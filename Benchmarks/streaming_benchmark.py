@@ -0,0 +1,103 @@
+# Compares the peak memory of processing a long file with accumulating
+# mergers against streaming execution:
+#
+#   WavReader -> AudioSplitter -> FrequencyAbsoluter -> AudioMerger -> WavWriter
+#
+# In streaming mode the WavReader memory-maps the input, the AudioMerger
+# sends every block on and the WavWriter appends it to the output file, so
+# the memory does not grow with the length of the input. Each mode runs
+# in a forked process. After every cycle the anonymous resident memory of
+# the process is sampled from /proc (Linux only); pages of the memory-mapped
+# input are file-backed page cache and not counted. The forked process
+# exits without flushing open files, so reading the output back checks that
+# the GraphRunner closed the WavWriter and its header sizes were written.
+
+from multiprocessing import Process, Queue
+from benchmark_utils import *
+from graph_runner import *
+from graph_observer import *
+from wavreader import *
+from wavwriter import *
+from audio_splitter import *
+from audio_merger import *
+from frequency_absoluter import *
+
+NUM_SAMPLES = 16000 * 60 * 10
+SPLIT_LENGTH = 1024
+FRAMES_PER_CYCLE = 16
+
+def build_graph(input_filename, output_filename, streaming):
+    graph_runner = GraphRunner()
+
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename, "MMAP": streaming})
+    audio_splitter = AudioSplitter()
+    audio_splitter.initialize({"SPLIT_LENGTH": SPLIT_LENGTH, "SPLIT_OFFSET": None,
+                               "FRAMES_PER_CYCLE": FRAMES_PER_CYCLE})
+    frequency_absoluter = FrequencyAbsoluter()
+    frequency_absoluter.initialize({})
+    audio_merger = AudioMerger()
+    audio_merger.initialize({"STREAMING": streaming})
+    wavwriter = WavWriter()
+    wavwriter.initialize({"FILENAME": output_filename, "STREAMING": streaming})
+
+    graph_runner.addRoot(wavreader)
+    wavreader.addChild(audio_splitter, {"DATA": "INPUT_DATA"})
+    wavreader.addChild(wavwriter, {"SAMPLING_RATE": "SAMPLING_RATE"})
+    audio_splitter.addChild(frequency_absoluter, {"OUTPUT_DATA": "FREQUENCIES"})
+    frequency_absoluter.addChild(audio_merger, {"ABSOLUTE_FREQUENCIES": "INPUT_DATA"})
+    audio_splitter.addChild(audio_merger, {"FINISHED": "FINAL_INPUT"})
+    audio_merger.addChild(audio_splitter, {"INPUT_CONSUMED": "READY"})
+    audio_merger.addChild(wavwriter, {"OUTPUT_DATA": "DATA"})
+    return graph_runner
+
+def anonymous_rss_kb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1])
+    return 0
+
+class MemoryObserver(GraphObserver):
+
+    def __init__(self):
+        self.peak_kb = anonymous_rss_kb()
+
+    def cycleFinished(self, cycle):
+        self.peak_kb = max(self.peak_kb, anonymous_rss_kb())
+
+def run_graph(input_filename, output_filename, streaming, results):
+    baseline = anonymous_rss_kb()
+    memory_observer = MemoryObserver()
+    start = time.time()
+    graph_runner = build_graph(input_filename, output_filename, streaming)
+    graph_runner.observers = [memory_observer]
+    with Quiet():
+        graph_runner.run()
+    results.put((time.time() - start, memory_observer.peak_kb - baseline))
+
+def main():
+    input_filename = write_test_wav(NUM_SAMPLES)
+    output_filenames = {False: temp_wav_filename(), True: temp_wav_filename()}
+
+    print "Input: %d samples (%.1f MB)" % (NUM_SAMPLES, 2.0 * NUM_SAMPLES / 2**20)
+    print "%-12s %10s %16s" % ("mode", "time s", "peak anon +MB")
+    for streaming in [False, True]:
+        results = Queue()
+        process = Process(target=run_graph, args=(input_filename, output_filenames[streaming], streaming, results))
+        process.start()
+        elapsed, rss_kb = results.get()
+        process.join()
+        print "%-12s %10.3f %16.1f" % ("streaming" if streaming else "accumulate", elapsed, rss_kb / 1024.0)
+
+    reference = np.abs(wavfile.read(input_filename)[1])
+    num_samples = (NUM_SAMPLES - SPLIT_LENGTH) / SPLIT_LENGTH * SPLIT_LENGTH
+    for streaming in [False, True]:
+        output = wavfile.read(output_filenames[streaming])[1]
+        assert np.array_equal(output, reference[:num_samples])
+
+    for filename in [input_filename] + output_filenames.values():
+        os.remove(filename)
+
+if __name__ == '__main__':
+    main()
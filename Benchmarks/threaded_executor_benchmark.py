@@ -0,0 +1,106 @@
+# Runs a multi-band graph, in which one WavReader feeds several FIRFilter
+# bands that all become ready in the same cycle,
+#
+#   WavReader -> FIRFilter (band 1)
+#             -> FIRFilter (band 2)
+#             ...
+#
+# sequentially and with a ThreadedExecutor of 1 to 8 threads, and checks
+# that every executor produces the same filtered samples.
+#
+# The bands use DIRECT convolution, i.e. np.convolve, which releases the
+# GIL while it runs. The benchmark checks this by counting how far a pure
+# python thread gets during one long np.convolve call: with the GIL held,
+# the counter cannot advance. The threads can only run the bands in
+# parallel if there are several cores; the number of cores is printed with
+# the results. The speedup is bounded by the number of bands and cores,
+# and the part of compute() that holds the GIL (the history concatenation
+# and the int16 conversion) runs one thread at a time.
+
+import threading
+from multiprocessing import cpu_count
+from benchmark_utils import *
+from graph_runner import *
+from threaded_executor import *
+from wavreader import *
+from fir_filter import *
+
+NUM_SAMPLES = 16000 * 10
+FILTER_LENGTH = 511
+NUM_BANDS = 8
+BAND_WIDTH = 900
+THREAD_COUNTS = [1, 2, 4, 8]
+
+def build_graph(input_filename):
+    graph_runner = GraphRunner()
+
+    wavreader = WavReader()
+    wavreader.initialize({"FILENAME": input_filename})
+    graph_runner.addRoot(wavreader)
+    bands = []
+    for band in range(NUM_BANDS):
+        fir_filter = FIRFilter()
+        fir_filter.initialize({"FILTER_TYPE": "BANDPASS", "FILTER_LENGTH": FILTER_LENGTH,
+                               "LOW_CUTOFF": 100 + band * BAND_WIDTH,
+                               "HIGH_CUTOFF": 100 + (band + 1) * BAND_WIDTH,
+                               "CONVOLUTION": "DIRECT"})
+        wavreader.addChild(fir_filter, {"DATA": "SAMPLES", "SAMPLING_RATE": "SAMPLING_RATE"})
+        bands.append(fir_filter)
+    return graph_runner, bands
+
+# Returns how often a pure python thread incremented a counter during a
+# single np.convolve call of the size of one band.
+def count_during_convolve():
+    samples = np.random.RandomState(1).randn(NUM_SAMPLES)
+    coefficients = np.ones(FILTER_LENGTH * 4)
+    counter = [0]
+    stop = [False]
+    def count():
+        while not stop[0]:
+            counter[0] += 1
+    thread = threading.Thread(target=count)
+    thread.start()
+    time.sleep(0.05)
+    before = counter[0]
+    np.convolve(samples, coefficients, mode='valid')
+    during = counter[0] - before
+    stop[0] = True
+    thread.join()
+    return during
+
+def main():
+    input_filename = write_test_wav(NUM_SAMPLES)
+
+    # The executor is created by the caller, so that starting the threads
+    # is not timed.
+    def run(executor):
+        graph_runner, bands = build_graph(input_filename)
+        if executor is not None:
+            graph_runner.setExecutor(executor)
+        with Quiet():
+            graph_runner.run()
+        return [band.outputs["FILTERED_SAMPLES"] for band in bands]
+
+    reference = run(None)
+    sequential_time = best_time(lambda: run(None))
+
+    print "Cores: %d, bands: %d of %d taps over %d samples" % (cpu_count(), NUM_BANDS,
+                                                               FILTER_LENGTH, NUM_SAMPLES)
+    print "Counter increments by a python thread during np.convolve: %d" % count_during_convolve()
+    print "%-12s %10s %10s" % ("threads", "time s", "speedup")
+    print "%-12s %10.3f %10.2fx" % ("sequential", sequential_time, 1.0)
+    for num_workers in THREAD_COUNTS:
+        executor = ThreadedExecutor(num_workers)
+        outputs = []
+        def timed_run():
+            outputs[:] = run(executor)
+        threaded_time = best_time(timed_run)
+        executor.close()
+        for output, expected in zip(outputs, reference):
+            assert np.array_equal(output, expected)
+        print "%-12d %10.3f %10.2fx" % (num_workers, threaded_time, sequential_time / threaded_time)
+
+    os.remove(input_filename)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Times the Vibrato effect on 10 s of 16 kHz audio, processed at once and in
+# blocks of 256 samples, with LINEAR and CUBIC interpolation, and checks that
+# block-wise processing matches whole-signal processing. The original
+# per-sample python loop, which rebuilds the delay line for every sample, is
+# timed on 4000 samples and extrapolated to the full length.
+
+from benchmark_utils import *
+from vibrato import *
+
+NUM_SAMPLES = 16000 * 10
+LEGACY_SAMPLES = 4000
+BLOCK_LENGTH = 256
+SAMPLING_RATE = 16000
+DELAY = 0.010
+MOD_FREQ = 15
+
+def create_vibrato(interpolation):
+    vibrato = Vibrato()
+    vibrato.initialize({"DELAY": DELAY, "MOD_FREQ": MOD_FREQ, "INTERPOLATION": interpolation})
+    vibrato.inputs["SAMPLING_RATE"] = SAMPLING_RATE
+    return vibrato
+
+def vibrato_blocks(vibrato, samples, block_length):
+    output = []
+    for start in range(0, samples.shape[0], block_length):
+        vibrato.inputs["SAMPLES"] = samples[start:start + block_length]
+        vibrato.compute()
+        output.append(vibrato.outputs["VIBRATO_SAMPLES"])
+    return np.concatenate(output)
+
+# The original Vibrato.compute() with linear interpolation.
+def legacy_vibrato(samples):
+    delay_in_samples = DELAY * SAMPLING_RATE
+    mod_freq_in_samples = float(MOD_FREQ) / SAMPLING_RATE
+    L = int(2 + delay_in_samples + delay_in_samples*2)
+    delay_line = np.zeros((L,), dtype=np.int16)
+    vibrato_samples = np.zeros_like(samples)
+    for n in range(0, samples.shape[0] - 1):
+        mod = np.sin(2 * np.pi * n * mod_freq_in_samples)
+        alpha = 1 + delay_in_samples + delay_in_samples * mod
+        i = int(np.floor(alpha))
+        factor = alpha - i
+        delay_line = np.concatenate([np.array([samples[n]]), delay_line[0:L-1]])
+        vibrato_samples[n] = delay_line[i+1] * factor + delay_line[i] * (1 - factor)
+    return vibrato_samples
+
+def main():
+    samples = (np.random.RandomState(0).randn(NUM_SAMPLES) * 3000).astype(np.int16)
+
+    legacy_input = samples[:LEGACY_SAMPLES]
+    legacy_output = legacy_vibrato(legacy_input)
+    legacy_time = best_time(lambda: legacy_vibrato(legacy_input), repeat=1)
+    # The original loop skips the last sample.
+    linear = vibrato_blocks(create_vibrato("LINEAR"), legacy_input, LEGACY_SAMPLES)
+    assert np.abs(linear[:-1].astype(np.int32) - legacy_output[:-1]).max() <= 1
+
+    print "seconds to apply vibrato to %d samples" % NUM_SAMPLES
+    print "%-8s %12.2f" % ("legacy", legacy_time * NUM_SAMPLES / LEGACY_SAMPLES)
+    print "%-8s %12s %12s" % ("", "all", "blocks")
+    for interpolation in INTERPOLATION_TYPES:
+        whole = vibrato_blocks(create_vibrato(interpolation), samples, NUM_SAMPLES)
+        blocks = vibrato_blocks(create_vibrato(interpolation), samples, BLOCK_LENGTH)
+        assert np.abs(whole.astype(np.int32) - blocks).max() <= 1
+        whole_time = best_time(lambda: vibrato_blocks(create_vibrato(interpolation),
+                                                      samples, NUM_SAMPLES))
+        blocks_time = best_time(lambda: vibrato_blocks(create_vibrato(interpolation),
+                                                       samples, BLOCK_LENGTH))
+        print "%-8s %12.4f %12.4f" % (interpolation, whole_time, blocks_time)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# Times VocoderLinearInterpolator stretching frames of 2048 samples by
+# 500 / 512, one frame per call and in blocks of 64 frames, in LINEAR and
+# SINC mode, against the original per-sample python loop, and checks that
+# LINEAR mode matches the loop. The SINC mode is checked on a sine wave,
+# which it must reproduce more accurately than linear interpolation.
+
+from benchmark_utils import *
+from vocoder_linear_interpolator import *
+
+FFT_LENGTH = 2048
+ANALYSIS_HOPSIZE = 500
+SYNTHESIS_HOPSIZE = 512
+NUM_FRAMES = 1024
+LEGACY_FRAMES = 64
+FRAMES_PER_CYCLE = 64
+
+def create_interpolator(interpolation):
+    interpolator = VocoderLinearInterpolator()
+    interpolator.initialize({"FFT_LENGTH": FFT_LENGTH, "ANALYSIS_HOPSIZE": ANALYSIS_HOPSIZE,
+                             "SYNTHESIS_HOPSIZE": SYNTHESIS_HOPSIZE, "INTERPOLATION": interpolation})
+    return interpolator
+
+def interpolate_blocks(interpolator, frames, frames_per_cycle):
+    output = []
+    for start in range(0, frames.shape[0], frames_per_cycle):
+        if frames_per_cycle == 1:
+            interpolator.inputs["INPUT_SAMPLES"] = frames[start]
+        else:
+            interpolator.inputs["INPUT_SAMPLES"] = frames[start:start + frames_per_cycle]
+        interpolator.compute()
+        output.append(interpolator.outputs["OUTPUT_SAMPLES"].reshape(-1, interpolator.lx))
+    return np.concatenate(output)
+
+# The original VocoderLinearInterpolator.compute(), one frame per call.
+def legacy_interpolate(frames):
+    output = []
+    for samples in frames:
+        n = samples.shape[0]
+        lx = int(np.floor(n * ANALYSIS_HOPSIZE / SYNTHESIS_HOPSIZE))
+        x = np.arange(0,lx) * float(n) / float(lx)
+        ix = np.floor(x).astype(int)
+        ix1 = ix + 1
+        dx = x - ix
+        dx1 = 1 - dx
+        grain1 = np.append(samples, [0])
+        grain2 = np.zeros((lx,),dtype=np.float)
+        for i in range(0, lx):
+            grain2[i] = grain1[ix[i]] * dx1[i] + grain1[ix1[i]] * dx[i]
+        output.append(grain2)
+    return np.array(output)
+
+def main():
+    frames = np.random.RandomState(0).randn(NUM_FRAMES, FFT_LENGTH) * 3000
+
+    legacy_output = legacy_interpolate(frames[:LEGACY_FRAMES])
+    legacy_time = best_time(lambda: legacy_interpolate(frames[:LEGACY_FRAMES]), repeat=1)
+    assert np.allclose(interpolate_blocks(create_interpolator("LINEAR"), frames[:LEGACY_FRAMES], 1),
+                       legacy_output)
+
+    # A sine wave well below the Nyquist frequency, away from the frame ends.
+    sine = np.sin(0.7 * np.pi * np.arange(FFT_LENGTH))
+    lx = create_interpolator("LINEAR").lx
+    expected = np.sin(0.7 * np.pi * np.arange(lx) * float(FFT_LENGTH) / lx)
+    errors = {}
+    for interpolation in INTERPOLATION_TYPES:
+        output = interpolate_blocks(create_interpolator(interpolation), sine[np.newaxis, :], 1)[0]
+        errors[interpolation] = np.abs(output - expected)[64:-64].max()
+    assert errors["SINC"] < errors["LINEAR"] / 10
+
+    print "frames per second, %d samples stretched to %d" % (FFT_LENGTH, lx)
+    print "%-8s %12.0f" % ("legacy", LEGACY_FRAMES / legacy_time)
+    print "%-8s %12s %12s %12s" % ("", "1 frame", "%d frames" % FRAMES_PER_CYCLE, "sine error")
+    for interpolation in INTERPOLATION_TYPES:
+        single = interpolate_blocks(create_interpolator(interpolation), frames, 1)
+        block = interpolate_blocks(create_interpolator(interpolation), frames, FRAMES_PER_CYCLE)
+        assert np.allclose(single, block)
+        single_time = best_time(lambda: interpolate_blocks(create_interpolator(interpolation),
+                                                           frames, 1))
+        block_time = best_time(lambda: interpolate_blocks(create_interpolator(interpolation),
+                                                          frames, FRAMES_PER_CYCLE))
+        print "%-8s %12.0f %12.0f %12.2e" % (interpolation, NUM_FRAMES / single_time,
+                                             NUM_FRAMES / block_time, errors[interpolation])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# Times the window and FFT shift of VocoderAnalyzer and VocoderResynthesizer
+# on blocks of 64 frames of 1024 samples, with new output arrays and in
+# place, against the original per-sample window loop followed by an
+# np.concatenate shift, and checks that all give the same frames.
+#
+# Also checks that IN_PLACE leaves shared inputs alone: the overlapping
+# frames of an AudioSplitter, which are views into its input signal, and
+# an array that is sent to two transformers.
+
+from benchmark_utils import *
+from audio_splitter import *
+from vocoder_analyzer import *
+from vocoder_resynthesizer import *
+
+FFT_LENGTH = 1024
+FRAMES_PER_CYCLE = 64
+NUM_BLOCKS = 200
+
+def create(transformer_class, in_place):
+    transformer = transformer_class()
+    transformer.initialize({"FFT_LENGTH": FFT_LENGTH, "IN_PLACE": in_place})
+    return transformer
+
+def run(transformer, blocks):
+    output = []
+    for block in blocks:
+        transformer.inputs["INPUT_SAMPLES"] = block
+        transformer.compute()
+        output.append(transformer.outputs["OUTPUT_SAMPLES"])
+    return output
+
+# The original VocoderAnalyzer.compute() and VocoderResynthesizer.compute().
+def legacy_run(analysis, blocks):
+    output = []
+    n = FFT_LENGTH
+    for samples in blocks:
+        samples = samples.copy()
+        if analysis:
+            for i in range(0, n):
+                window_value = -0.5 * np.cos(2.0 * np.pi * float(i) / float(n)) + 0.5
+                samples[..., i] = samples[..., i] * window_value
+            output.append(np.concatenate([samples[..., n/2:], samples[..., 0:n/2]], axis=-1))
+        else:
+            shifted = np.concatenate([samples[..., n/2:], samples[..., 0:n/2]], axis=-1)
+            for i in range(0, n):
+                window_value = -0.5 * np.cos(2.0 * np.pi * float(i) / float(n)) + 0.5
+                shifted[..., i] = shifted[..., i] * window_value
+            output.append(shifted)
+    return output
+
+# Windows the overlapping frames of a floating point signal with an
+# IN_PLACE analyzer fed by an AudioSplitter.
+def check_splitter_frames():
+    signal = np.random.RandomState(1).randn(FFT_LENGTH * 8) * 3000
+    original = signal.copy()
+    audio_splitter = AudioSplitter()
+    audio_splitter.initialize({"SPLIT_LENGTH": FFT_LENGTH, "SPLIT_OFFSET": FFT_LENGTH / 2})
+    analyzer = create(VocoderAnalyzer, True)
+    audio_splitter.addChild(analyzer, {"OUTPUT_DATA": "INPUT_SAMPLES"})
+    reference = create(VocoderAnalyzer, False)
+
+    audio_splitter.inputs["INPUT_DATA"] = signal
+    while audio_splitter.outputs.get("FINISHED") != True:
+        audio_splitter.compute()
+        audio_splitter.notifyChildren()
+        analyzer.compute()
+        reference.inputs["INPUT_SAMPLES"] = analyzer.inputs["INPUT_SAMPLES"]
+        reference.compute()
+        assert np.array_equal(analyzer.outputs["OUTPUT_SAMPLES"], reference.outputs["OUTPUT_SAMPLES"])
+    assert np.array_equal(signal, original)
+
+# Sends one array to an IN_PLACE analyzer and a second transformer.
+def check_shared_output():
+    resynthesizer = create(VocoderResynthesizer, False)
+    analyzer = create(VocoderAnalyzer, True)
+    other = create(VocoderAnalyzer, False)
+    resynthesizer.addChild(analyzer, {"OUTPUT_SAMPLES": "INPUT_SAMPLES"})
+    resynthesizer.addChild(other, {"OUTPUT_SAMPLES": "INPUT_SAMPLES"})
+    resynthesizer.inputs["INPUT_SAMPLES"] = np.random.RandomState(2).randn(FFT_LENGTH)
+    resynthesizer.compute()
+    output = resynthesizer.outputs["OUTPUT_SAMPLES"]
+    original = output.copy()
+    resynthesizer.notifyChildren()
+    analyzer.compute()
+    assert analyzer.outputs["OUTPUT_SAMPLES"] is not output
+    assert np.array_equal(output, original)
+
+def main():
+    check_splitter_frames()
+    check_shared_output()
+
+    random_state = np.random.RandomState(0)
+    blocks = [random_state.randn(FRAMES_PER_CYCLE, FFT_LENGTH) * 3000 for i in range(NUM_BLOCKS)]
+
+    print "seconds for %d blocks of %d frames" % (NUM_BLOCKS, FRAMES_PER_CYCLE)
+    print "%-14s %10s %10s %10s" % ("", "legacy", "new array", "in place")
+    for name, transformer_class, analysis in [("analyzer", VocoderAnalyzer, True),
+                                              ("resynthesizer", VocoderResynthesizer, False)]:
+        legacy = legacy_run(analysis, blocks)
+        copies = [block.copy() for block in blocks]
+        assert all(np.allclose(a, b) for a, b in zip(legacy, run(create(transformer_class, False), copies)))
+        assert all(np.allclose(a, b) for a, b in zip(legacy, run(create(transformer_class, True), copies)))
+        legacy_time = best_time(lambda: legacy_run(analysis, blocks))
+        new_time = best_time(lambda: run(create(transformer_class, False), blocks))
+        # Repeatedly windowing the same arrays in place only changes their values.
+        in_place_time = best_time(lambda: run(create(transformer_class, True), copies))
+        print "%-14s %10.4f %10.4f %10.4f" % (name, legacy_time, new_time, in_place_time)
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,16 @@ from transformer import *
 # DELAY: Specifies the delay in seconds desired for the vibrato effect.
 # MOD_FREQ: Specifies the frequency of a modulation sine wave applied onto
 #           in the input samples.
+# INTERPOLATION: Optional. How the delay line is read between samples,
+#                LINEAR (default) or CUBIC (B-spline, smoother but slightly
+#                lowpass filtered).
+#
+# The delay of every output sample is computed for the whole input at once
+# and the delayed samples are gathered from the input with the last samples
+# of the previous call prepended. These samples and the phase of the
+# modulation sine wave are kept between calls to compute(), so applying the
+# vibrato block by block, e.g. after an AudioSplitter, gives the same result
+# as applying it at once.
 #
 # Example AGDL configuration:
 #
@@ -38,10 +48,16 @@ from transformer import *
 #   {
 #       <DELAY> 0.010
 #       <MOD_FREQ> 15
+#       <INTERPOLATION> LINEAR
 #   }
 # }
 
+INTERPOLATION_TYPES = ("LINEAR", "CUBIC")
+
 class Vibrato(Transformer):
+    # The sampling rate is delivered once by the wav reader.
+    sticky_inputs = ("SAMPLING_RATE",)
+
     def __init__(self):
         super(Vibrato, self).__init__()
 
@@ -56,12 +72,25 @@ class Vibrato(Transformer):
         # Option Keys.
         self.delay_key = "DELAY"
         self.mod_freq_key = "MOD_FREQ"
+        self.interpolation_key = "INTERPOLATION"
 
         # Local variables.
         assert configs[self.delay_key] != None
         assert configs[self.mod_freq_key] != None
         self.delay = configs[self.delay_key]
         self.mod_freq = configs[self.mod_freq_key]
+        self.interpolation = configs.get(self.interpolation_key, "LINEAR")
+        assert self.interpolation in INTERPOLATION_TYPES
+
+        # The phase of the modulation in cycles, kept between calls.
+        self.mod_phase = 0.0
+
+        # Set up on the first call, once the sampling rate is known, and
+        # reused by every call, see prepare().
+        self.sampling_rate = None
+        self.buffer = None
+        self.history_length = 0
+        self.length = 0
 
         # Prepare ready inputs for graph 
         self.ready_inputs[self.samples_key] = False;
@@ -70,32 +99,93 @@ class Vibrato(Transformer):
     def compute(self):
         samples = self.inputs[self.samples_key]
         sampling_rate = self.inputs[self.sampling_rate_key]
-        
-        delay_in_samples = self.delay * sampling_rate
-        mod_freq_in_samples = float(self.mod_freq) / sampling_rate
-
-        L = int(2 + delay_in_samples + delay_in_samples*2);
-        delay_line = np.zeros((L,), dtype=np.int16)
-        vibrato_samples = np.zeros_like(samples)
-
-        for n in range(0, samples.shape[0] - 1):
-            mod = np.sin(2 * np.pi * n * mod_freq_in_samples)
-            alpha = 1 + delay_in_samples + delay_in_samples * mod;
-            i = int(np.floor(alpha))
-            factor = alpha - i;
-            delay_line = np.concatenate([np.array([samples[n]]), delay_line[0:L-1]])
-
-            # Linear interpolation.
-            vibrato_samples[n] = delay_line[i+1] * factor + delay_line[i] * (1 - factor)
-
-            # Spline interpolation.
-            # vibrato_samples[n] = delay_line[i+1] * (factor**3) / 6
-            # + delay_line[i] * ((1+factor)**3 - 4*(factor**3)) / 6
-            # + delay_line[i-1] * ((2-factor)**3 - 4*(1-factor)**3) / 6
-            # + delay_line[i-2] * ((1-factor)**3) / 6 
-
-        self.outputs[self.vibrato_samples_key] = vibrato_samples
-
-    # Override reset ready inputs.
-    def resetReadyInputs(self):
-        self.ready_inputs[self.samples_key] = False;
+
+        num_samples = samples.shape[0]
+        if sampling_rate != self.sampling_rate or num_samples > self.buffer.shape[0] - self.history_length:
+            self.prepare(sampling_rate, num_samples)
+        history_length = self.history_length
+
+        # The last samples of the previous call are moved to the front of
+        # the buffer and followed by the new samples.
+        buffer = self.buffer
+        buffer[:history_length] = buffer[self.length:self.length + history_length]
+        buffer[history_length:history_length + num_samples] = samples
+        self.length = num_samples
+
+        # The delay of every output sample, between 1 and 1 + 2 * delay.
+        mod = np.sin(self.phase_ramp[:num_samples] + 2 * np.pi * self.mod_phase)
+        self.mod_phase = (self.mod_phase + num_samples * self.mod_freq_in_samples) % 1.0
+        alpha = mod * self.delay_in_samples
+        alpha += 1 + self.delay_in_samples
+        # The delay is positive, so truncation rounds down.
+        i = alpha.astype(np.int64)
+        factor = alpha - i
+
+        # The input sample delayed by i samples, i.e. the delay line tap i.
+        position = self.positions[:num_samples] - i
+
+        if self.interpolation == "LINEAR":
+            current = buffer.take(position)
+            vibrato_samples = buffer.take(position - 1)
+            vibrato_samples -= current
+            vibrato_samples *= factor
+            vibrato_samples += current
+        else:
+            # Cubic B-spline through the taps i - 1 to i + 2. The weights add
+            # up to 1, so the weight of tap i + 1 is not computed; the others
+            # weight the differences to that tap.
+            factor2 = factor * factor
+            factor3 = factor2 * factor
+            weight = 1 - factor
+            weight *= weight * weight
+            center = buffer.take(position - 1)
+            vibrato_samples = buffer.take(position + 1)
+            vibrato_samples -= center
+            vibrato_samples *= weight
+            difference = buffer.take(position - 2)
+            difference -= center
+            difference *= factor3
+            vibrato_samples += difference
+            # 6 times the weight of tap i: 4 - 6 * factor^2 + 3 * factor^3.
+            factor3 *= 3
+            factor3 += 4
+            factor2 *= 6
+            factor3 -= factor2
+            difference = buffer.take(position)
+            difference -= center
+            difference *= factor3
+            vibrato_samples += difference
+            vibrato_samples /= 6
+            vibrato_samples += center
+
+        self.outputs[self.vibrato_samples_key] = vibrato_samples.astype(samples.dtype)
+
+    # Computes the delay and modulation parameters of the sampling rate and
+    # the tables shared by all calls of up to num_samples samples: the phase
+    # of the modulation and the position of every output sample relative to
+    # the start of the current call, and the buffer holding the samples of a
+    # call after the history of the previous one.
+    def prepare(self, sampling_rate, num_samples):
+        if sampling_rate != self.sampling_rate:
+            self.sampling_rate = sampling_rate
+            self.delay_in_samples = self.delay * sampling_rate
+            self.mod_freq_in_samples = float(self.mod_freq) / sampling_rate
+
+        # The delay varies between 1 and 1 + 2 * delay_in_samples. Cubic
+        # interpolation reads one more sample on either side.
+        history_length = int(np.floor(1 + 2 * self.delay_in_samples)) + 2
+        history = np.zeros((history_length,), dtype=np.float64)
+        if self.buffer is not None:
+            kept = min(history_length, self.history_length)
+            history[history_length - kept:] = \
+                self.buffer[self.length + self.history_length - kept:self.length + self.history_length]
+        capacity = max(num_samples, 2 * (self.buffer.shape[0] - self.history_length)
+                       if self.buffer is not None else num_samples)
+
+        self.buffer = np.zeros((history_length + capacity,), dtype=np.float64)
+        self.buffer[:history_length] = history
+        self.history_length = history_length
+        self.length = 0
+        ramp = np.arange(capacity)
+        self.phase_ramp = 2 * np.pi * self.mod_freq_in_samples * ramp
+        self.positions = history_length + ramp
@@ -2,19 +2,31 @@ import numpy as np
 from transformer import *
 
 # Applies a pseudo whisper effect by taking the magnitude
-# of the input frequency and spectrum and applying a phase
-# shift from a uniformly distrubtion random variable between
-# 0 and 1. 
+# of the input frequency and spectrum and applying a random
+# phase, uniformly distributed between 0 and 2 * pi.
+#
+# The phases of all bins of a frame, or of a block of frames, are drawn with
+# a single call from a random generator owned by the transformer, so a
+# given SEED reproduces the same output.
 #
 ##########
 # Inputs #
 ##########
-# INPUT_FREQUENCIES: Input frequency spectrum of samples.
+# INPUT_FREQUENCIES: Input frequency spectrum of samples, or a 2-D array
+#                    with one spectrum per frame. Full and half spectra (from
+#                    an FFT in half spectrum mode) are both supported.
 #
 ###########
 # Outputs #
 ###########
-# OUTPUT_FREQUENCIES: Output frequency spectrum of samples after whisperization.
+# OUTPUT_FREQUENCIES: Output frequency spectrum of samples after whisperization,
+#                     a complex array of the same shape as the input.
+#
+###########
+# Configs #
+###########
+# SEED: Optional. The seed of the random phases. Without a seed every run
+#       gives a different output.
 #
 # Example AGDL configuration:
 #
@@ -28,9 +40,18 @@ from transformer import *
 #   {
 #       <OUTPUT_FREQUENCIES> output_frequencies
 #   }
+#
+#   configs
+#   {
+#       <SEED> 1234
+#   }
 # }
 
 class Whisperizer(Transformer):
+    # Draws one random phase per bin of every row of a block.
+    block_inputs = ("INPUT_FREQUENCIES",)
+    block_outputs = ("OUTPUT_FREQUENCIES",)
+
     def __init__(self):
         super(Whisperizer, self).__init__()
 
@@ -40,6 +61,12 @@ class Whisperizer(Transformer):
 
         # Output Keys.
         self.output_frequencies_key = "OUTPUT_FREQUENCIES";
+
+        # Option Keys.
+        self.seed_key = "SEED";
+
+        # Local variables.
+        self.random_state = np.random.RandomState(configs.get(self.seed_key));
                     
         # Prepare ready inputs for graph execution.
         self.ready_inputs[self.input_frequencies_key] = False;
@@ -48,8 +75,10 @@ class Whisperizer(Transformer):
         # Retrieve inputs.
         freq = self.inputs[self.input_frequencies_key]
         
-        # Take magnitude and add random phase.
-        output_freq = [np.abs(f) * np.complex(0, np.random.uniform()) for f in freq]
+        # Take magnitude and add random phase, drawing all phases at once.
+        phase = self.random_state.uniform(0.0, 2.0 * np.pi, size=np.shape(freq))
+        output_freq = np.empty(np.shape(freq), dtype=np.complex128)
+        np.multiply(np.abs(freq), np.exp(1j * phase), out=output_freq)
         
         # Apply to output.
-        self.outputs[self.output_frequencies_key] = output_freq
\ No newline at end of file
+        self.outputs[self.output_frequencies_key] = output_freq
@@ -0,0 +1,165 @@
+# Executes one AGDL graph over many wav files.
+#
+# The AGDL file is parsed once. Every job builds a fresh set of
+# transformers from the parsed graph, with the FILENAME of the WavReader
+# replaced by the input file and the FILENAME of the WavWriter replaced by
+# an output filename derived from the input. Jobs run on a pool of worker
+# processes that each import python, SciPy and the transformer modules
+# once, instead of once per file.
+#
+# The output pattern is a python format string with the fields:
+#   {name}: the input filename without directory and extension.
+#   {basename}: the input filename without directory.
+#   {dir}: the directory of the input file.
+#   {index}: the position of the input file in the batch.
+#   {writer}: the unique name of the WavWriter, needed if the graph has several.
+#
+# Example:
+#
+#   python batch_runner.py vibrato.agdl "corpus/*.wav" "out/{name}_vibrato.wav" --workers 8
+
+import os
+import sys
+import glob
+import time
+import argparse
+import traceback
+from multiprocessing import Pool, cpu_count
+from graph_builder import *
+
+# The builder of the batch being executed. Set before the worker pool is
+# created, so that forked workers inherit the parsed graph.
+batch_builder = None
+
+def run_job(job):
+    index, config_overrides, compile_graph = job
+    start = time.time()
+    try:
+        graph_runner, transformers = batch_builder.build(config_overrides)
+        graph_runner.verbose = False
+        if compile_graph:
+            graph_runner.compile()
+        graph_runner.run()
+        return index, time.time() - start, None
+    except Exception:
+        return index, time.time() - start, traceback.format_exc()
+
+class BatchRunner(object):
+
+    def __init__(self, agdl_filename, input_files, output_pattern, num_workers=None, compile_graph=False):
+        # Input files can be given as a list of filenames and glob patterns.
+        if isinstance(input_files, basestring):
+            input_files = [input_files]
+        self.input_files = []
+        for pattern in input_files:
+            matches = sorted(glob.glob(pattern))
+            self.input_files.extend(matches if matches else [pattern])
+
+        if num_workers is None:
+            num_workers = cpu_count()
+        assert num_workers > 0
+        self.num_workers = num_workers
+        self.output_pattern = output_pattern
+        self.compile_graph = compile_graph
+        self.builder = GraphBuilder(agdl_filename)
+
+        self.reader_names = self.builder.get_transformer_names('WavReader')
+        self.writer_names = self.builder.get_transformer_names('WavWriter')
+        if len(self.reader_names) != 1:
+            raise ValueError('A batch graph must contain exactly one WavReader, found ' + str(len(self.reader_names)))
+        if len(self.writer_names) > 1 and '{writer}' not in output_pattern:
+            raise ValueError('The output pattern must contain {writer} for graphs with several WavWriters')
+
+        # Results: (input file, output files, seconds, error) per job.
+        self.results = []
+        self.elapsed = 0.0
+
+    def get_output_files(self, index, input_file):
+        basename = os.path.basename(input_file)
+        fields = {'name': os.path.splitext(basename)[0], 'basename': basename,
+                  'dir': os.path.dirname(input_file), 'index': index}
+        output_files = {}
+        for writer_name in self.writer_names:
+            fields['writer'] = writer_name
+            output_files[writer_name] = self.output_pattern.format(**fields)
+        return output_files
+
+    def run(self):
+        global batch_builder
+        batch_builder = self.builder
+
+        jobs = []
+        output_files = []
+        for index, input_file in enumerate(self.input_files):
+            outputs = self.get_output_files(index, input_file)
+            config_overrides = {self.reader_names[0]: {'FILENAME': input_file}}
+            for writer_name, output_file in outputs.iteritems():
+                config_overrides[writer_name] = {'FILENAME': output_file}
+                output_dir = os.path.dirname(output_file)
+                if output_dir and not os.path.isdir(output_dir):
+                    os.makedirs(output_dir)
+            jobs.append((index, config_overrides, self.compile_graph))
+            output_files.append(outputs)
+
+        self.results = [None] * len(jobs)
+        start = time.time()
+        if self.num_workers == 1:
+            self.collect(map(run_job, jobs), output_files, start)
+        else:
+            pool = Pool(self.num_workers)
+            try:
+                self.collect(pool.imap_unordered(run_job, jobs), output_files, start)
+            finally:
+                pool.close()
+                pool.join()
+        self.elapsed = time.time() - start
+        return self.results
+
+    def collect(self, job_results, output_files, start):
+        for completed, (index, seconds, error) in enumerate(job_results):
+            input_file = self.input_files[index]
+            self.results[index] = (input_file, output_files[index], seconds, error)
+            status = 'FAILED' if error is not None else '%.3f s' % seconds
+            print '[%*d/%d] %s %s' % (len(str(len(self.input_files))), completed + 1,
+                                      len(self.input_files), input_file, status)
+            if error is not None:
+                print error
+
+    def failures(self):
+        return [result for result in self.results if result is not None and result[3] is not None]
+
+    def throughput(self):
+        if self.elapsed == 0.0:
+            return 0.0
+        return (len(self.results) - len(self.failures())) / self.elapsed
+
+    def summary(self):
+        seconds = [result[2] for result in self.results if result[3] is None]
+        lines = []
+        lines.append('Processed %d files (%d failed) in %.3f s with %d workers' % (
+            len(seconds), len(self.failures()), self.elapsed, self.num_workers))
+        lines.append('Throughput: %.2f files/s' % self.throughput())
+        if seconds:
+            seconds.sort()
+            lines.append('Per file: mean %.3f s, median %.3f s, max %.3f s' % (
+                sum(seconds) / len(seconds), seconds[len(seconds) / 2], seconds[-1]))
+        return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Execute an AGDL graph over many wav files.')
+    parser.add_argument('agdl_filename')
+    parser.add_argument('input_files', nargs='+', help='Input wav files or glob patterns.')
+    parser.add_argument('output_pattern', help='Output filename pattern, e.g. "out/{name}.wav".')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes.')
+    parser.add_argument('--compile', action='store_true', help='Replay a compiled schedule for each job.')
+    args = parser.parse_args()
+
+    batch_runner = BatchRunner(args.agdl_filename, args.input_files, args.output_pattern,
+                               args.workers, args.compile)
+    batch_runner.run()
+    print batch_runner.summary()
+    if batch_runner.failures():
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
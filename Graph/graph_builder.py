@@ -0,0 +1,91 @@
+# Parse an input AGDL file once and build executable graphs from it in
+# the current process, without writing and running a python script.
+# Every call to build() instantiates and links a fresh set of transformers,
+# so a graph can be executed many times, e.g. once per input file.
+
+import os
+import sys
+from graph_generator import *
+from graph_runner import *
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TRANSFORMER_DIRS = ['Standard', 'Effects', 'Vocoder', os.path.join('Vocoder', 'Operations')]
+
+# The AGDL parser and the transformer modules both import a module named
+# 'transformer' (Graph/AST/transformer.py and Standard/transformer.py).
+# By the time transformer modules are imported the AST has been parsed, so
+# the AST module is dropped from the module cache and the transformer
+# directories are put first on the python path.
+def import_transformer_module(module_name):
+    if module_name not in sys.modules:
+        ast_module = sys.modules.get('transformer')
+        if ast_module is not None and hasattr(getattr(ast_module, 'Transformer', None), 'set_tfm_content'):
+            del sys.modules['transformer']
+        for transformer_dir in reversed(TRANSFORMER_DIRS):
+            path = os.path.join(REPO_ROOT, transformer_dir)
+            if path in sys.path:
+                sys.path.remove(path)
+            sys.path.insert(0, path)
+    return __import__(module_name)
+
+class GraphBuilder(GraphGenerator):
+
+    def __init__(self, agdl_filename):
+        super(GraphBuilder, self).__init__(agdl_filename, None)
+        self.audio_graph_ast = self.parser.parse()
+        self.initialize_transformer_names()
+        self.compute_graph_links()
+
+    # Returns the unique names of all transformers of the given class name,
+    # e.g. get_transformer_names('WavReader') -> ['wavreader'].
+    def get_transformer_names(self, tfm_name):
+        return [self.transformer_names[idx]
+                for idx, tfm in enumerate(self.audio_graph_ast.get_transformers())
+                if tfm.get_name() == tfm_name]
+
+    # Builds a GraphRunner with fresh transformers. config_overrides maps a
+    # unique transformer name to configs that replace those of the AGDL file,
+    # e.g. {'wavreader': {'FILENAME': 'input.wav'}}. Returns the graph runner
+    # and a dictionary from unique name to transformer.
+    def build(self, config_overrides=None):
+        if config_overrides is None:
+            config_overrides = {}
+
+        graph_runner = GraphRunner()
+        transformers = {}
+        for idx, tfm in enumerate(self.audio_graph_ast.get_transformers()):
+            tfm_unique_name = self.transformer_names[idx]
+            tfm_content = tfm.get_tfm_content()
+            if tfm_content is None:
+                raise ValueError('Failed to load the contents of the transformer description')
+
+            configs = {}
+            if tfm_content.get_configs() is not None:
+                for link in tfm_content.get_configs().get_links():
+                    configs[link.get_tag()] = parse_config_value(link.get_value())
+            configs.update(config_overrides.get(tfm_unique_name, {}))
+
+            module = import_transformer_module(TRANSFORMERS[tfm.get_name()])
+            transformer = getattr(module, tfm.get_name())()
+            transformer.initialize(configs)
+            transformer.setName(tfm_unique_name)
+            if configs.get(FIFO_CAPACITY_TAG) is not None:
+                transformer.setFifoCapacity(configs[FIFO_CAPACITY_TAG])
+            transformers[tfm_unique_name] = transformer
+
+            # If there are no inputs, it must be a graph root.
+            if tfm_content.get_inputs() is None:
+                graph_runner.addRoot(transformer)
+
+        # Link transformers in the same order as print_graph_links.
+        for idx, src_tfm in enumerate(self.audio_graph_ast.get_transformers()):
+            src_outputs = src_tfm.get_tfm_content().get_outputs()
+            if src_outputs is None:
+                continue
+            src_transformer = transformers[self.transformer_names[idx]]
+            for src_link in src_outputs.get_links():
+                for sink_tfm in self.input_links.get(src_link.get_value(), []):
+                    src_transformer.addChild(transformers[sink_tfm.tfm_unique_name],
+                                             {src_link.get_tag(): sink_tfm.tag})
+
+        return graph_runner, transformers
@@ -19,6 +19,51 @@ TRANSFORMERS['AudioMerger'] = 'audio_merger'
 TRANSFORMERS['AudioOverlapMerger'] = 'audio_overlap_merger'
 TRANSFORMERS['WavReader'] = 'wavreader'
 TRANSFORMERS['WavWriter'] = 'wavwriter'
+TRANSFORMERS['FFT'] = 'fft'
+TRANSFORMERS['IFFT'] = 'ifft'
+TRANSFORMERS['FIRFilter'] = 'fir_filter'
+TRANSFORMERS['IIRFilter'] = 'iir_filter'
+TRANSFORMERS['FilterBank'] = 'filter_bank'
+TRANSFORMERS['Resampler'] = 'resampler'
+TRANSFORMERS['Decimator'] = 'resampler'
+TRANSFORMERS['Interpolator'] = 'resampler'
+TRANSFORMERS['STFT'] = 'stft'
+TRANSFORMERS['ISTFT'] = 'istft'
+
+# The config that turns the inputs of any transformer into FIFO queues of
+# the given capacity, see Transformer.setFifoCapacity.
+FIFO_CAPACITY_TAG = 'FIFO_CAPACITY'
+
+# Returns the FIFO capacity configured for a transformer, or None.
+def get_fifo_capacity(tfm):
+    configs = tfm.get_tfm_content().get_configs()
+    if configs is None:
+        return None
+    for link in configs.get_links():
+        if link.get_tag() == FIFO_CAPACITY_TAG:
+            return parse_config_value(link.get_value())
+    return None
+
+# Converts the value of a config link into a python value. Numbers become
+# ints, or floats if they have a decimal point, filepaths become strings
+# without quotes, lists become lists of converted values and names other
+# than True, False and None are treated as strings, e.g. <FILTER_TYPE> LOWPASS.
+def parse_config_value(value):
+    if isinstance(value, list):
+        return [parse_config_value(item) for item in value]
+    if value[:1].isdigit() or value[:1] in ('-', '.'):
+        if '.' in value:
+            return float(value)
+        return int(value)
+    if value.startswith('"'):
+        return value[1:-1]
+    if value == 'True':
+        return True
+    if value == 'False':
+        return False
+    if value == 'None':
+        return None
+    return value
 
 class GraphGenerator(object):
 
@@ -127,7 +172,7 @@ class GraphGenerator(object):
                 for link in configs.get_links():
                     tag = link.get_tag()
                     value = link.get_value()
-                    self.lines.append(options_name + '["' + tag + '"] = ' + value)
+                    self.lines.append(options_name + '["' + tag + '"] = ' + repr(parse_config_value(value)))
 
             self.empty_line()
 
@@ -144,6 +189,10 @@ class GraphGenerator(object):
             self.empty_line()
             self.lines.append(tfm_unique_name + ' = ' + tfm.get_name() + '()')
             self.lines.append(tfm_unique_name + '.initialize(' + options_name + ')')
+            self.lines.append(tfm_unique_name + '.setName("' + tfm_unique_name + '")')
+            fifo_capacity = get_fifo_capacity(tfm)
+            if fifo_capacity is not None:
+                self.lines.append(tfm_unique_name + '.setFifoCapacity(' + repr(fifo_capacity) + ')')
             self.empty_line()        
 
     def compute_graph_links(self):
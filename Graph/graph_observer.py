@@ -0,0 +1,25 @@
+# Base class for objects that observe the execution of a graph, such as
+# the GraphProfiler. Observers are registered on a GraphRunner, which calls
+# the following methods while it runs. Times are wall clock seconds from
+# timeit.default_timer, and worker identifies the thread or process that
+# computed a transformer (None when computed by the runner itself).
+
+class GraphObserver(object):
+
+    def runStarted(self):
+        pass
+
+    def runFinished(self):
+        pass
+
+    def cycleStarted(self, cycle):
+        pass
+
+    def cycleFinished(self, cycle):
+        pass
+
+    def computeFinished(self, transformer, start, end, worker):
+        pass
+
+    def notifyFinished(self, transformer, start, end):
+        pass
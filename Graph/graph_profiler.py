@@ -0,0 +1,130 @@
+import json
+import numpy as np
+from timeit import default_timer
+from graph_observer import *
+
+# Records per transformer statistics while a graph runs:
+#   calls: number of compute() calls.
+#   compute time: total, mean and 99th percentile wall time of compute().
+#   notify time: total wall time spent propagating outputs to children.
+#   output bytes: total size of the array outputs set by each compute().
+#                 Outputs left unchanged from an earlier compute() are not
+#                 counted again.
+#
+# Transformers are identified by the unique names assigned by the
+# GraphGenerator (e.g. audio_splitter2). Profiling is switched on and off at
+# runtime with GraphRunner.setProfiler(); while no profiler is set the runner
+# takes its uninstrumented code path.
+#
+# At the end of a run the profiler prints a table sorted by total compute
+# time and, if json_filename is given, writes the same data as JSON.
+#
+# Usage:
+#
+#   graph_runner.setProfiler(GraphProfiler(json_filename='profile.json'))
+#   graph_runner.run()
+
+class TransformerProfile(object):
+
+    def __init__(self, name, type_name):
+        self.name = name
+        self.type_name = type_name
+        self.compute_times = []
+        self.notify_time = 0.0
+        self.output_bytes = 0
+        # The outputs after the last compute(), to find the ones set anew.
+        self.last_outputs = {}
+
+    def calls(self):
+        return len(self.compute_times)
+
+    def total_compute_time(self):
+        return sum(self.compute_times)
+
+    def mean_compute_time(self):
+        if not self.compute_times:
+            return 0.0
+        return self.total_compute_time() / len(self.compute_times)
+
+    def p99_compute_time(self):
+        if not self.compute_times:
+            return 0.0
+        return float(np.percentile(self.compute_times, 99))
+
+    def to_dict(self):
+        return {'name': self.name,
+                'type': self.type_name,
+                'calls': self.calls(),
+                'total_compute_s': self.total_compute_time(),
+                'mean_compute_s': self.mean_compute_time(),
+                'p99_compute_s': self.p99_compute_time(),
+                'notify_s': self.notify_time,
+                'output_bytes': self.output_bytes}
+
+class GraphProfiler(GraphObserver):
+
+    def __init__(self, json_filename=None, print_report=True):
+        self.json_filename = json_filename
+        self.print_report = print_report
+        self.profiles = {}
+        self.start = None
+        self.wall_time = 0.0
+
+    def profile(self, transformer):
+        profile = self.profiles.get(id(transformer))
+        if profile is None:
+            name = transformer.name
+            if name is None:
+                name = type(transformer).__name__ + str(len(self.profiles))
+            profile = TransformerProfile(name, type(transformer).__name__)
+            self.profiles[id(transformer)] = profile
+        return profile
+
+    def runStarted(self):
+        self.start = default_timer()
+
+    def runFinished(self):
+        self.wall_time += default_timer() - self.start
+        if self.print_report:
+            print self.report()
+        if self.json_filename is not None:
+            with open(self.json_filename, 'w') as file:
+                json.dump(self.to_dict(), file, indent=2, sort_keys=True)
+
+    def computeFinished(self, transformer, start, end, worker):
+        profile = self.profile(transformer)
+        profile.compute_times.append(end - start)
+        last_outputs = profile.last_outputs
+        for key, value in transformer.outputs.iteritems():
+            # A ProcessExecutor copies every output back after each compute(),
+            # so it marks the ones left from an earlier compute() itself.
+            if last_outputs.get(key) is value or not getattr(value, 'fresh', True):
+                continue
+            # Also counts arrays held in shared memory by a ProcessExecutor.
+            nbytes = getattr(value, 'nbytes', None)
+            if isinstance(nbytes, int):
+                profile.output_bytes += nbytes
+        profile.last_outputs = dict(transformer.outputs)
+
+    def notifyFinished(self, transformer, start, end):
+        self.profile(transformer).notify_time += end - start
+
+    def sorted_profiles(self):
+        return sorted(self.profiles.itervalues(),
+                      key=lambda profile: (-profile.total_compute_time(), profile.name))
+
+    def report(self):
+        lines = []
+        lines.append('%-28s %8s %12s %12s %12s %12s %12s' % ('transformer', 'calls', 'total ms',
+            'mean us', 'p99 us', 'notify ms', 'output KB'))
+        for profile in self.sorted_profiles():
+            lines.append('%-28s %8d %12.2f %12.1f %12.1f %12.2f %12.1f' % (profile.name,
+                profile.calls(), 1e3 * profile.total_compute_time(), 1e6 * profile.mean_compute_time(),
+                1e6 * profile.p99_compute_time(), 1e3 * profile.notify_time,
+                profile.output_bytes / 1024.0))
+        lines.append('Wall time: %.3f s' % self.wall_time)
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {'wall_time_s': self.wall_time,
+                'transformers': [profile.to_dict() for profile in self.sorted_profiles()]}
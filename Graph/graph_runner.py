@@ -1,4 +1,6 @@
 import numpy as np
+from timeit import default_timer
+from graph_schedule import *
 
 class GraphRunner(object):
 
@@ -6,36 +8,128 @@ class GraphRunner(object):
         self.roots = [];
         self.execute_list = [];
         self.num_cycles = 0;
+        self.schedule = None;
+        self.executor = None;
+        self.verbose = True;
+        self.profiler = None;
+        self.tracer = None;
+        self.observers = [];
 
     # Core execution. Runs multiple iterations of BFS until the finish signal is fired.
+    # If the graph has been compiled, the precomputed schedule is replayed instead.
+    # If an executor is set, the transformers of each cycle are computed by the
+    # executor before their outputs are propagated in execute list order.
+    # Graphs that send blocks of frames to a transformer that only takes
+    # single frames are rejected before the first cycle. Once the graph has
+    # finished, Close() is called on every transformer.
     def run(self):
-        print "Executing Cycle 0";
-        for root in self.roots:
-            # Call compute function on transformer and retrieve outputs
-            root.compute();
-
-            # Pass outputs from parent to child and retrieve a list of all
-            # children that are ready to execute in the next cycle 
-            ready_children = root.notifyChildren();
-            self.execute_list.extend(ready_children);
-
-            # Increment statistics on graph execution
-            self.num_cycles = 1;
-        
-        next_execute_list = []
-        while self.execute_list:
-            if (self.num_cycles % 100 == 0):
-                print "Executing Cycle " + str(self.num_cycles);
-            for transformer in self.execute_list:
-                transformer_outputs = transformer.compute();
-                ready_children = transformer.notifyChildren();
-                next_execute_list.extend(ready_children);
-            self.num_cycles += 1;
-            self.execute_list = next_execute_list[:]
-            next_execute_list = []
-
-        print "Completed graph execution after: " + str(self.num_cycles) + " cycles.    "
+        check_block_inputs(self.roots);
+        for observer in self.observers:
+            observer.runStarted();
+
+        if self.schedule is not None:
+            self.runSchedule();
+        else:
+            # The roots are executed in cycle 0.
+            self.execute_list = self.roots[:];
+            while self.execute_list:
+                if (self.verbose and self.num_cycles % 100 == 0):
+                    print "Executing Cycle " + str(self.num_cycles);
+                self.execute_list = self.executeCycle(self.execute_list);
+                self.num_cycles += 1;
+
+            if self.verbose:
+                print "Completed graph execution after: " + str(self.num_cycles) + " cycles.    "
+
+        for transformer in discover_transformers(self.roots)[0]:
+            transformer.Close();
+
+        for observer in self.observers:
+            observer.runFinished();
+
+    # Computes the transformers of one cycle, passes outputs from parent to
+    # child and returns a list of all children that are ready to execute in
+    # the next cycle.
+    def executeCycle(self, transformers):
+        next_execute_list = [];
+        observers = self.observers;
+        executor = self.executor;
+        if executor is not None and has_duplicates(transformers):
+            # A transformer that became ready twice within one cycle must
+            # compute and propagate its outputs once per occurrence, in order,
+            # so that its second compute() does not overwrite the outputs of
+            # the first before they reach its children. Such cycles run
+            # sequentially.
+            executor = None;
+        if not observers:
+            if executor is not None:
+                executor.executeCycle(transformers);
+                for transformer in transformers:
+                    next_execute_list.extend(transformer.notifyChildren());
+            else:
+                for transformer in transformers:
+                    transformer.compute();
+                    next_execute_list.extend(transformer.notifyChildren());
+            return next_execute_list;
+
+        # Instrumented execution, only taken while observers are registered.
+        for observer in observers:
+            observer.cycleStarted(self.num_cycles);
+        if executor is not None:
+            executor.executeCycle(transformers, self.computeFinished);
+        for transformer in transformers:
+            if executor is None:
+                start = default_timer();
+                transformer.compute();
+                self.computeFinished(transformer, start, default_timer(), None);
+            start = default_timer();
+            next_execute_list.extend(transformer.notifyChildren());
+            end = default_timer();
+            for observer in observers:
+                observer.notifyFinished(transformer, start, end);
+        for observer in observers:
+            observer.cycleFinished(self.num_cycles);
+        return next_execute_list;
+
+    def computeFinished(self, transformer, start, end, worker):
+        for observer in self.observers:
+            observer.computeFinished(transformer, start, end, worker);
+
+    # Analyzes the linked graph once and stores a static schedule that
+    # subsequent calls to run() replay. Must be called after all roots
+    # have been added and all transformers have been linked.
+    def compile(self):
+        self.schedule = ScheduleCompiler(self.roots).compile();
+        return self.schedule;
+
+    def runSchedule(self):
+        if self.verbose:
+            print "Executing compiled schedule of " + str(len(self.schedule.frame)) + " transformers per frame";
+        num_frames = self.schedule.execute(self.executor, self.observers);
+        if self.verbose:
+            print "Completed graph execution after: " + str(num_frames) + " frames.    "
+
+    # Sets an executor, e.g. a ThreadedExecutor, used to compute the
+    # transformers of each cycle. Pass None to execute sequentially.
+    def setExecutor(self, executor):
+        self.executor = executor;
+
+    # Sets a GraphProfiler that records statistics of every transformer.
+    # Pass None to switch profiling off. Without observers the runner takes
+    # the uninstrumented code path.
+    def setProfiler(self, profiler):
+        self.profiler = profiler;
+        self.updateObservers();
+
+    # Sets a GraphTracer that records a timeline of the execution in the
+    # Chrome trace format. Pass None to switch tracing off.
+    def setTracer(self, tracer):
+        self.tracer = tracer;
+        self.updateObservers();
+
+    def updateObservers(self):
+        self.observers = [observer for observer in [self.profiler, self.tracer] if observer is not None];
 
     def addRoot(self, root):
         self.roots.append(root);
-        
\ No newline at end of file
+        
@@ -0,0 +1,259 @@
+# Compiles a linked transformer graph into a static execution schedule.
+#
+# The BFS runner rediscovers the execution order every cycle by collecting
+# the return values of notifyChildren(). For frame based graphs, e.g.
+# WavReader -> AudioSplitter -> ... -> AudioMerger, the order in which
+# transformers fire repeats identically for every frame. The schedule
+# compiler discovers that order once by simulating the ready-input
+# protocol symbolically (assuming every output is produced), which yields:
+#
+#   prologue: the levels (BFS cycles) executed before the graph reaches a
+#             steady state, starting with the graph roots.
+#   frame:    the levels that repeat for every frame, i.e. the loop closed
+#             by feedback edges such as AudioMerger INPUT_CONSUMED ->
+#             AudioSplitter READY.
+#
+# At run time the schedule is replayed as a flat list of transformer
+# indices. Data dependent behaviour (outputs that are None are not
+# propagated) is handled with the ready masks of the transformers (see
+# Transformer.resolveInputSlots), so that no lists are rebuilt and no
+# ready_inputs dictionaries are scanned while the graph runs. Once a pass
+# over the frame fires no transformer, the remaining ready transformers
+# (e.g. sinks fed by the final output of a merger) are drained in schedule
+# order.
+
+from timeit import default_timer
+
+# Collects every transformer reachable from the roots in discovery order.
+# Returns the transformers and a map from id(transformer) to its index.
+def discover_transformers(roots):
+    nodes = []
+    index_of = {}
+    stack = list(reversed(roots))
+    while stack:
+        node = stack.pop()
+        if id(node) in index_of:
+            continue
+        node.resolveInputSlots()
+        index_of[id(node)] = len(nodes)
+        nodes.append(node)
+        for connection in reversed(node.child_tag_connections):
+            stack.append(connection.child)
+    return nodes, index_of
+
+# Whether a transformer occurs more than once in the list, i.e. became
+# ready twice within one cycle.
+def has_duplicates(transformers):
+    return len(set(id(transformer) for transformer in transformers)) != len(transformers)
+
+# Raises a ValueError if a block of frames, e.g. the OUTPUT_DATA of an
+# AudioSplitter with FRAMES_PER_CYCLE, reaches an input that is not listed
+# in the block_inputs of its transformer. Blocks are followed through the
+# block_outputs of every transformer that receives one. Without this check
+# such a graph fails in the middle of the run with an error from numpy.
+def check_block_inputs(roots):
+    nodes, index_of = discover_transformers(roots)
+    block_keys = [set(node.blockOutputs()) for node in nodes]
+    pending = [idx for idx in range(len(nodes)) if block_keys[idx]]
+    while pending:
+        node = nodes[pending.pop()]
+        for parent_key, child, bit, child_key, last in node.edges:
+            if parent_key not in block_keys[index_of[id(node)]]:
+                continue
+            if child_key not in child.block_inputs:
+                raise ValueError('%s %s receives blocks of frames from %s %s, but %s only takes a '
+                                 'single frame; remove FRAMES_PER_CYCLE from the AudioSplitter'
+                                 % (type(child).__name__, child_key, type(node).__name__,
+                                    parent_key, type(child).__name__))
+            child_idx = index_of[id(child)]
+            added = set(child.block_outputs) - block_keys[child_idx]
+            if added:
+                block_keys[child_idx] |= added
+                pending.append(child_idx)
+
+class GraphSchedule(object):
+
+    def __init__(self, nodes, prologue_levels, frame_levels):
+        self.nodes = nodes
+        self.prologue_levels = prologue_levels
+        self.frame_levels = frame_levels
+
+        # Flattened replay lists.
+        self.prologue = [idx for level in prologue_levels for idx in level]
+        self.frame = [idx for level in frame_levels for idx in level]
+        self.order = self.prologue + self.frame
+
+        # Per transformer edges used during replay, the precomputed edges of
+        # the transformer with children replaced by their indices:
+        #   (output key, child index, input bit, input key, last link of connection).
+        index_of = dict((id(node), idx) for idx, node in enumerate(nodes))
+        self.edges = []
+        for node in nodes:
+            self.edges.append([(parent_key, index_of[id(child)], bit, child_key, last)
+                               for parent_key, child, bit, child_key, last in node.edges])
+
+    # Replays the schedule. Returns the number of executed frame passes.
+    # If an executor is given, the transformers of each level are handed to
+    # executor.executeCycle() together, as the BFS runner does with a cycle.
+    # Observers (see GraphObserver) see every pass over the schedule as a cycle.
+    def execute(self, executor=None, observers=None):
+        nodes = self.nodes
+        edges = self.edges
+        masks = [node.ready_mask for node in nodes]
+        full_masks = [node.full_mask for node in nodes]
+        sticky_masks = [node.sticky_mask for node in nodes]
+
+        # Number of times each transformer became ready but has not executed yet.
+        armed = [0] * len(nodes)
+        for idx in self.prologue_levels[0]:
+            armed[idx] = 1
+
+        def propagate(idx):
+            outputs = nodes[idx].outputs
+            for parent_key, child_idx, bit, child_key, last in edges[idx]:
+                value = outputs.get(parent_key)
+                if value is not None:
+                    nodes[child_idx].inputs[child_key] = value
+                    masks[child_idx] |= bit
+                if last and masks[child_idx] == full_masks[child_idx]:
+                    armed[child_idx] += 1
+                    masks[child_idx] &= sticky_masks[child_idx]
+
+        def compute_finished(transformer, start, end, worker):
+            for observer in observers:
+                observer.computeFinished(transformer, start, end, worker)
+
+        def timed_propagate(idx):
+            start = default_timer()
+            propagate(idx)
+            end = default_timer()
+            for observer in observers:
+                observer.notifyFinished(nodes[idx], start, end)
+
+        # Executes the armed transformers of the given order one after the
+        # other. Returns whether any fired.
+        def run_sequential(order):
+            fired = False
+            for idx in order:
+                if armed[idx] > 0:
+                    armed[idx] -= 1
+                    start = default_timer()
+                    nodes[idx].compute()
+                    compute_finished(nodes[idx], start, default_timer(), None)
+                    timed_propagate(idx)
+                    fired = True
+            return fired
+
+        # Executes the armed transformers of one pass. Returns whether any fired.
+        def run_pass(order, levels):
+            fired = False
+            if executor is None and not observers:
+                for idx in order:
+                    if armed[idx] > 0:
+                        armed[idx] -= 1
+                        nodes[idx].compute()
+                        propagate(idx)
+                        fired = True
+                return fired
+
+            for observer in observers:
+                observer.cycleStarted(num_passes[0])
+            if executor is None:
+                fired = run_sequential(order)
+            else:
+                for level in levels:
+                    ready = [idx for idx in level if armed[idx] > 0]
+                    if not ready:
+                        continue
+                    if has_duplicates(ready):
+                        # See GraphRunner.executeCycle().
+                        run_sequential(level)
+                    else:
+                        for idx in ready:
+                            armed[idx] -= 1
+                        if observers:
+                            executor.executeCycle([nodes[idx] for idx in ready], compute_finished)
+                            for idx in ready:
+                                timed_propagate(idx)
+                        else:
+                            executor.executeCycle([nodes[idx] for idx in ready])
+                            for idx in ready:
+                                propagate(idx)
+                    fired = True
+            for observer in observers:
+                observer.cycleFinished(num_passes[0])
+            num_passes[0] += 1
+            return fired
+
+        if observers is None:
+            observers = []
+        num_passes = [0]
+        run_pass(self.prologue, self.prologue_levels)
+
+        num_frames = 0
+        while True:
+            if run_pass(self.frame, self.frame_levels):
+                num_frames += 1
+                continue
+
+            # The frame loop has stopped. Drain transformers that only fire once
+            # it has finished, e.g. a WavWriter fed by the final merger output.
+            if not run_pass(self.order, self.prologue_levels + self.frame_levels):
+                break
+
+        for idx, node in enumerate(nodes):
+            node.ready_mask = masks[idx]
+        return num_frames
+
+
+class ScheduleCompiler(object):
+
+    def __init__(self, roots):
+        self.roots = roots
+        self.nodes = []
+        self.index_of = {}
+
+    def compile(self):
+        self.nodes, self.index_of = discover_transformers(self.roots)
+        for node in self.nodes:
+            # An unlinked optional input that is also sticky, e.g. the
+            # EXPECTED_LENGTH of an AudioMerger, is set in the ready and sticky
+            # masks once (see Transformer.resolveInputSlots) and stays ready for
+            # the whole run. Any other unlinked optional input lets the
+            # transformer fire again without new inputs, which the schedule
+            # cannot replay.
+            unlinked = set(node.optional_inputs) - node.wired_inputs - node.findStickyInputs()
+            if node.fifos is not None or unlinked:
+                raise ValueError('Graphs with FIFO inputs or unlinked optional inputs, e.g. an '
+                                 'AudioSplitter without READY, cannot be compiled; use the BFS runner')
+        prologue_levels, frame_levels = self.simulate()
+        return GraphSchedule(self.nodes, prologue_levels, frame_levels)
+
+    # Runs the ready-input protocol of the BFS runner without calling compute(),
+    # assuming every output is produced. The sequence of fired levels is
+    # deterministic over a finite state, so it either terminates or repeats.
+    def simulate(self):
+        masks = [node.ready_mask for node in self.nodes]
+        levels = []
+        seen = {}
+        level = [self.index_of[id(root)] for root in self.roots]
+
+        while level:
+            state = (tuple(level), tuple(masks))
+            if state in seen:
+                start = seen[state]
+                return levels[:start], levels[start:]
+            seen[state] = len(levels)
+            levels.append(level)
+
+            next_level = []
+            for idx in level:
+                for parent_key, child, bit, child_key, last in self.nodes[idx].edges:
+                    child_idx = self.index_of[id(child)]
+                    masks[child_idx] |= bit
+                    if last and masks[child_idx] == child.full_mask:
+                        next_level.append(child_idx)
+                        masks[child_idx] &= child.sticky_mask
+            level = next_level
+
+        return levels, []
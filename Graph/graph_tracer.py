@@ -0,0 +1,120 @@
+import json
+import threading
+from timeit import default_timer
+from graph_observer import *
+
+# Records a timeline of graph execution in the Chrome trace event format,
+# which can be opened in chrome://tracing or https://ui.perfetto.dev.
+#
+# Every recorded cycle, compute() and notifyChildren() call becomes a
+# complete event ('X'), i.e. a begin timestamp with a duration. Cycles and
+# notifications are placed on the track of the graph runner; computes are
+# placed on the track of the thread or worker process that executed them,
+# so the timeline of a ThreadedExecutor or ProcessExecutor shows one track
+# per worker.
+#
+# To bound the size of traces of long files only every sample_every-th
+# frame is recorded. By default every cycle counts as a frame; if
+# frame_transformer names a transformer (e.g. audio_splitter), a new frame
+# starts whenever that transformer computes, so each sampled frame shows the
+# complete AudioSplitter -> ... -> AudioOverlapMerger loop.
+#
+# With a ThreadedExecutor, computeFinished() is called from the worker
+# threads, so the frame counter is advanced under a lock. The computes that
+# finish in the same cycle as the frame transformer may then be recorded
+# with either frame.
+#
+# Usage:
+#
+#   graph_runner.setTracer(GraphTracer('trace.json', sample_every=100,
+#                                      frame_transformer='audio_splitter'))
+#   graph_runner.run()
+
+RUNNER_TRACK = 'graph runner'
+
+class GraphTracer(GraphObserver):
+
+    def __init__(self, filename, sample_every=1, frame_transformer=None):
+        assert sample_every > 0
+        self.filename = filename
+        self.sample_every = sample_every
+        self.frame_transformer = frame_transformer
+        self.events = []
+        self.tracks = {}
+        self.tracks_lock = threading.Lock()
+        self.origin = None
+        # frame and recording are guarded by frame_lock.
+        self.frame_lock = threading.Lock()
+        self.frame = 0
+        self.recording = True
+        self.cycle_start = None
+
+    def runStarted(self):
+        if self.origin is None:
+            self.origin = default_timer()
+        self.track(RUNNER_TRACK)
+
+    def runFinished(self):
+        self.write()
+
+    def cycleStarted(self, cycle):
+        if self.frame_transformer is None:
+            with self.frame_lock:
+                self.recording = self.frame % self.sample_every == 0
+                self.frame += 1
+        self.cycle_start = default_timer()
+
+    def cycleFinished(self, cycle):
+        if self.recording:
+            # Cycles before the first frame, e.g. the graph roots, have no frame.
+            args = {'frame': self.frame - 1} if self.frame > 0 else None
+            self.addEvent('cycle ' + str(cycle), 'cycle', self.cycle_start, default_timer(),
+                          RUNNER_TRACK, args)
+
+    def computeFinished(self, transformer, start, end, worker):
+        name = self.transformerName(transformer)
+        with self.frame_lock:
+            if name == self.frame_transformer:
+                self.recording = self.frame % self.sample_every == 0
+                self.frame += 1
+            recording = self.recording
+        if recording:
+            if worker is None:
+                worker = RUNNER_TRACK
+            self.addEvent(name, type(transformer).__name__, start, end, worker, None)
+
+    def notifyFinished(self, transformer, start, end):
+        if self.recording:
+            self.addEvent('notify ' + self.transformerName(transformer), 'notify', start, end,
+                          RUNNER_TRACK, None)
+
+    def transformerName(self, transformer):
+        if transformer.name is not None:
+            return transformer.name
+        return type(transformer).__name__
+
+    # Returns the thread id of a track, emitting a thread name metadata event
+    # the first time a track is seen.
+    def track(self, track_name):
+        tid = self.tracks.get(track_name)
+        if tid is None:
+            with self.tracks_lock:
+                tid = self.tracks.get(track_name)
+                if tid is None:
+                    tid = len(self.tracks)
+                    self.tracks[track_name] = tid
+                    self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': tid,
+                                        'args': {'name': str(track_name)}})
+        return tid
+
+    def addEvent(self, name, category, start, end, track_name, args):
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': 0,
+                 'tid': self.track(track_name),
+                 'ts': 1e6 * (start - self.origin), 'dur': 1e6 * (end - start)}
+        if args is not None:
+            event['args'] = args
+        self.events.append(event)
+
+    def write(self):
+        with open(self.filename, 'w') as file:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, file)
@@ -42,10 +42,10 @@ class Lexer(object):
                 if char.isalpha():
                     self.state = State.NAME
                     self.token_type = Type.NAME
-                elif char.isdigit():
+                elif char.isdigit() or char == '-' or char == '.':
                     self.state = State.NUMBER
                     self.token_type = Type.NUMBER
-                elif self.isBracket(char):
+                elif self.isBracket(char) or char == ',':
                     self.token = char
                     break
                 elif char == '"':
@@ -54,11 +54,12 @@ class Lexer(object):
                 else:
                     raise ValueError("Invalid character " + char + " found.")
             elif self.state == State.NAME:
-                if (not char.isalpha()) and (char != '_'):
+                if (not char.isalnum()) and (char != '_'):
                     self.index = self.index - 1
                     break
             elif self.state == State.NUMBER:
-                if not char.isdigit():
+                # Numbers may have a sign and a decimal point, e.g. -3.5
+                if not char.isdigit() and (char != '.' or '.' in self.token):
                     self.index = self.index - 1
                     break
             elif self.state == State.FILE:
@@ -70,7 +71,7 @@ class Lexer(object):
             self.token = self.token + char            
 
     def isBracket(self, char):
-        return char == '<' or char == '>' or char == '{' or char == '}'
+        return char == '<' or char == '>' or char == '{' or char == '}' or char == '[' or char == ']'
 
     def inspect(self, str):
         return self.token == str
@@ -113,6 +114,9 @@ class Lexer(object):
     def consumeNumber(self):
         if self.token_type != Type.NUMBER:
             raise ValueError("Expected a number but received token: " + self.token + " instead")
+
+        if not any(char.isdigit() for char in self.token):
+            raise ValueError("Invalid number " + self.token + " found.")
         
         number = self.token
         self.advance()
@@ -0,0 +1,465 @@
+import os
+import time
+import shutil
+import tempfile
+import traceback
+import numpy as np
+from timeit import default_timer
+from multiprocessing import Process, Pipe, cpu_count
+from graph_schedule import discover_transformers
+
+# Executes transformers in worker processes, so that transformers dominated
+# by pure python loops (e.g. VocoderLinearInterpolator) are not serialized
+# by the GIL.
+#
+# Every transformer is placed on one worker for the whole run, so its state
+# (e.g. the sample history of a FIRFilter or the position of an
+# AudioSplitter) lives in that worker. The GraphRunner keeps running the
+# ready-input protocol on its own copies of the transformers: the executor
+# dispatches the ready transformers of a cycle to their workers, waits for
+# all of them and writes their outputs back before notifyChildren() is
+# called, so propagation stays deterministic.
+#
+# Arrays are never pickled. A worker writes an output array that is needed
+# by a transformer on another worker into a shared memory segment (a file
+# on /dev/shm mapped with np.memmap) and only sends a small SharedArray
+# descriptor. The consuming worker maps the segment copy-on-write, so
+# transformers that modify their inputs in place do not affect other
+# consumers. Outputs only consumed on the same worker are handed over
+# directly inside the worker and never leave it. For FIFO inputs (see
+# Transformer.setFifoCapacity) the worker queues these outputs as well, and
+# the graph runner sends the marker it dequeued so that the worker takes
+# the matching value from its own queue.
+#
+# Usage, after all transformers have been linked:
+#
+#   executor = ProcessExecutor(graph_runner.roots, num_workers=4)
+#   graph_runner.setExecutor(executor)
+#   graph_runner.run()
+#   executor.close()
+#
+# close() also calls Close() on the transformers in the workers, so e.g. the
+# file of a WavWriter in streaming mode is complete once it returns.
+
+SHARED_MEMORY_DIR = '/dev/shm'
+
+# Sent in place of an array that is only consumed on the producing worker.
+# It is not None, so the ready-input protocol treats the output as produced.
+# Markers are compared by type since each pickled copy is a new instance.
+class LocalOutput(object):
+    pass
+
+LOCAL_OUTPUT = LocalOutput()
+
+# Describes an array in a shared memory segment.
+class SharedArray(object):
+
+    def __init__(self, path, dtype, shape, producer, key):
+        self.path = path
+        self.dtype = dtype
+        self.shape = shape
+        self.producer = producer
+        self.key = key
+        self.nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self.remaining = 0
+        # Whether the array was set by the compute() that sent it, rather
+        # than left in the outputs by an earlier one.
+        self.fresh = True
+
+def is_shareable(value):
+    return isinstance(value, np.ndarray) and value.size > 0 and value.dtype != np.object
+
+# Groups transformers into partitions that each run on a single worker.
+#
+# Stateful chains are kept together: the transformers of a feedback loop,
+# e.g. AudioSplitter -> ... -> AudioMerger -> AudioSplitter, form one
+# partition, and so do linear chains where a partition has a single child
+# partition which in turn has a single parent. Edges from graph roots are
+# ignored when counting parents, since roots only execute once. Data flowing
+# along such a chain never crosses a process boundary. Partitions are then assigned to
+# workers, largest first, onto the worker with the fewest transformers.
+#
+# As a consequence, a frame based graph whose transformers all lie on the
+# READY/INPUT_CONSUMED loop runs on a single worker and gets no parallelism
+# from this executor; only independent partitions, e.g. the bands of a
+# multi-band graph, run concurrently. An explicit assignment can split such
+# a loop, at the cost of a transfer for every frame.
+class GraphPartitioner(object):
+
+    def __init__(self, nodes, index_of):
+        self.nodes = nodes
+        self.index_of = index_of
+        self.children = []
+        for idx, node in enumerate(nodes):
+            children = []
+            for connection in node.child_tag_connections:
+                child_idx = index_of[id(connection.child)]
+                if child_idx != idx and child_idx not in children:
+                    children.append(child_idx)
+            self.children.append(children)
+
+    def partition(self, num_workers):
+        group_of = self.strongly_connected_components()
+        has_parent = [False] * len(self.nodes)
+        for node_children in self.children:
+            for child_idx in node_children:
+                has_parent[child_idx] = True
+
+        # Merge linear chains of components.
+        while True:
+            children = {}
+            parents = {}
+            for idx, node_children in enumerate(self.children):
+                for child_idx in node_children:
+                    if group_of[idx] != group_of[child_idx] and has_parent[idx]:
+                        children.setdefault(group_of[idx], set()).add(group_of[child_idx])
+                        parents.setdefault(group_of[child_idx], set()).add(group_of[idx])
+            chain = None
+            for group in sorted(children.keys()):
+                if len(children[group]) == 1:
+                    child_group = list(children[group])[0]
+                    if len(parents[child_group]) == 1:
+                        chain = (group, child_group)
+                        break
+            if chain is None:
+                break
+            group_of = [chain[0] if group == chain[1] else group for group in group_of]
+
+        members = {}
+        for idx, group in enumerate(group_of):
+            members.setdefault(group, []).append(idx)
+
+        assignment = [0] * len(self.nodes)
+        load = [0] * num_workers
+        for group in sorted(members.values(), key=lambda group: (-len(group), group[0])):
+            worker = load.index(min(load))
+            load[worker] += len(group)
+            for idx in group:
+                assignment[idx] = worker
+        return assignment
+
+    # Tarjan's algorithm. Returns the component of every transformer, labelled
+    # by the smallest transformer index in the component.
+    def strongly_connected_components(self):
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        group_of = [None] * len(self.nodes)
+
+        def visit(idx):
+            index[idx] = lowlink[idx] = len(index)
+            stack.append(idx)
+            on_stack.add(idx)
+            for child_idx in self.children[idx]:
+                if child_idx not in index:
+                    visit(child_idx)
+                    lowlink[idx] = min(lowlink[idx], lowlink[child_idx])
+                elif child_idx in on_stack:
+                    lowlink[idx] = min(lowlink[idx], index[child_idx])
+            if lowlink[idx] == index[idx]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.remove(member)
+                    component.append(member)
+                    if member == idx:
+                        break
+                for member in component:
+                    group_of[member] = min(component)
+
+        for idx in range(len(self.nodes)):
+            if idx not in index:
+                visit(idx)
+        return group_of
+
+class ProcessExecutor(object):
+
+    def __init__(self, roots, num_workers=None, assignment=None):
+        if num_workers is None:
+            num_workers = cpu_count()
+        assert num_workers > 0
+        self.num_workers = num_workers
+
+        self.nodes, self.index_of = discover_transformers(roots)
+
+        if assignment is None:
+            assignment = GraphPartitioner(self.nodes, self.index_of).partition(num_workers)
+        assert len(assignment) == len(self.nodes)
+        self.assignment = assignment
+
+        # local_links: (output key, child index, input key) on the same worker.
+        # remote_fanout: output key -> number of links to other workers.
+        self.local_links = []
+        self.remote_fanout = []
+        for idx, node in enumerate(self.nodes):
+            local_links = []
+            remote_fanout = {}
+            for connection in node.child_tag_connections:
+                child_idx = self.index_of[id(connection.child)]
+                for parent_key, child_key in connection.tag_map.iteritems():
+                    if assignment[child_idx] == assignment[idx]:
+                        local_links.append((parent_key, child_idx, child_key))
+                    else:
+                        remote_fanout[parent_key] = remote_fanout.get(parent_key, 0) + 1
+            self.local_links.append(local_links)
+            self.remote_fanout.append(remote_fanout)
+
+        # The last value sent for each input of each transformer. Inputs that
+        # have not changed since, e.g. the sticky INPUT_DATA of an
+        # AudioSplitter, are not sent again.
+        self.sent_inputs = [{} for node in self.nodes]
+
+        # Statistics.
+        #   compute_stats: transformer index -> [calls, seconds].
+        #   edge_stats: (producer index, output key) -> [transfers, bytes, write seconds, map seconds].
+        #   local_stats: (producer index, output key) -> [handoffs, bytes] for
+        #                outputs handed to children on the same worker.
+        self.compute_stats = {}
+        self.edge_stats = {}
+        self.local_stats = {}
+
+        # Shared memory segments that have not been mapped by every remote
+        # consumer yet.
+        self.live_segments = set()
+
+        self.shared_memory_dir = tempfile.mkdtemp(prefix='audiograph_',
+            dir=SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else None)
+
+        self.connections = []
+        self.workers = []
+        for worker in range(num_workers):
+            parent_connection, child_connection = Pipe()
+            process = Process(target=self.workerMain, args=(worker, child_connection))
+            process.daemon = True
+            process.start()
+            child_connection.close()
+            self.connections.append(parent_connection)
+            self.workers.append(process)
+
+    # Computes every transformer on its worker and copies the outputs back
+    # into the transformers owned by the graph runner. The transformers must
+    # be distinct, see ThreadedExecutor.executeCycle(). If given,
+    # on_compute(transformer, start, end, worker) is called for every
+    # transformer with the times measured by its worker.
+    def executeCycle(self, transformers, on_compute=None):
+        tasks = [[] for worker in range(self.num_workers)]
+        sent = []
+        for transformer in transformers:
+            idx = self.index_of[id(transformer)]
+            inputs = {}
+            sent_inputs = self.sent_inputs[idx]
+            for key, value in transformer.inputs.iteritems():
+                if isinstance(value, LocalOutput):
+                    if transformer.fifos is not None and key in transformer.fifos:
+                        inputs[key] = value
+                    continue
+                if sent_inputs.get(key) is value:
+                    continue
+                inputs[key] = value
+                sent_inputs[key] = value
+                if isinstance(value, SharedArray):
+                    sent.append(value)
+            tasks[self.assignment[idx]].append((idx, inputs))
+
+        busy = []
+        for worker, worker_tasks in enumerate(tasks):
+            if worker_tasks:
+                self.connections[worker].send(worker_tasks)
+                busy.append(worker)
+
+        for worker in busy:
+            status, results = self.connections[worker].recv()
+            if status != 'ok':
+                raise RuntimeError('Transformer failed in worker ' + str(worker) + ':\n' + results)
+            for idx, outputs, start, end, write_times, map_times, local_bytes in results:
+                self.nodes[idx].outputs.update(outputs)
+                self.recordStatistics(idx, outputs, end - start, write_times, map_times, local_bytes)
+                if on_compute is not None:
+                    on_compute(self.nodes[idx], start, end, 'worker ' + str(worker))
+
+        # Segments can be removed once every remote consumer has mapped them.
+        for shared_array in sent:
+            shared_array.remaining -= 1
+            if shared_array.remaining == 0:
+                os.remove(shared_array.path)
+                self.live_segments.discard(shared_array)
+
+        self.releaseSegments(transformers)
+
+    # Removes the segments that no transformer will map anymore, because the
+    # consumers they were delivered to took a newer value instead or never
+    # fire, e.g. the outputs of a transformer after the final frame. A
+    # segment is kept while the input or FIFO queue of a transformer holds
+    # it and it has not been sent to that transformer's worker, and so are
+    # the outputs of this cycle, which are propagated after it.
+    def releaseSegments(self, transformers):
+        if not self.live_segments:
+            return
+        pending = set()
+        for transformer in transformers:
+            for value in transformer.outputs.itervalues():
+                if isinstance(value, SharedArray):
+                    pending.add(id(value))
+        for idx, node in enumerate(self.nodes):
+            sent_inputs = self.sent_inputs[idx]
+            for key, value in node.inputs.iteritems():
+                if isinstance(value, SharedArray) and sent_inputs.get(key) is not value:
+                    pending.add(id(value))
+            if node.fifos is not None:
+                for queue in node.fifos.itervalues():
+                    for value in queue:
+                        if isinstance(value, SharedArray):
+                            pending.add(id(value))
+        for shared_array in list(self.live_segments):
+            if id(shared_array) not in pending:
+                os.remove(shared_array.path)
+                self.live_segments.remove(shared_array)
+
+    def recordStatistics(self, idx, outputs, compute_time, write_times, map_times, local_bytes):
+        stats = self.compute_stats.setdefault(idx, [0, 0.0])
+        stats[0] += 1
+        stats[1] += compute_time
+
+        for key, value in outputs.iteritems():
+            if isinstance(value, SharedArray):
+                value.remaining = self.remote_fanout[idx][key]
+                self.live_segments.add(value)
+                stats = self.edge_stats.setdefault((idx, key), [0, 0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += value.nbytes
+                stats[2] += write_times[key]
+
+        for (producer, key), map_time in map_times.iteritems():
+            self.edge_stats.setdefault((producer, key), [0, 0, 0.0, 0.0])[3] += map_time
+
+        for key, nbytes in local_bytes.iteritems():
+            stats = self.local_stats.setdefault((idx, key), [0, 0])
+            stats[0] += 1
+            stats[1] += nbytes
+
+    def workerMain(self, worker, connection):
+        counter = 0
+        for node in self.nodes:
+            if node.fifos is not None:
+                for queue in node.fifos.itervalues():
+                    queue.clear()
+
+        while True:
+            try:
+                tasks = connection.recv()
+            except EOFError:
+                return
+            if tasks is None:
+                # The transformers of this worker hold the state of the run,
+                # e.g. the file of a WavWriter in streaming mode.
+                for idx, node in enumerate(self.nodes):
+                    if self.assignment[idx] == worker:
+                        node.Close()
+                return
+
+            try:
+                results = []
+                for idx, inputs in tasks:
+                    node = self.nodes[idx]
+                    map_times = {}
+                    for key, value in inputs.iteritems():
+                        if isinstance(value, SharedArray):
+                            start = time.time()
+                            node.inputs[key] = np.memmap(value.path, dtype=value.dtype, mode='c', shape=value.shape)
+                            edge = (value.producer, value.key)
+                            map_times[edge] = map_times.get(edge, 0.0) + time.time() - start
+                        elif isinstance(value, LocalOutput):
+                            node.inputs[key] = node.fifos[key].popleft()
+                        else:
+                            node.inputs[key] = value
+
+                    previous_outputs = dict(node.outputs)
+                    compute_start = default_timer()
+                    node.compute()
+                    compute_end = default_timer()
+
+                    outputs = {}
+                    write_times = {}
+                    for key, value in node.outputs.iteritems():
+                        if value is None:
+                            outputs[key] = None
+                        elif key not in self.remote_fanout[idx] and is_shareable(value):
+                            outputs[key] = LOCAL_OUTPUT
+                        elif is_shareable(value):
+                            start = time.time()
+                            path = os.path.join(self.shared_memory_dir, '%d_%d' % (worker, counter))
+                            counter += 1
+                            segment = np.memmap(path, dtype=value.dtype, mode='w+', shape=value.shape)
+                            segment[...] = value
+                            del segment
+                            outputs[key] = SharedArray(path, value.dtype, value.shape, idx, key)
+                            outputs[key].fresh = previous_outputs.get(key) is not value
+                            write_times[key] = time.time() - start
+                        else:
+                            outputs[key] = value
+
+                    # Hand arrays that do not leave the worker over to children on this worker.
+                    local_bytes = {}
+                    for parent_key, child_idx, child_key in self.local_links[idx]:
+                        if isinstance(outputs.get(parent_key), LocalOutput):
+                            child = self.nodes[child_idx]
+                            value = node.outputs[parent_key]
+                            local_bytes[parent_key] = value.nbytes
+                            if child.fifos is not None and child_key in child.fifos:
+                                child.fifos[child_key].append(value)
+                            else:
+                                child.inputs[child_key] = value
+
+                    results.append((idx, outputs, compute_start, compute_end, write_times, map_times,
+                                    local_bytes))
+                connection.send(('ok', results))
+            except Exception:
+                connection.send(('error', traceback.format_exc()))
+
+    # Returns a text report comparing, for every edge that crosses workers,
+    # the time spent transferring arrays with the compute time of the
+    # consuming transformers, followed by the arrays handed to children on
+    # the producing worker and the total bytes of both.
+    def report(self):
+        lines = []
+        lines.append('%-40s %8s %12s %12s %12s %14s' % ('edge', 'count', 'KB/transfer',
+            'write us', 'map us', 'consumers us'))
+        for (producer, key), stats in sorted(self.edge_stats.iteritems()):
+            count, nbytes, write_time, map_time = stats
+            if count == 0:
+                continue
+            consumers = set()
+            for connection in self.nodes[producer].child_tag_connections:
+                child_idx = self.index_of[id(connection.child)]
+                if key in connection.tag_map and self.assignment[child_idx] != self.assignment[producer]:
+                    consumers.add(child_idx)
+            consumer_time = sum(self.compute_stats[idx][1] / self.compute_stats[idx][0]
+                                for idx in consumers if idx in self.compute_stats)
+            name = self.transformerName(producer) + '.' + key
+            lines.append('%-40s %8d %12.1f %12.1f %12.1f %14.1f' % (name, count,
+                nbytes / 1024.0 / count, 1e6 * write_time / count,
+                1e6 * map_time / max(count, 1), 1e6 * consumer_time))
+
+        lines.append('%-40s %8s %12s' % ('local edge', 'count', 'KB/handoff'))
+        for (producer, key), (count, nbytes) in sorted(self.local_stats.iteritems()):
+            name = self.transformerName(producer) + '.' + key
+            lines.append('%-40s %8d %12.1f' % (name, count, nbytes / 1024.0 / count))
+
+        shared_bytes = sum(stats[1] for stats in self.edge_stats.itervalues())
+        local_bytes = sum(stats[1] for stats in self.local_stats.itervalues())
+        lines.append('%.1f KB through shared memory, %.1f KB handed over on the producing worker'
+                     % (shared_bytes / 1024.0, local_bytes / 1024.0))
+        return '\n'.join(lines)
+
+    def transformerName(self, idx):
+        if self.nodes[idx].name is not None:
+            return self.nodes[idx].name
+        return type(self.nodes[idx]).__name__ + str(idx)
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+        for process in self.workers:
+            process.join()
+        shutil.rmtree(self.shared_memory_dir, ignore_errors=True)
@@ -9,10 +9,12 @@
 # Outputs -> NULL | 'outputs''{' (Link)+ '}'
 # Configs -> NULL | 'configs''{' (Link)+ '}'
 # IOLink -> '<'Tag'>' Name
-# ConfigLink -> '<'Tag'>' [Name | Number | File]
-# Name -> [(a-z)|(A-Z)]+
-# Tag -> [A-Z]+
-# Number -> [1-9][0-9]*
+# ConfigLink -> '<'Tag'>' [Name | Number | File | List]
+# List -> '[' [Value (',' Value)*] ']'
+# Value -> [Name | Number | File]
+# Name -> [(a-z)|(A-Z)][(a-z)|(A-Z)|(0-9)|_]*
+# Tag -> [A-Z][(A-Z)|(0-9)|_]*
+# Number -> ['-'][0-9]*['.'][0-9]*
 # File -> "(...)"
 
 from lexer import *
@@ -110,18 +112,37 @@ class RDescentGraphParser(object):
         return link
 
     # A Config Link, which expects link values to either be
-    # a variable name, a number or a filepath.
+    # a variable name, a number, a filepath or a list of those.
     def configLink(self):
         self.lexer.consume('<')
         link = Link(self.tag())
         self.lexer.consume('>')
+        if self.lexer.inspect('['):
+            link = link.setValue(self.list())
+        else:
+            link = link.setValue(self.value())
+        return link
+
+    # A single config value.
+    def value(self):
         if self.lexer.inspectNumber():
-            link = link.setValue(self.number())
+            return self.number()
         elif self.lexer.inspectName():
-            link = link.setValue(self.name())
+            return self.name()
         else:
-            link = link.setValue(self.file())
-        return link
+            return self.file()
+
+    # A comma separated list of config values, e.g. [0, 500, 2000].
+    def list(self):
+        values = []
+        self.lexer.consume('[')
+        if not self.lexer.inspect(']'):
+            values.append(self.value())
+            while self.lexer.inspect(','):
+                self.lexer.consume(',')
+                values.append(self.value())
+        self.lexer.consume(']')
+        return values
 
     # A tag, which is a fully capitalized name
     def tag(self):
@@ -0,0 +1,64 @@
+import threading
+from timeit import default_timer
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from graph_schedule import has_duplicates
+
+# Executes the compute() calls of all transformers that are ready within
+# a single graph cycle concurrently on a pool of threads. Heavy NumPy
+# kernels release the GIL, so independent transformers such as several
+# FIRFilter bands fed by the same WavReader run in parallel on several
+# cores (see Benchmarks/threaded_executor_benchmark.py). Graphs in which a
+# cycle holds a single transformer, or whose transformers hold the GIL for
+# most of compute(), do not get faster and pay the cost of the pool.
+#
+# Only compute() runs on the pool. The graph runner propagates outputs by
+# calling notifyChildren() on the calling thread, in the order of the
+# execute list, once every transformer of the cycle has finished, so the
+# order in which children become ready is identical to sequential execution.
+# Consequently every transformer of a cycle sees the inputs that were
+# delivered before the cycle started.
+#
+# Usage:
+#
+#   graph_runner.setExecutor(ThreadedExecutor(num_workers=4))
+#   graph_runner.run()
+
+class ThreadedExecutor(object):
+
+    def __init__(self, num_workers=None):
+        if num_workers is None:
+            num_workers = cpu_count()
+        assert num_workers > 0
+        self.num_workers = num_workers
+        self.pool = ThreadPool(num_workers)
+
+    # Calls compute() on every transformer and returns once all have finished.
+    # The transformers must be distinct; the graph runner executes cycles in
+    # which a transformer became ready twice sequentially. If given,
+    # on_compute(transformer, start, end, worker) is called from the
+    # computing thread after each compute().
+    def executeCycle(self, transformers, on_compute=None):
+        compute = compute_transformer
+        if on_compute is not None:
+            def compute(transformer):
+                start = default_timer()
+                transformer.compute()
+                on_compute(transformer, start, default_timer(), threading.current_thread().name)
+
+        if len(transformers) == 1:
+            compute(transformers[0])
+            return
+
+        if has_duplicates(transformers):
+            raise ValueError('A transformer occurs twice in the cycle; its outputs must be '
+                             'propagated between the two compute() calls')
+
+        self.pool.map(compute, transformers, chunksize=1)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+def compute_transformer(transformer):
+    return transformer.compute()
@@ -0,0 +1,90 @@
+import numpy as np
+
+# A growable sample buffer shared by the mergers, which accumulate the
+# samples of a whole signal frame by frame.
+#
+# Concatenating every frame to the samples so far copies the whole signal
+# per frame, i.e. quadratic time in the length of the signal. The buffer
+# instead keeps spare capacity and doubles it when it runs out, so every
+# sample is copied a constant number of times on average. If the final
+# length is known in advance, reserve() allocates it at once.
+#
+# Frames are written or overlap-added in place at any position; positions
+# beyond the current length extend the buffer with zeros. view() returns the
+# samples without copying them, so the buffer must not be written to while
+# the view is in use.
+
+# The smallest capacity allocated, in samples.
+MIN_BUFFER_CAPACITY = 4096
+
+class AudioBuffer(object):
+    def __init__(self, capacity=0):
+        self.data = None
+        self.length = 0
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.length
+
+    # Makes room for at least capacity samples.
+    def reserve(self, capacity):
+        if self.data is None:
+            self.capacity = max(self.capacity, capacity)
+        elif capacity > self.data.shape[0]:
+            self.reallocate(capacity, self.data.dtype)
+
+    # Appends samples at the end.
+    def append(self, samples):
+        self.write(self.length, samples, False)
+
+    # Adds samples to the buffer from position on.
+    def overlap_add(self, position, samples):
+        self.write(position, samples, True)
+
+    # Returns the samples of the buffer without copying them.
+    def view(self):
+        if self.data is None:
+            return np.zeros((0,))
+        return self.data[:self.length]
+
+    # Removes the first count samples and returns them as a new array. Only
+    # the remaining samples are moved to the start of the buffer.
+    def take(self, count):
+        count = min(count, self.length)
+        taken = self.view()[:count].copy()
+        if self.data is not None:
+            remaining = self.length - count
+            self.data[:remaining] = self.data[count:self.length]
+            self.length = remaining
+        return taken
+
+    def clear(self):
+        self.length = 0
+
+    def write(self, position, samples, add):
+        samples = np.asarray(samples)
+        end = position + samples.shape[0]
+        if self.data is None:
+            self.reallocate(max(end, self.capacity, MIN_BUFFER_CAPACITY), samples.dtype)
+        elif end > self.capacity:
+            self.reallocate(max(end, 2 * self.capacity),
+                            np.result_type(self.data.dtype, samples.dtype))
+        elif np.result_type(self.data.dtype, samples.dtype) != self.data.dtype:
+            # Later samples of a wider type widen the buffer, as np.concatenate.
+            self.reallocate(self.capacity, np.result_type(self.data.dtype, samples.dtype))
+
+        # Samples between the current end and position start from zero.
+        if end > self.length:
+            self.data[self.length:end if add else position] = 0
+            self.length = end
+        if add:
+            self.data[position:end] += samples
+        else:
+            self.data[position:end] = samples
+
+    def reallocate(self, capacity, dtype):
+        data = np.empty((capacity,), dtype=dtype)
+        if self.data is not None:
+            data[:self.length] = self.data[:self.length]
+        self.data = data
+        self.capacity = capacity
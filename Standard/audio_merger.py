@@ -1,25 +1,42 @@
 import numpy as np
 from scipy.io import wavfile
 from transformer import *
+from audio_buffer import *
 
 # This module is responsible for concatenating audio samples to a 
 # single output vector. The output data of this module is only returned 
 # when the final input signal is received.
 #
+# The samples are collected in an AudioBuffer (see audio_buffer.py), which
+# grows geometrically or is allocated at once for the EXPECTED_LENGTH, and
+# are sent on without a copy if they are already 16 bit samples.
+#
 ##########
 # Inputs #
 ##########
-# INPUT_DATA: A set of samples.
+# INPUT_DATA: A set of samples, or a 2-D array with one set of samples per
+#             row as sent by an AudioSplitter in block mode.
 # FINAL_INPUT: A signal sent from an audio splitter indicating that the input
 #              data received is the final set of samples.              
+# EXPECTED_LENGTH: Optional. The number of samples of the whole signal, e.g.
+#                  the NUM_SAMPLES output of an audio splitter, to allocate
+#                  the output at once.
 #
 ###########
 # Outputs #
 ###########
-# OUTPUT_DATA: A fully concatenated set of samples.
+# OUTPUT_DATA: A fully concatenated set of samples. In streaming mode, the
+#              samples received in the current cycle.
 # INPUT_CONSUMED: A signal sent when the merger is merger is ready to accept
 #                 the next data sample.
 #
+###########
+# Configs #
+###########
+# STREAMING: Optional. If True, every received set of samples is sent on
+#            immediately instead of being accumulated until the final
+#            input, e.g. to a WavWriter in streaming mode.
+#
 # Example AGDL configuration:
 #
 # AudioMerger {
@@ -36,6 +53,12 @@ from transformer import *
 # }
 
 class AudioMerger(Transformer):
+    # The expected length is delivered once by the audio splitter.
+    sticky_inputs = ("EXPECTED_LENGTH",)
+    optional_inputs = ("EXPECTED_LENGTH",)
+    # A block of frames is merged row by row.
+    block_inputs = ("INPUT_DATA",)
+
     def __init__(self):
         super(AudioMerger, self).__init__()
 
@@ -43,13 +66,18 @@ class AudioMerger(Transformer):
         # Input Keys.
         self.input_data_key = "INPUT_DATA";
         self.final_input_key = "FINAL_INPUT";
+        self.expected_length_key = "EXPECTED_LENGTH";
 
         # Output Keys.
         self.output_data_key = "OUTPUT_DATA";
         self.input_consumed_key = "INPUT_CONSUMED";
 
+        # Option Keys.
+        self.streaming_key = "STREAMING";
+
         # Local variables for computation.
-        self.data = None
+        self.data = AudioBuffer()
+        self.streaming = configs.get(self.streaming_key) == True
 
         # Pre-emptively set to none so that every time this transformer is triggered.
         self.outputs[self.output_data_key] = None;
@@ -57,19 +85,26 @@ class AudioMerger(Transformer):
         # Prepare ready inputs for graph execution
         self.ready_inputs[self.input_data_key] = False;
         self.ready_inputs[self.final_input_key] = False;
+        self.ready_inputs[self.expected_length_key] = False;
 
     def compute(self):
         input_data = self.inputs[self.input_data_key];
         final_input = self.inputs[self.final_input_key];
+        if np.ndim(input_data) == 2:
+            input_data = input_data.reshape(-1)
+
+        if self.streaming:
+            self.outputs[self.output_data_key] = input_data.astype(np.int16)
+            self.outputs[self.input_consumed_key] = None if final_input == True else True;
+            return;
         
-        if self.data is None:
-            self.data = np.copy(input_data)
-        else:
-            self.data = np.concatenate([self.data, input_data])
+        if self.inputs.get(self.expected_length_key) is not None:
+            self.data.reserve(self.inputs[self.expected_length_key])
+        self.data.append(input_data)
 
         self.outputs[self.input_consumed_key] = True;
         if (final_input == True):
             # Send data to output, and nullify input consumed key so that 
             # the audio splitter cannot be triggered any more.
-            self.outputs[self.output_data_key] = self.data.astype(np.int16)
+            self.outputs[self.output_data_key] = self.data.view().astype(np.int16, copy=False)
             self.outputs[self.input_consumed_key] = None; 
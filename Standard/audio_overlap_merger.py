@@ -1,22 +1,33 @@
 import numpy as np
 from scipy.io import wavfile
 from transformer import *
+from audio_buffer import *
 
 # This module is responsible for concatenating audio samples in 
 # an overlapping fashion. For portions of the constructed data array
 # that is being overlapped, an addition is performed.
 #
+# The samples are overlap-added in place into an AudioBuffer (see
+# audio_buffer.py), which grows geometrically or is allocated at once for
+# the EXPECTED_LENGTH.
+#
 ##########
 # Inputs #
 ##########
-# INPUT_DATA: A set of samples.
+# INPUT_DATA: A set of samples, or a 2-D array with one set of samples per
+#             row as sent by an AudioSplitter in block mode. Rows are
+#             overlapped-and-added in order.
 # FINAL_INPUT: A signal sent from an audio splitter indicating that the input
 #              data received is the final set of samples.              
+# EXPECTED_LENGTH: Optional. The number of samples of the whole signal, e.g.
+#                  the NUM_SAMPLES output of an audio splitter, to allocate
+#                  the output at once.
 #
 ###########
 # Outputs #
 ###########
-# OUTPUT_DATA: A fully concatenated set of samples.
+# OUTPUT_DATA: A fully concatenated set of samples. In streaming mode, the
+#              samples that were completed in the current cycle.
 # INPUT_CONSUMED: A signal sent when the merger is merger is ready to accept
 #                 the next data sample.
 #
@@ -25,6 +36,9 @@ from transformer import *
 ###########
 # OFFSET: Describes how far from the previous position that the next received sample
 #         will be overlapped-and-added.
+# STREAMING: Optional. If True, samples are sent on as soon as no later
+#            input can overlap them, i.e. every sample before the position
+#            of the next input. Only the unfinished overlap region is kept.
 #
 # Example AGDL configuration:
 #
@@ -46,6 +60,12 @@ from transformer import *
 # }
 
 class AudioOverlapMerger(Transformer):
+    # The expected length is delivered once by the audio splitter.
+    sticky_inputs = ("EXPECTED_LENGTH",)
+    optional_inputs = ("EXPECTED_LENGTH",)
+    # A block of frames is merged row by row.
+    block_inputs = ("INPUT_DATA",)
+
     def __init__(self):
         super(AudioOverlapMerger, self).__init__()
 
@@ -53,6 +73,7 @@ class AudioOverlapMerger(Transformer):
         # Input Keys.
         self.input_data_key = "INPUT_DATA";
         self.final_input_key = "FINAL_INPUT";
+        self.expected_length_key = "EXPECTED_LENGTH";
 
         # Output Keys.
         self.output_data_key = "OUTPUT_DATA";
@@ -60,10 +81,12 @@ class AudioOverlapMerger(Transformer):
 
         # Option Keys.
         self.offset_key = "OFFSET";
+        self.streaming_key = "STREAMING";
 
         # Local variables for computation.
         self.offset = configs[self.offset_key] 
-        self.data = None;
+        self.data = AudioBuffer();
+        self.streaming = configs.get(self.streaming_key) == True;
 
         # Mark the position of the data array that we are currently at.
         # Applies accumulation from the marked position to the end of the array.
@@ -76,26 +99,41 @@ class AudioOverlapMerger(Transformer):
         # Prepare ready inputs for graph execution
         self.ready_inputs[self.input_data_key] = False;
         self.ready_inputs[self.final_input_key] = False;
+        self.ready_inputs[self.expected_length_key] = False;
 
     def compute(self):
         input_data = self.inputs[self.input_data_key];
         final_input = self.inputs[self.final_input_key];
-        if (self.data == None):
-            self.data = np.copy(input_data);
+        # In streaming mode only the unfinished overlap is kept.
+        if self.inputs.get(self.expected_length_key) is not None and not self.streaming:
+            self.data.reserve(self.inputs[self.expected_length_key]);
+        if np.ndim(input_data) == 2:
+            for frame in input_data:
+                self.overlap_add(frame);
         else:
-            # Compute the number of elements from pos to the end of the output, L
-            overlap = self.data.shape[0] - self.pos;
+            self.overlap_add(input_data);
 
-            # Apply accumulation from pos->end with [0:L] of the input.
-            self.data[self.pos:] += input_data[:overlap];  
-            
-            # Append [L:] of the input to the output array.
-            self.data = np.concatenate([self.data, input_data[overlap:]])
-
-        self.pos += self.offset
         self.outputs[self.input_consumed_key] = True;
+        if self.streaming:
+            if (final_input == True):
+                finished = self.data.take(len(self.data));
+                self.pos = 0;
+                self.outputs[self.input_consumed_key] = None;
+            else:
+                # Samples before the position of the next input are complete.
+                finished = self.data.take(self.pos);
+                self.pos -= finished.shape[0];
+            self.outputs[self.output_data_key] = finished.astype(np.int16);
+            return;
+
         if (final_input == True):
             # Send data to output, and nullify input consumed key so that 
             # the audio splitter cannot be triggered any more.
-            self.outputs[self.output_data_key] = self.data.astype(np.int16)
+            self.outputs[self.output_data_key] = self.data.view().astype(np.int16, copy=False)
             self.outputs[self.input_consumed_key] = None;
+
+    def overlap_add(self, input_data):
+        # Accumulate onto the samples from pos on and extend the output by
+        # the rest of the input.
+        self.data.overlap_add(self.pos, input_data);
+        self.pos += self.offset
@@ -10,13 +10,18 @@ from transformer import *
 ##########
 # INPUT_DATA: A set of samples, e.g. provided from a wav file reader.
 # READY: A signal sent from an audio merger indicating that the next split
-#        can be performed
+#        can be performed. Optional: without a READY link, the next split is
+#        performed as soon as the FIFO inputs of the children have room (see
+#        FIFO_CAPACITY), until the data is exhausted.
 #
 ###########
 # Outputs #
 ###########
-# OUTPUT_DATA: A subset of the input audio samples
+# OUTPUT_DATA: A subset of the input audio samples. In block mode, a 2-D
+#              array of shape (frames, SPLIT_LENGTH) with one split per row.
 # FINISHED: A signal sent when no more splitting can be performed
+# NUM_SAMPLES: The number of input samples, e.g. for the EXPECTED_LENGTH of
+#              an audio merger.
 #
 ###########
 # Configs #
@@ -24,6 +29,16 @@ from transformer import *
 # SPLIT_LENGTH: Specifies the length of the output data after splitting
 # SPLIT_OFFSET: Specifies the offset that the next split should begin from.
 #               Use this for overlapping STFT applications.
+# FRAMES_PER_CYCLE: Optional. Enables block mode, in which up to this many
+#                   splits are emitted per graph cycle as the rows of a 2-D
+#                   array. The splits are the same as without block mode;
+#                   a split shorter than SPLIT_LENGTH is zero-padded. Larger
+#                   values trade latency for less per-cycle overhead. Every
+#                   transformer the blocks reach must list the input in its
+#                   block_inputs (e.g. FFT, IFFT, the vocoder transformers
+#                   and the mergers); GraphRunner.run() rejects the graph
+#                   otherwise, e.g. for a FIRFilter, IIRFilter, Resampler or
+#                   Vibrato.
 #
 # Example AGDL configuration:
 #
@@ -46,6 +61,10 @@ from transformer import *
 # }
 
 class AudioSplitter(Transformer):
+    # The input samples are delivered once and split over the whole run.
+    sticky_inputs = ("INPUT_DATA",)
+    optional_inputs = ("READY",)
+
     def __init__(self):
         super(AudioSplitter, self).__init__()
 
@@ -57,11 +76,13 @@ class AudioSplitter(Transformer):
         # Output Keys.
         self.output_data_key = "OUTPUT_DATA";
         self.finished_key = "FINISHED";
+        self.num_samples_key = "NUM_SAMPLES";
 
         # Option Keys.
         self.split_length_key = "SPLIT_LENGTH";
         self.split_offset_key = "SPLIT_OFFSET";
         self.debug_key = "DEBUG";
+        self.frames_per_cycle_key = "FRAMES_PER_CYCLE";
 
         # Local variables for computation.
         self.data_position = 0;
@@ -82,6 +103,12 @@ class AudioSplitter(Transformer):
         else:
             self.split_offset = self.split_length;
 
+        # Block mode is only enabled if the number of frames per cycle is given.
+        self.frames_per_cycle = None;
+        if configs.get(self.frames_per_cycle_key) is not None:
+            self.frames_per_cycle = configs[self.frames_per_cycle_key];
+            assert self.frames_per_cycle > 0;
+
         # Prepare ready inputs for graph execution
         self.ready_inputs[self.input_data_key] = False;
         self.ready_inputs[self.ready_key] = True;
@@ -90,6 +117,11 @@ class AudioSplitter(Transformer):
 
         data = self.inputs[self.input_data_key];
         num_samples = np.shape(data)[0]
+        self.outputs[self.num_samples_key] = num_samples;
+
+        if self.frames_per_cycle is not None:
+            self.compute_block(data, num_samples);
+            return;
 
         if (self.data_position + self.split_length > num_samples):
             max_splice_val = num_samples;
@@ -107,6 +139,37 @@ class AudioSplitter(Transformer):
         # Construct outputs.
         self.outputs[self.output_data_key] = output_data;
 
-    # Override reset ready inputs.
-    def resetReadyInputs(self):
-        self.ready_inputs[self.ready_key] = False;
\ No newline at end of file
+    # Emits up to frames_per_cycle splits as the rows of a 2-D array. The
+    # last split is the first one after which the next split would reach
+    # the end of the data, as in single frame mode.
+    def compute_block(self, data, num_samples):
+        positions = []
+        position = self.data_position;
+        finished = False;
+        while len(positions) < self.frames_per_cycle and not finished:
+            positions.append(position);
+            position += self.split_offset;
+            finished = position + self.split_length >= num_samples;
+
+        # Gather the rows from the span of data covered by this block.
+        start = positions[0];
+        end = positions[-1] + self.split_length;
+        span = data[start:min(end, num_samples)];
+        if span.shape[0] < end - start:
+            span = np.pad(span, (0, end - start - span.shape[0]), 'constant', constant_values=(0,0));
+        indices = (np.array(positions) - start)[:, np.newaxis] + np.arange(self.split_length);
+        output_data = span[indices];
+        if self.debug == True:
+            print "splicing " + str(len(positions)) + " frames from: " + str(start) + " to " + str(end)
+
+        self.data_position = position;
+        self.outputs[self.finished_key] = finished;
+        self.outputs[self.output_data_key] = output_data;
+
+    def blockOutputs(self):
+        if self.frames_per_cycle is not None:
+            return (self.output_data_key,);
+        return ();
+
+    def hasPendingOutput(self):
+        return self.ready_key not in self.wired_inputs and self.outputs.get(self.finished_key) == False;
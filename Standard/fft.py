@@ -1,5 +1,6 @@
 import numpy as np
 from transformer import *
+from fft_backends import *
 
 # This module is responsible for performing postprocessing after running IFFT.
 # This includes un-normalizing the input vector after IFFT.
@@ -7,20 +8,29 @@ from transformer import *
 ##########
 # Inputs #
 ##########
-# SAMPLES: The samples to apply FFT onto.
+# SAMPLES: The samples to apply FFT onto. A 2-D array of frames, as sent
+#          by an AudioSplitter in block mode, is transformed row by row.
 #
 ###########
 # Outputs #
 ###########
 # FREQUENCIES: A vector containing a complex representation of the 
 #              intensity of each frequency, where each bin i represents
-#              the frequency of i * sampling_rate / fft_length
+#              the frequency of i * sampling_rate / fft_length. In half
+#              spectrum mode only the FFT_LENGTH / 2 + 1 bins up to the
+#              Nyquist frequency are sent.
 #
 ###########
 # Configs #
 ###########
 # FFT_LENGTH: The intended length of the FFT. Usually should be
 #             a power of 2.
+# FFT_BACKEND: Optional. The FFT implementation, NUMPY (default), ITERATIVE
+#              or RECURSIVE. See fft_backends.py.
+# HALF_SPECTRUM: Optional. If True, the half spectrum of the real input
+#                samples is computed, which halves the work of this and all
+#                following spectral transformers. The IFFT of the graph must
+#                be configured with HALF_SPECTRUM as well.
 #
 # Example AGDL configuration:
 #
@@ -40,6 +50,10 @@ from transformer import *
 # }
 
 class FFT(Transformer):
+    # The transform runs along the last axis, one row per frame of a block.
+    block_inputs = ("SAMPLES",)
+    block_outputs = ("FREQUENCIES",)
+
     def __init__(self):
         super(FFT, self).__init__()
 
@@ -52,11 +66,15 @@ class FFT(Transformer):
 
         # Option Keys.
         self.fft_length_key = "FFT_LENGTH";
+        self.fft_backend_key = "FFT_BACKEND";
+        self.half_spectrum_key = "HALF_SPECTRUM";
         self.debug_key = "DEBUG";
 
         # Retrieve options
         assert configs[self.fft_length_key] != None;
         self.fft_length = configs[self.fft_length_key];
+        self.backend = get_fft_backend(configs.get(self.fft_backend_key));
+        self.half_spectrum = configs.get(self.half_spectrum_key) == True;
         self.debug = False
         if self.debug_key in configs:
             self.debug = configs[self.debug_key];
@@ -70,24 +88,16 @@ class FFT(Transformer):
         samples_shape = np.shape(samples)
 
         # The length of the sample cannot be longer than the FFT length
-        assert samples_shape[0] <= self.fft_length;
+        assert samples_shape[-1] <= self.fft_length;
 
         # Pad the sample with zeros if the number of samples is less than the fft length
-        if (self.fft_length > samples_shape[0]):
-            np.pad(samples, (0, self.fft_length - samples_shape[0]), 'constant', constant_values=(0,0));
-        
-        # Call recursive fft function and return that to output_data
-        self.outputs[self.output_data_key] = self.fft(samples);
-
-    # Implements the Cooley-Tukey Algorithm recursive algorithm for FFT.
-    def fft(self, samples):
-        N = samples.shape[0]
-        if (N == 1):
-            return samples;
-
-        even_fft = self.fft(samples[::2]);
-        odd_fft = self.fft(samples[1::2]);
-        odd_scale_factor = np.exp(-2 * 1j * np.pi * np.arange(N/2) / N);
+        if (self.fft_length > samples_shape[-1]):
+            pad_width = [(0, 0)] * (len(samples_shape) - 1) + [(0, self.fft_length - samples_shape[-1])];
+            samples = np.pad(samples, pad_width, 'constant', constant_values=0);
         
-        return np.concatenate([even_fft + odd_scale_factor * odd_fft,
-                               even_fft - odd_scale_factor * odd_fft])
\ No newline at end of file
+        # Transform along the last axis, so all frames of a block are
+        # transformed by a single call.
+        if self.half_spectrum:
+            self.outputs[self.output_data_key] = self.backend.rfft(samples);
+        else:
+            self.outputs[self.output_data_key] = self.backend.fft(samples);
\ No newline at end of file
@@ -0,0 +1,291 @@
+import numpy as np
+from abc import ABCMeta, abstractmethod
+
+# FFT implementations shared by the FFT and IFFT transformers, selected with
+# their FFT_BACKEND config:
+#
+#   ITERATIVE: Iterative radix-2 FFT for power of two lengths, mixed-radix
+#              for lengths with small prime factors and Bluestein's
+#              algorithm for lengths with a large prime factor.
+#   NUMPY:     Delegates to numpy.fft (pocketfft as of NumPy 1.17).
+#   RECURSIVE: The original recursive Cooley-Tukey implementation. Only
+#              supports power of two lengths.
+#
+# All backends transform along the last axis, so a 2-D block of frames is
+# transformed with a single call. The ITERATIVE backend precomputes a plan
+# per length (bit reversal permutation, twiddle factors, DFT matrices),
+# which is cached for the whole process and shared by every transformer.
+#
+# Besides the full spectrum, every backend computes the half spectrum of
+# real input (rfft), i.e. the n / 2 + 1 bins from 0 to the Nyquist
+# frequency, and reconstructs real samples of length n from it (irfft).
+
+# Prime factors up to this size are computed with a DFT matrix; lengths with
+# a larger prime factor use Bluestein's algorithm.
+MAX_DIRECT_DFT_LENGTH = 64
+
+fft_plans = {}
+real_fft_plans = {}
+
+# Returns the cached plan of the given length, creating it on first use.
+def get_fft_plan(n):
+    plan = fft_plans.get(n)
+    if plan is None:
+        plan = create_fft_plan(n)
+        fft_plans[n] = plan
+    return plan
+
+# Returns the cached real input plan of the given length.
+def get_real_fft_plan(n):
+    plan = real_fft_plans.get(n)
+    if plan is None:
+        plan = RealFFTPlan(n)
+        real_fft_plans[n] = plan
+    return plan
+
+def create_fft_plan(n):
+    assert n > 0
+    if n & (n - 1) == 0:
+        return Radix2Plan(n)
+    factor = smallest_odd_factor(n)
+    if factor > MAX_DIRECT_DFT_LENGTH:
+        return BluesteinPlan(n)
+    if factor == n:
+        return DFTPlan(n)
+    return MixedRadixPlan(n, factor)
+
+# Returns the smallest odd prime factor of n, which must not be a power of two.
+def smallest_odd_factor(n):
+    while n % 2 == 0:
+        n /= 2
+    factor = 3
+    while factor * factor <= n:
+        if n % factor == 0:
+            return factor
+        factor += 2
+    return n
+
+# The abstract base class of the plans of one transform length. Subclasses
+# must implement forward(); the inverse transform is derived from it.
+class FFTPlan(object):
+    __metaclass__ = ABCMeta
+
+    # Unnormalized forward transform along the last axis. Returns a new array.
+    @abstractmethod
+    def forward(self, x):
+        pass
+
+    # Unnormalized inverse transform along the last axis.
+    def inverse(self, x):
+        return np.conj(self.forward(np.conj(x)))
+
+# Iterative decimation in time: the input is permuted into bit reversed
+# order once, then log2(n) butterfly stages are applied in place, each as a
+# few array operations over all butterflies of all frames.
+class Radix2Plan(FFTPlan):
+
+    def __init__(self, n):
+        self.n = n
+        bits = n.bit_length() - 1
+        self.bit_reversal = np.zeros(n, dtype=np.intp)
+        for bit in range(bits):
+            self.bit_reversal |= ((np.arange(n) >> bit) & 1) << (bits - 1 - bit)
+
+        # (block length, twiddle factors of the first half of the block).
+        self.stages = []
+        m = 2
+        while m <= n:
+            self.stages.append((m, np.exp(-2j * np.pi * np.arange(m / 2) / m)))
+            m *= 2
+
+    def forward(self, x):
+        y = np.take(x, self.bit_reversal, axis=-1).astype(np.complex128, copy=False)
+        shape = y.shape[:-1]
+        for m, twiddles in self.stages:
+            blocks = y.reshape(shape + (self.n / m, m))
+            top = blocks[..., :m / 2]
+            bottom = blocks[..., m / 2:]
+            products = bottom * twiddles
+            np.subtract(top, products, out=bottom)
+            top += products
+        return y
+
+# Direct DFT as a matrix product, for short prime lengths.
+class DFTPlan(FFTPlan):
+
+    def __init__(self, n):
+        self.n = n
+        k = np.arange(n)
+        self.matrix = np.exp(-2j * np.pi * np.outer(k, k) / n)
+
+    def forward(self, x):
+        return np.dot(x, self.matrix)
+
+# One Cooley-Tukey step for n = p * m: the p interleaved subsequences of
+# length m are transformed together by the plan of length m, multiplied by
+# twiddle factors and combined by a DFT of length p.
+class MixedRadixPlan(FFTPlan):
+
+    def __init__(self, n, p):
+        self.n = n
+        self.p = p
+        self.m = n / p
+        self.sub_plan = get_fft_plan(self.m)
+        self.twiddles = np.exp(-2j * np.pi * np.outer(np.arange(p), np.arange(self.m)) / n)
+        self.dft = DFTPlan(p).matrix
+
+    def forward(self, x):
+        shape = x.shape[:-1]
+        subsequences = np.swapaxes(np.reshape(x, shape + (self.m, self.p)), -1, -2)
+        spectra = self.sub_plan.forward(np.ascontiguousarray(subsequences)) * self.twiddles
+        return np.matmul(self.dft, spectra).reshape(shape + (self.n,))
+
+# Expresses the DFT of any length as a convolution with a chirp, computed
+# with power of two FFTs of length at least 2n - 1.
+class BluesteinPlan(FFTPlan):
+
+    def __init__(self, n):
+        self.n = n
+        self.length = 1 << (2 * n - 2).bit_length()
+        self.sub_plan = get_fft_plan(self.length)
+        k = np.arange(n)
+        self.chirp = np.exp(-1j * np.pi * ((k * k) % (2 * n)) / n)
+        kernel = np.zeros(self.length, dtype=np.complex128)
+        kernel[:n] = np.conj(self.chirp)
+        kernel[self.length - n + 1:] = np.conj(self.chirp[1:][::-1])
+        self.kernel_spectrum = self.sub_plan.forward(kernel)
+
+    def forward(self, x):
+        shape = x.shape[:-1]
+        padded = np.zeros(shape + (self.length,), dtype=np.complex128)
+        padded[..., :self.n] = x * self.chirp
+        convolution = self.sub_plan.inverse(self.sub_plan.forward(padded) * self.kernel_spectrum)
+        return convolution[..., :self.n] * (self.chirp / self.length)
+
+# Half spectrum transforms of real input of even length n, computed with a
+# complex FFT of length n / 2: the even and odd samples are packed into the
+# real and imaginary parts, and their spectra are separated again with the
+# Hermitian symmetry of real input. Odd lengths use the complex FFT.
+class RealFFTPlan(object):
+
+    def __init__(self, n):
+        self.n = n
+        self.half_plan = get_fft_plan(n / 2) if n % 2 == 0 else None
+        self.plan = get_fft_plan(n)
+        if self.half_plan is not None:
+            k = np.arange(n / 2 + 1)
+            self.twiddles = np.exp(-2j * np.pi * k / n)
+            # Index of bin n / 2 - k, for k in 0..n / 2, of the packed spectrum
+            # (periodic with n / 2) and of the half spectrum.
+            self.mirror = (n / 2 - k) % (n / 2)
+            self.reverse = n / 2 - k
+
+    def forward(self, x):
+        if self.half_plan is None:
+            return self.plan.forward(x)[..., :self.n / 2 + 1]
+        x = np.asarray(x, dtype=np.float64)
+        packed = self.half_plan.forward(x[..., 0::2] + 1j * x[..., 1::2])
+        packed = np.concatenate([packed, packed[..., :1]], axis=-1)
+        mirrored = np.conj(packed[..., self.mirror])
+        even = 0.5 * (packed + mirrored)
+        odd = -0.5j * (packed - mirrored)
+        return even + self.twiddles * odd
+
+    def inverse(self, spectrum):
+        if self.half_plan is None:
+            return np.real(self.plan.inverse(hermitian_extend(spectrum, self.n))) / self.n
+        # As with numpy.fft.irfft, the imaginary parts of the DC and Nyquist
+        # bins, which real samples cannot have, are ignored.
+        spectrum = np.array(spectrum, dtype=np.complex128)
+        spectrum[..., 0] = np.real(spectrum[..., 0])
+        spectrum[..., -1] = np.real(spectrum[..., -1])
+        mirrored = np.conj(spectrum[..., self.reverse])
+        even = 0.5 * (spectrum + mirrored)
+        odd = 0.5 * (spectrum - mirrored) * np.conj(self.twiddles)
+        packed = (even + 1j * odd)[..., :self.n / 2]
+        z = self.half_plan.inverse(packed) / (self.n / 2)
+        samples = np.empty(z.shape[:-1] + (self.n,), dtype=np.float64)
+        samples[..., 0::2] = np.real(z)
+        samples[..., 1::2] = np.imag(z)
+        return samples
+
+# Returns the full spectrum of length n of real samples from its half
+# spectrum of n / 2 + 1 bins.
+def hermitian_extend(spectrum, n):
+    return np.concatenate([spectrum, np.conj(spectrum[..., (n - 1) / 2:0:-1])], axis=-1)
+
+class IterativeFFTBackend(object):
+
+    def fft(self, x):
+        return get_fft_plan(np.shape(x)[-1]).forward(x)
+
+    def ifft(self, x):
+        n = np.shape(x)[-1]
+        return get_fft_plan(n).inverse(x) / n
+
+    def rfft(self, x):
+        return get_real_fft_plan(np.shape(x)[-1]).forward(x)
+
+    def irfft(self, x, n):
+        return get_real_fft_plan(n).inverse(x)
+
+class NumpyFFTBackend(object):
+
+    def fft(self, x):
+        return np.fft.fft(x, axis=-1)
+
+    def ifft(self, x):
+        return np.fft.ifft(x, axis=-1)
+
+    def rfft(self, x):
+        return np.fft.rfft(x, axis=-1)
+
+    def irfft(self, x, n):
+        return np.fft.irfft(x, n, axis=-1)
+
+class RecursiveFFTBackend(object):
+
+    def fft(self, x):
+        return self.transform(np.asarray(x), -1)
+
+    def ifft(self, x):
+        x = np.asarray(x)
+        return self.transform(x, 1) / x.shape[-1]
+
+    def rfft(self, x):
+        x = np.asarray(x)
+        return self.fft(x)[..., :x.shape[-1] / 2 + 1]
+
+    def irfft(self, x, n):
+        return np.real(self.ifft(hermitian_extend(np.asarray(x), n)))
+
+    # Implements the Cooley-Tukey Algorithm recursive algorithm for FFT.
+    def transform(self, x, sign):
+        N = x.shape[-1]
+        if (N == 1):
+            return x;
+
+        even = self.transform(x[..., ::2], sign);
+        odd = self.transform(x[..., 1::2], sign);
+        odd_scale_factor = np.exp(sign * 2 * 1j * np.pi * np.arange(N/2) / N);
+
+        return np.concatenate([even + odd_scale_factor * odd,
+                               even - odd_scale_factor * odd], axis=-1)
+
+FFT_BACKENDS = {
+    'ITERATIVE': IterativeFFTBackend(),
+    'NUMPY': NumpyFFTBackend(),
+    'RECURSIVE': RecursiveFFTBackend(),
+}
+
+# The backend of every transformer without an FFT_BACKEND config. NUMPY is
+# the fastest, see Benchmarks/fft_backend_benchmark.py.
+DEFAULT_FFT_BACKEND = 'NUMPY'
+
+def get_fft_backend(name):
+    if name is None:
+        name = DEFAULT_FFT_BACKEND
+    if name not in FFT_BACKENDS:
+        raise ValueError('Unknown FFT backend ' + str(name) + ', expected one of ' +
+                         ', '.join(sorted(FFT_BACKENDS.keys())))
+    return FFT_BACKENDS[name]
@@ -0,0 +1,172 @@
+import numpy as np
+from transformer import *
+from fft_backends import *
+from filter_design import *
+from overlap_save import *
+
+# This module is responsible for splitting an input audio sample into
+# several frequency bands. Unlike a set of FIRFilter transformers, which
+# each transform the whole input, the filter bank computes one short-time
+# Fourier transform of the input and shares it between all bands: each band
+# multiplies the spectra with the frequency response of its band filter and
+# transforms them back (overlap-save FFT convolution).
+#
+# The band filters are windowed sinc filters of FILTER_LENGTH taps (see
+# filter_design.py): a LOWPASS filter for a band starting at 0 Hz, a
+# HIGHPASS filter for a band reaching the Nyquist frequency and a BANDPASS
+# filter otherwise. Bands that are adjacent and together cover all
+# frequencies add up to the input, delayed by (FILTER_LENGTH - 1) / 2
+# samples like the output of a FIRFilter.
+#
+##########
+# Inputs #
+##########
+# SAMPLES: A set of samples to split into bands.
+# SAMPLING_RATE: The sampling rate of the audio sample.
+#
+###########
+# Outputs #
+###########
+# BAND_0, BAND_1, ...: A vector of audio samples per band, in the order of
+#                      the cutoff lists, like FILTERED_SAMPLES of FIRFilter.
+#
+###########
+# Configs #
+###########
+# LOW_CUTOFF: The list of lower band edges in Hz.
+# HIGH_CUTOFF: The list of upper band edges in Hz, of the same length.
+# FILTER_LENGTH: Optional. The odd number of taps of the band filters, 255
+#                by default.
+# WINDOW: Optional. The window of the band filters, HAMMING by default (see
+#         windows.py).
+# KAISER_BETA: Optional. The beta parameter of the KAISER window.
+# FFT_BACKEND: Optional. The FFT implementation, see fft_backends.py.
+#              Defaults to DEFAULT_FFT_BACKEND.
+#
+# As in FIRFilter, the last FILTER_LENGTH - 1 input samples are kept
+# between calls to compute(), so splitting a signal block by block gives the
+# same result as splitting it at once (up to rounding).
+#
+# Example AGDL configuration:
+#
+# FilterBank {
+#   inputs
+#   {
+#       <SAMPLES> samples
+#       <SAMPLING_RATE> sampling_rate
+#   }
+#   outputs
+#   {
+#       <BAND_0> low_band
+#       <BAND_1> mid_band
+#       <BAND_2> high_band
+#   }
+#   configs
+#   {
+#       <LOW_CUTOFF> [0, 500, 2000]
+#       <HIGH_CUTOFF> [500, 2000, 8000]
+#       <FILTER_LENGTH> 255
+#   }
+# }
+
+class FilterBank(Transformer):
+    # The sampling rate is delivered once by the wav reader.
+    sticky_inputs = ("SAMPLING_RATE",)
+
+    def __init__(self):
+        super(FilterBank, self).__init__()
+
+    def initialize(self, configs):
+        # Input Keys.
+        self.samples_key = "SAMPLES";
+        self.sampling_rate_key = "SAMPLING_RATE";
+
+        # Output Keys.
+        self.band_key_prefix = "BAND_";
+
+        # Option Keys.
+        self.low_cutoff_key = "LOW_CUTOFF";
+        self.high_cutoff_key = "HIGH_CUTOFF";
+        self.filter_length_key = "FILTER_LENGTH";
+        self.window_key = "WINDOW";
+        self.kaiser_beta_key = "KAISER_BETA";
+        self.fft_backend_key = "FFT_BACKEND";
+
+        assert configs[self.low_cutoff_key] != None;
+        assert configs[self.high_cutoff_key] != None;
+        assert len(configs[self.low_cutoff_key]) == len(configs[self.high_cutoff_key]);
+        assert len(configs[self.low_cutoff_key]) > 0;
+
+        # Local variables.
+        self.low_cutoffs = list(configs[self.low_cutoff_key]);
+        self.high_cutoffs = list(configs[self.high_cutoff_key]);
+        self.num_bands = len(self.low_cutoffs);
+        self.band_keys = [self.band_key_prefix + str(band) for band in range(self.num_bands)];
+        self.filter_length = configs.get(self.filter_length_key, 255);
+        # An odd length has a center tap, so the bands can add up to the input.
+        assert self.filter_length > 0 and self.filter_length % 2 == 1;
+        self.window = configs.get(self.window_key, "HAMMING");
+        assert self.window in WINDOW_TYPES;
+        self.kaiser_beta = configs.get(self.kaiser_beta_key);
+        self.backend = get_fft_backend(configs.get(self.fft_backend_key));
+
+        # The coefficients of every band filter, shape (bands, taps).
+        self.coefficients = None;
+        # The overlap-save convolution with all band filters.
+        self.convolver = None;
+
+        # The last filter_length - 1 input samples of the previous call.
+        self.sample_history = np.zeros((self.filter_length - 1,), dtype=np.float64);
+
+        # Prepare ready inputs for graph execution
+        self.ready_inputs[self.samples_key] = False;
+        self.ready_inputs[self.sampling_rate_key] = False;
+
+    def compute(self):
+        # Load inputs.
+        samples = self.inputs[self.samples_key]
+        sampling_rate = self.inputs[self.sampling_rate_key]
+
+        if self.coefficients is None:
+            self.compute_coefficients(sampling_rate);
+
+        # Prepend the history, so the first output sample sees the last
+        # filter_length - 1 samples of the previous call.
+        extended = np.concatenate([self.sample_history, np.asarray(samples, dtype=np.float64)]);
+        self.sample_history = extended[extended.shape[0] - (self.filter_length - 1):].copy();
+
+        num_outputs = samples.shape[0];
+        if num_outputs == 0:
+            for band in range(self.num_bands):
+                self.outputs[self.band_keys[band]] = np.zeros((0,), dtype=np.int16);
+            return;
+
+        # The segments of the input are transformed once for all bands (see
+        # overlap_save.py); only the inverse transform is computed per band.
+        spectra, segment_length = self.convolver.transform(extended, num_outputs);
+        for band in range(self.num_bands):
+            filtered = self.convolver.filter(spectra, segment_length, num_outputs, band);
+            self.outputs[self.band_keys[band]] = filtered.astype(np.int16);
+
+    def compute_coefficients(self, sampling_rate):
+        nyquist = sampling_rate / 2.0;
+        self.coefficients = np.zeros((self.num_bands, self.filter_length), dtype=np.float64);
+        for band in range(self.num_bands):
+            low_cutoff = self.low_cutoffs[band];
+            high_cutoff = self.high_cutoffs[band];
+            assert 0 <= low_cutoff < high_cutoff;
+            if low_cutoff <= 0 and high_cutoff >= nyquist:
+                # The band passes everything.
+                self.coefficients[band, self.filter_length / 2] = 1.0;
+            elif low_cutoff <= 0:
+                self.coefficients[band] = design_fir_filter("LOWPASS", self.filter_length,
+                    sampling_rate, low_cutoff=high_cutoff, window=self.window,
+                    beta=self.kaiser_beta);
+            elif high_cutoff >= nyquist:
+                self.coefficients[band] = design_fir_filter("HIGHPASS", self.filter_length,
+                    sampling_rate, high_cutoff=low_cutoff, window=self.window,
+                    beta=self.kaiser_beta);
+            else:
+                self.coefficients[band] = design_fir_filter("BANDPASS", self.filter_length,
+                    sampling_rate, low_cutoff, high_cutoff, self.window, self.kaiser_beta);
+        self.convolver = OverlapSave(self.coefficients, self.backend);
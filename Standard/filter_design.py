@@ -0,0 +1,180 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from windows import *
+
+# Windowed sinc design of linear phase FIR filters, shared by the FIRFilter
+# transformers of a process.
+#
+# The ideal (sinc) impulse response of the LOWPASS, HIGHPASS or BANDPASS
+# filter is computed for all taps at once and multiplied by a window (see
+# windows.py); a RECTANGULAR window keeps the truncated ideal response.
+#
+# Designs are memoized in a process wide LRU cache keyed by all design
+# parameters, so a graph with many identical filters designs each filter
+# once. The returned coefficients are shared between callers and therefore
+# read-only.
+#
+# Polyphase kernels for interpolating a signal at fractional positions are
+# Kaiser windowed sinc filters, one per fractional offset, and are cached
+# in the same way.
+#
+# IIR filters are built from second order sections (biquads) designed with
+# the formulas of the Audio EQ Cookbook by Robert Bristow-Johnson.
+
+FILTER_TYPES = ('LOWPASS', 'HIGHPASS', 'BANDPASS')
+BIQUAD_TYPES = ('LOWPASS', 'HIGHPASS', 'BANDPASS', 'LOWSHELF', 'HIGHSHELF', 'PEAKING')
+
+# The quality factor of a Butterworth biquad, i.e. a maximally flat passband.
+BUTTERWORTH_Q = 1.0 / np.sqrt(2.0)
+
+# Maximum number of designs kept in the cache.
+FILTER_CACHE_SIZE = 128
+
+filter_cache = OrderedDict()
+filter_cache_lock = threading.Lock()
+
+# Returns the coefficients of a filter of the given type and length. Cutoff
+# frequencies are in Hz: LOWPASS uses low_cutoff, HIGHPASS uses high_cutoff
+# and BANDPASS passes the band from low_cutoff to high_cutoff.
+def design_fir_filter(filter_type, length, sampling_rate, low_cutoff=None, high_cutoff=None,
+                      window='RECTANGULAR', beta=None):
+    # Drop the parameters that do not affect the design from the key.
+    if filter_type == 'LOWPASS':
+        high_cutoff = None
+    elif filter_type == 'HIGHPASS':
+        low_cutoff = None
+    if window != 'KAISER':
+        beta = None
+    key = (filter_type, length, low_cutoff, high_cutoff, sampling_rate, window, beta)
+
+    with filter_cache_lock:
+        coefficients = filter_cache.pop(key, None)
+        if coefficients is None:
+            coefficients = compute_fir_coefficients(filter_type, length, sampling_rate,
+                                                    low_cutoff, high_cutoff, window, beta)
+            coefficients.flags.writeable = False
+            if len(filter_cache) >= FILTER_CACHE_SIZE:
+                filter_cache.popitem(last=False)
+        # The most recently used design is kept at the end.
+        filter_cache[key] = coefficients
+    return coefficients
+
+def compute_fir_coefficients(filter_type, length, sampling_rate, low_cutoff, high_cutoff,
+                             window, beta):
+    if filter_type == 'LOWPASS':
+        coefficients = sinc_lowpass(length, 2.0 * np.pi * float(low_cutoff) / sampling_rate)
+    elif filter_type == 'HIGHPASS':
+        coefficients = -sinc_lowpass(length, 2.0 * np.pi * float(high_cutoff) / sampling_rate)
+        coefficients[tap_offsets(length) == 0] += 1.0
+    elif filter_type == 'BANDPASS':
+        coefficients = (sinc_lowpass(length, 2.0 * np.pi * float(high_cutoff) / sampling_rate) -
+                        sinc_lowpass(length, 2.0 * np.pi * float(low_cutoff) / sampling_rate))
+    else:
+        raise ValueError('Unknown filter type ' + str(filter_type) + ', expected one of ' +
+                         ', '.join(FILTER_TYPES))
+
+    if window != 'RECTANGULAR':
+        coefficients *= create_window(window, length, beta)
+    return coefficients
+
+# Offsets of the taps from the center of the filter.
+def tap_offsets(length):
+    return np.arange(length) - (length - 1) / 2.0
+
+# Ideal lowpass impulse response sin(n * alpha) / (n * pi) for a cutoff of
+# alpha radians per sample, with the limit alpha / pi at the center tap.
+def sinc_lowpass(length, alpha):
+    n = tap_offsets(length)
+    center = n == 0
+    n[center] = 1.0
+    coefficients = np.sin(n * alpha) / (n * np.pi)
+    coefficients[center] = alpha / np.pi
+    return coefficients
+
+# Returns the kernels for interpolating at the fractional offsets
+# 0, 1 / num_phases, ..., (num_phases - 1) / num_phases after a sample, shape
+# (num_phases, 2 * half_length). Tap j of a kernel weights the sample
+# j - half_length + 1 positions after the one the offset is counted from.
+# The cutoff is relative to the Nyquist frequency of the signal; every
+# kernel is normalized to a gain of one at DC.
+def design_polyphase_kernels(num_phases, half_length, cutoff=1.0, beta=DEFAULT_KAISER_BETA):
+    key = ('POLYPHASE', num_phases, half_length, cutoff, beta)
+
+    with filter_cache_lock:
+        kernels = filter_cache.pop(key, None)
+        if kernels is None:
+            kernels = compute_polyphase_kernels(num_phases, half_length, cutoff, beta)
+            kernels.flags.writeable = False
+            if len(filter_cache) >= FILTER_CACHE_SIZE:
+                filter_cache.popitem(last=False)
+        filter_cache[key] = kernels
+    return kernels
+
+def compute_polyphase_kernels(num_phases, half_length, cutoff, beta):
+    # Distance of every tap from the interpolated position.
+    offsets = np.arange(num_phases) / float(num_phases)
+    distances = np.arange(1 - half_length, half_length + 1)[np.newaxis, :] - offsets[:, np.newaxis]
+    kernels = cutoff * np.sinc(cutoff * distances)
+    # The Kaiser window centered on the interpolated position.
+    kernels *= np.i0(beta * np.sqrt(1.0 - (distances / float(half_length)) ** 2)) / np.i0(beta)
+    return kernels / kernels.sum(axis=1)[:, np.newaxis]
+
+# Returns a second order section [b0, b1, b2, 1, a1, a2] of the given type.
+# LOWPASS and LOWSHELF use low_cutoff, HIGHPASS and HIGHSHELF use
+# high_cutoff and q. BANDPASS and PEAKING act on the band from low_cutoff to
+# high_cutoff, i.e. around their geometric mean with the matching q. The
+# shelves and PEAKING filters amplify by gain_db.
+def design_biquad(filter_type, sampling_rate, low_cutoff=None, high_cutoff=None, q=None,
+                  gain_db=0.0):
+    if q is None:
+        q = BUTTERWORTH_Q
+    if filter_type in ('LOWPASS', 'LOWSHELF'):
+        frequency = float(low_cutoff)
+    elif filter_type in ('HIGHPASS', 'HIGHSHELF'):
+        frequency = float(high_cutoff)
+    elif filter_type in ('BANDPASS', 'PEAKING'):
+        assert 0 < low_cutoff < high_cutoff
+        frequency = np.sqrt(float(low_cutoff) * high_cutoff)
+        q = frequency / (high_cutoff - low_cutoff)
+    else:
+        raise ValueError('Unknown biquad type ' + str(filter_type) + ', expected one of ' +
+                         ', '.join(BIQUAD_TYPES))
+    assert 0 < frequency < sampling_rate / 2.0
+
+    w0 = 2.0 * np.pi * frequency / sampling_rate
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2.0 * q)
+    amplitude = 10.0 ** (gain_db / 40.0)
+    shelf = 2.0 * np.sqrt(amplitude) * alpha
+
+    if filter_type == 'LOWPASS':
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif filter_type == 'HIGHPASS':
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif filter_type == 'BANDPASS':
+        b = [alpha, 0.0, -alpha]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif filter_type == 'PEAKING':
+        b = [1 + alpha * amplitude, -2 * cos_w0, 1 - alpha * amplitude]
+        a = [1 + alpha / amplitude, -2 * cos_w0, 1 - alpha / amplitude]
+    elif filter_type == 'LOWSHELF':
+        A = amplitude
+        b = [A * ((A + 1) - (A - 1) * cos_w0 + shelf),
+             2 * A * ((A - 1) - (A + 1) * cos_w0),
+             A * ((A + 1) - (A - 1) * cos_w0 - shelf)]
+        a = [(A + 1) + (A - 1) * cos_w0 + shelf,
+             -2 * ((A - 1) + (A + 1) * cos_w0),
+             (A + 1) + (A - 1) * cos_w0 - shelf]
+    else:
+        A = amplitude
+        b = [A * ((A + 1) + (A - 1) * cos_w0 + shelf),
+             -2 * A * ((A - 1) + (A + 1) * cos_w0),
+             A * ((A + 1) + (A - 1) * cos_w0 - shelf)]
+        a = [(A + 1) - (A - 1) * cos_w0 + shelf,
+             2 * ((A - 1) - (A + 1) * cos_w0),
+             (A + 1) - (A - 1) * cos_w0 - shelf]
+
+    return np.array(b + a, dtype=np.float64) / a[0]
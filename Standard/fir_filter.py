@@ -1,5 +1,8 @@
 import numpy as np
 from transformer import *
+from fft_backends import *
+from filter_design import *
+from overlap_save import *
 
 # This module is responsible for applying an FIR filter on an input
 # audio sample. The following module can replicate a Lowpass, Highpass
@@ -23,6 +26,18 @@ from transformer import *
 # FILTER_LENGTH: Specifies the length of the filter.
 # LOW_CUTOFF: Specifies the low cutoff frequency for lowpass and bandpass filters.
 # HIGH_cUTOFF: Specifies the high cutoff frequency for highpass and bandpass filter.s
+# CONVOLUTION: Optional. DIRECT convolves in the time domain, FFT uses
+#              overlap-save FFT convolution. By default (AUTO) filters longer
+#              than DIRECT_CONVOLUTION_MAX_LENGTH taps use FFT.
+# FFT_BACKEND: Optional. The FFT implementation used for FFT convolution, see
+#              fft_backends.py. Defaults to DEFAULT_FFT_BACKEND.
+# WINDOW: Optional. The window applied to the sinc coefficients, RECTANGULAR
+#         (default), HANN, HAMMING, BLACKMAN or KAISER (see windows.py).
+# KAISER_BETA: Optional. The beta parameter of the KAISER window.
+#
+# The last FILTER_LENGTH - 1 input samples are kept between calls to
+# compute(), so filtering a signal block by block gives the same result as
+# filtering it at once (up to rounding with FFT convolution).
 #
 # Example AGDL configuration:
 #
@@ -45,7 +60,13 @@ from transformer import *
 #   }
 # }
 
+# Filters up to this length are applied by direct convolution in AUTO mode.
+DIRECT_CONVOLUTION_MAX_LENGTH = 256
+
 class FIRFilter(Transformer):
+    # The sampling rate is delivered once by the wav reader.
+    sticky_inputs = ("SAMPLING_RATE",)
+
     def __init__(self):
         super(FIRFilter, self).__init__()
 
@@ -62,6 +83,10 @@ class FIRFilter(Transformer):
         self.filter_length_key = "FILTER_LENGTH";
         self.low_cutoff_key = "LOW_CUTOFF";
         self.high_cutoff_key = "HIGH_CUTOFF";
+        self.convolution_key = "CONVOLUTION";
+        self.fft_backend_key = "FFT_BACKEND";
+        self.window_key = "WINDOW";
+        self.kaiser_beta_key = "KAISER_BETA";
 
         assert configs[self.filter_type_key] != None;
         assert configs[self.filter_length_key] != None;
@@ -69,12 +94,30 @@ class FIRFilter(Transformer):
 
         # Local variables.
         self.coefficients = None;
-        self.sample_history = [];
         self.filter_type = configs[self.filter_type_key];
         self.filter_length = configs[self.filter_length_key];
         self.low_cutoff = None;
         self.high_cutoff = None;
 
+        # The last filter_length - 1 input samples of the previous call.
+        self.sample_history = np.zeros((self.filter_length - 1,), dtype=np.float64);
+
+        self.convolution = configs.get(self.convolution_key, "AUTO");
+        if self.convolution == "AUTO":
+            if self.filter_length > DIRECT_CONVOLUTION_MAX_LENGTH:
+                self.convolution = "FFT";
+            else:
+                self.convolution = "DIRECT";
+        assert self.convolution in ("DIRECT", "FFT");
+        self.backend = get_fft_backend(configs.get(self.fft_backend_key));
+
+        self.window = configs.get(self.window_key, "RECTANGULAR");
+        assert self.window in WINDOW_TYPES;
+        self.kaiser_beta = configs.get(self.kaiser_beta_key);
+
+        # The overlap-save convolution, see overlap_save.py.
+        self.convolver = None;
+
         if self.filter_type == "LOWPASS":
             assert configs[self.low_cutoff_key] != None;
             self.low_cutoff = configs[self.low_cutoff_key];
@@ -97,68 +140,26 @@ class FIRFilter(Transformer):
         samples = self.inputs[self.samples_key]
         sampling_rate = self.inputs[self.sampling_rate_key]
 
-        # Prepare outputs.
-        filtered_samples = np.zeros((samples.shape[0],), dtype=np.int16)
-
-        if self.coefficients == None:
+        if self.coefficients is None:
             self.compute_coefficients(sampling_rate);
 
-        for i in range(0, samples.shape[0]):
-            sample = samples[i]
-            result = 0.0;
-            self.sample_history.insert(0, sample)
-            if len(self.sample_history) > self.filter_length:
-                self.sample_history = self.sample_history[:-1]
-
-            # Apply MAC operation with coefficients and samples.
-            for j in range(0, len(self.sample_history)):
-                result += self.sample_history[j] * self.coefficients[j]
-            
-            filtered_samples[i] = result;
-        
-        self.outputs[self.filtered_samples_key] = filtered_samples;
+        # Prepend the history, so the first output sample sees the last
+        # filter_length - 1 samples of the previous call.
+        extended = np.concatenate([self.sample_history, np.asarray(samples, dtype=np.float64)]);
+        self.sample_history = extended[extended.shape[0] - (self.filter_length - 1):].copy();
 
-    def compute_coefficients(self, sampling_rate):
-        # Initialize our coefficients to an array of 0s.
-        self.coefficients = np.zeros((self.filter_length,), dtype=np.float)
+        if samples.shape[0] == 0:
+            result = np.zeros((0,));
+        elif self.convolution == "FFT":
+            result = self.convolver.convolve(extended, samples.shape[0]);
+        else:
+            result = np.convolve(extended, self.coefficients, mode='valid');
 
-        # Compute coefficients based on the type of FIR filter.
-        if self.filter_type == "LOWPASS":
-            self.compute_lowpass_coefficients(sampling_rate)
-        elif self.filter_type == "HIGHPASS":
-            self.compute_highpass_coefficients(sampling_rate)
-        elif self.filter_type == "BANDPASS":
-            self.compute_bandpass_coefficients(sampling_rate)
-        
-    def compute_lowpass_coefficients(self, sampling_rate):
-        alpha = 2 * np.pi * float(self.low_cutoff) / sampling_rate;
-        for n in range(0, self.filter_length):
-            nn = n - (float(self.filter_length - 1) / 2.0);
-            if (nn == 0):
-                self.coefficients[n] = alpha / np.pi; 
-            else:
-                self.coefficients[n] = np.sin(nn * alpha) / (nn * np.pi)
-
-    def compute_highpass_coefficients(self, sampling_rate):
-        alpha = 2.0 * np.pi * float(self.high_cutoff) / sampling_rate;
-        for n in range(0, self.filter_length):
-            nn = n - (float(self.filter_length - 1) / 2.0);
-            if (nn == 0):
-                self.coefficients[n] = 1.0 - alpha / np.pi; 
-            else:
-                self.coefficients[n] = -1 * np.sin(nn * alpha) / (nn * np.pi)
-        
-    def compute_bandpass_coefficients(self, sampling_rate):
-        alpha = 2.0 * np.pi * float(self.low_cutoff) / sampling_rate;
-        beta = 2.0 * np.pi * float(self.high_cutoff) / sampling_rate;
-        for n in range(0, self.filter_length):
-            nn = n - (float(self.filter_length - 1) / 2.0);
-            if (nn == 0):
-                self.coefficients[n] = (beta - alpha) / np.pi; 
-            else:
-                self.coefficients[n] = (np.sin(nn * beta) - np.sin(nn * alpha)) / (nn * np.pi)
-        
+        self.outputs[self.filtered_samples_key] = result.astype(np.int16);
 
-    # Override reset ready inputs.
-    def resetReadyInputs(self):
-        self.ready_inputs[self.samples_key] = False;
\ No newline at end of file
+    def compute_coefficients(self, sampling_rate):
+        # Designs are cached, so identical filters share their coefficients.
+        self.coefficients = design_fir_filter(self.filter_type, self.filter_length, sampling_rate,
+                                              self.low_cutoff, self.high_cutoff,
+                                              self.window, self.kaiser_beta)
+        self.convolver = OverlapSave(self.coefficients, self.backend);
@@ -1,12 +1,16 @@
 import numpy as np
 from transformer import *
+from fft_backends import *
 
 # This module is responsible for performing IFFT.
 #
 ##########
 # Inputs #
 ##########
-# FREQUENCIES: Vector of complex values representing frequency intensities.
+# FREQUENCIES: Vector of complex values representing frequency intensities,
+#              or only the IFFT_LENGTH / 2 + 1 bins up to the Nyquist
+#              frequency in half spectrum mode.
+#              A 2-D array of frames is transformed row by row.
 #
 ###########
 # Outputs #
@@ -19,6 +23,10 @@ from transformer import *
 # IFFT_LENGTH: The intended length of the IFFT. It is expected that this is the same
 #              as the length of the FFT module that converted to the frequency domain
 #              initially.
+# FFT_BACKEND: Optional. The FFT implementation, NUMPY (default), ITERATIVE
+#              or RECURSIVE. See fft_backends.py.
+# HALF_SPECTRUM: Optional. If True, real samples are reconstructed from a
+#                half spectrum, as sent by an FFT in half spectrum mode.
 #
 # Example AGDL configuration:
 #
@@ -38,6 +46,10 @@ from transformer import *
 # }
 
 class IFFT(Transformer):
+    # The inverse transform runs along the last axis of a block.
+    block_inputs = ("FREQUENCIES",)
+    block_outputs = ("SAMPLES",)
+
     def __init__(self):
         super(IFFT, self).__init__()
 
@@ -50,11 +62,15 @@ class IFFT(Transformer):
 
         # Option Keys.
         self.ifft_length_key = "IFFT_LENGTH";
+        self.fft_backend_key = "FFT_BACKEND";
+        self.half_spectrum_key = "HALF_SPECTRUM";
         self.debug_key = "DEBUG";
 
         # Retrieve options
         assert configs[self.ifft_length_key] != None;
         self.ifft_length = configs[self.ifft_length_key];
+        self.backend = get_fft_backend(configs.get(self.fft_backend_key));
+        self.half_spectrum = configs.get(self.half_spectrum_key) == True;
         self.debug = False
         if self.debug_key in configs:
             self.debug = configs[self.debug_key];
@@ -67,26 +83,19 @@ class IFFT(Transformer):
         frequencies = self.inputs[self.input_data_key]
         frequencies_shape = np.shape(frequencies)
 
+        if self.half_spectrum:
+            assert frequencies_shape[-1] == self.ifft_length / 2 + 1;
+            self.outputs[self.output_data_key] = self.backend.irfft(frequencies, self.ifft_length);
+            return;
+
         # The length of the frequencies cannot be longer than the FFT length
-        assert frequencies_shape[0] <= self.ifft_length;
+        assert frequencies_shape[-1] <= self.ifft_length;
 
         # Pad the frequencies with zeros if the number of frequencies is less than the fft length
-        if (self.ifft_length > frequencies_shape[0]):
-            np.pad(frequencies_shape, (0, self.ifft_length - frequencies_shape[0]), 'constant', constant_values=(0,0));
-        
-        # Call recursive ifft function and return that to output_data
-        self.outputs[self.output_data_key] = np.real(self.ifft(frequencies) / frequencies_shape[0]);
-
-
-    # Implements the Cooley-Tukey Algorithm recursive algorithm for FFT.
-    def ifft(self, frequencies):
-        N = frequencies.shape[0]
-        if (N == 1):
-            return frequencies;
-
-        even_ifft = self.ifft(frequencies[::2]);
-        odd_ifft = self.ifft(frequencies[1::2]);
-        odd_scale_factor = np.exp(2 * 1j * np.pi * np.arange(N/2) / N);
+        if (self.ifft_length > frequencies_shape[-1]):
+            pad_width = [(0, 0)] * (len(frequencies_shape) - 1) + [(0, self.ifft_length - frequencies_shape[-1])];
+            frequencies = np.pad(frequencies, pad_width, 'constant', constant_values=0);
         
-        return np.concatenate([(even_ifft + odd_scale_factor * odd_ifft),
-                               (even_ifft - odd_scale_factor * odd_ifft)])
\ No newline at end of file
+        # Transform along the last axis, so all frames of a block are
+        # transformed by a single call.
+        self.outputs[self.output_data_key] = np.real(self.backend.ifft(frequencies));
\ No newline at end of file
@@ -0,0 +1,151 @@
+import numpy as np
+from scipy import signal
+from transformer import *
+from filter_design import *
+
+# This module is responsible for applying an IIR filter, a cascade of
+# second order sections (biquads), on an input audio sample. A few biquads
+# reach the attenuation of a long FIRFilter at a fraction of the cost, but
+# do not have linear phase.
+#
+##########
+# Inputs #
+##########
+# SAMPLES: A set of samples to apply filtering on.
+# SAMPLING_RATE: The sampling rate of the audio sample.
+#
+###########
+# Outputs #
+###########
+# FILTERED_SAMPLES: A vector of audio samples after filtering is applied.
+#
+###########
+# Configs #
+###########
+# FILTER_TYPE: The type of the biquads, LOWPASS, HIGHPASS, BANDPASS,
+#              LOWSHELF, HIGHSHELF or PEAKING.
+# LOW_CUTOFF: The cutoff frequency of LOWPASS and LOWSHELF filters and the
+#             lower edge of the band of BANDPASS and PEAKING filters.
+# HIGH_CUTOFF: The cutoff frequency of HIGHPASS and HIGHSHELF filters and the
+#              upper edge of the band of BANDPASS and PEAKING filters.
+# Q: Optional. The quality factor of LOWPASS, HIGHPASS and shelf filters,
+#    0.707 (Butterworth) by default.
+# GAIN_DB: Optional. The gain of the shelf and PEAKING filters in dB.
+# NUM_SECTIONS: Optional. The number of identical biquads to cascade, 1 by
+#               default. Each section adds 12 dB per octave of attenuation.
+# SECTIONS: Optional. Explicit second order sections, a flat list of the
+#           coefficients b0, b1, b2, a0, a1, a2 of one section after the
+#           other, e.g. [0.2, 0.4, 0.2, 1, -0.6, 0.4], which replaces the
+#           design from the configs above.
+#
+# The state of every section is kept between calls to compute(), so
+# filtering a signal block by block gives the same result as filtering it
+# at once.
+#
+# Example AGDL configuration:
+#
+# IIRFilter {
+#   inputs
+#   {
+#       <SAMPLES> samples
+#       <SAMPLING_RATE> sampling_rate
+#   }
+#   outputs
+#   {
+#       <FILTERED_SAMPLES> filtered_samples
+#   }
+#   configs
+#   {
+#       <FILTER_TYPE> LOWSHELF
+#       <LOW_CUTOFF> 200
+#       <GAIN_DB> -6.0
+#   }
+# }
+
+# Returns the SECTIONS config as an array with one section per row. The
+# AGDL parser only reads flat lists, so the coefficients of all sections
+# are given one after the other.
+def parse_sections(sections):
+    sections = np.array(sections, dtype=np.float64);
+    if sections.ndim > 2 or sections.size == 0 or sections.size % 6 != 0 or \
+            (sections.ndim == 2 and sections.shape[1] != 6):
+        raise ValueError('SECTIONS must hold the 6 coefficients b0, b1, b2, a0, a1, a2 '
+                         'of every section, got shape %s' % (sections.shape,));
+    sections = sections.reshape(-1, 6);
+    if np.any(sections[:, 3] == 0):
+        raise ValueError('The a0 coefficient of every section in SECTIONS must be nonzero');
+    return sections;
+
+class IIRFilter(Transformer):
+    # The sampling rate is delivered once by the wav reader.
+    sticky_inputs = ("SAMPLING_RATE",)
+
+    def __init__(self):
+        super(IIRFilter, self).__init__()
+
+    def initialize(self, configs):
+        # Input Keys.
+        self.samples_key = "SAMPLES";
+        self.sampling_rate_key = "SAMPLING_RATE";
+
+        # Output Keys.
+        self.filtered_samples_key = "FILTERED_SAMPLES";
+
+        # Option Keys.
+        self.filter_type_key = "FILTER_TYPE";
+        self.low_cutoff_key = "LOW_CUTOFF";
+        self.high_cutoff_key = "HIGH_CUTOFF";
+        self.q_key = "Q";
+        self.gain_db_key = "GAIN_DB";
+        self.num_sections_key = "NUM_SECTIONS";
+        self.sections_key = "SECTIONS";
+
+        # Local variables.
+        self.sections = None;
+        self.state = None;
+        self.explicit_sections = configs.get(self.sections_key);
+        self.filter_type = configs.get(self.filter_type_key);
+        self.low_cutoff = configs.get(self.low_cutoff_key);
+        self.high_cutoff = configs.get(self.high_cutoff_key);
+        self.q = configs.get(self.q_key);
+        self.gain_db = configs.get(self.gain_db_key, 0.0);
+        self.num_sections = configs.get(self.num_sections_key, 1);
+
+        if self.explicit_sections is not None:
+            self.explicit_sections = parse_sections(self.explicit_sections);
+        else:
+            assert self.filter_type in BIQUAD_TYPES;
+            assert self.num_sections > 0;
+            if self.filter_type in ("LOWPASS", "LOWSHELF", "BANDPASS", "PEAKING"):
+                assert self.low_cutoff != None;
+            if self.filter_type in ("HIGHPASS", "HIGHSHELF", "BANDPASS", "PEAKING"):
+                assert self.high_cutoff != None;
+
+        # Prepare ready inputs for graph execution
+        self.ready_inputs[self.samples_key] = False;
+        self.ready_inputs[self.sampling_rate_key] = False;
+
+    def compute(self):
+        # Load inputs.
+        samples = self.inputs[self.samples_key]
+        sampling_rate = self.inputs[self.sampling_rate_key]
+
+        if self.sections is None:
+            self.compute_sections(sampling_rate);
+
+        filtered, self.state = signal.sosfilt(self.sections, np.asarray(samples, dtype=np.float64),
+                                              zi=self.state);
+
+        self.outputs[self.filtered_samples_key] = filtered.astype(np.int16);
+
+    def compute_sections(self, sampling_rate):
+        if self.explicit_sections is not None:
+            # Normalize every section by its a0.
+            self.sections = self.explicit_sections / self.explicit_sections[:, 3:4];
+        else:
+            section = design_biquad(self.filter_type, sampling_rate, self.low_cutoff,
+                                    self.high_cutoff, self.q, self.gain_db);
+            self.sections = np.tile(section, (self.num_sections, 1));
+
+        # The filter starts at rest, i.e. with zero state in every section.
+        self.state = np.zeros((self.sections.shape[0], 2), dtype=np.float64);
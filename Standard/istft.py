@@ -0,0 +1,222 @@
+import numpy as np
+from transformer import *
+from fft_backends import *
+from windows import *
+
+# This module is responsible for the inverse short-time Fourier transform of
+# a 2-D array of spectra, as sent by an STFT, in a single graph cycle per
+# input. It does the work of the chain
+#
+#   IFFT -> VocoderResynthesizer -> AudioOverlapMerger
+#
+# in one transformer, and adds the normalization by the window sum that
+# the chain lacks. All frames of an input are transformed by one batched
+# inverse FFT call, shifted back and windowed in one pass (see windows.py)
+# and overlap-added into a preallocated buffer: with the frames cut into
+# blocks of HOP samples, block j of every frame is added to the output by
+# one vectorized addition, i.e. FFT_LENGTH / HOP additions per input.
+#
+# With NORMALIZE, the output is divided by the overlap-added product of the
+# analysis and synthesis windows, so an STFT followed by an ISTFT with the
+# same configs reconstructs the signal for any window and overlap. Samples
+# where the window sum vanishes are left as they are.
+#
+# The second half of the last frame overlaps the next input, so the
+# unfinished overlap is kept between calls to compute(). Without STREAMING
+# the completed samples are collected and sent once, after the final input,
+# like the AudioOverlapMerger; with STREAMING they are sent on every call.
+#
+##########
+# Inputs #
+##########
+# FREQUENCIES: A 2-D array with the spectrum of one frame per row, or the
+#              spectrum of a single frame.
+# FINAL_INPUT: Optional. Whether the spectra are the last ones of the
+#              signal, e.g. the FINISHED output of an STFT. If not linked,
+#              every input holds all frames of a signal.
+#
+###########
+# Outputs #
+###########
+# OUTPUT_DATA: The 16 bit samples of the whole signal after the final input,
+#              or in streaming mode the samples completed in this cycle.
+# INPUT_CONSUMED: A signal sent when the ISTFT is ready to accept the next
+#                 spectra, as by the AudioOverlapMerger.
+#
+###########
+# Configs #
+###########
+# FFT_LENGTH: The length of the frames and of the inverse FFT.
+# HOP: The offset in samples between consecutive frames.
+# WINDOW: Optional. The periodic synthesis window, HANN by default as in the
+#         VocoderResynthesizer (see windows.py).
+# ANALYSIS_WINDOW: Optional. The periodic window the spectra were computed
+#                  with, for NORMALIZE. Defaults to the WINDOW.
+# FFT_SHIFT: Optional. Whether the halves of the frames are swapped back
+#            after the inverse FFT, as in the VocoderResynthesizer. True by
+#            default.
+# HALF_SPECTRUM: Optional. If True, the spectra hold the FFT_LENGTH / 2 + 1
+#                bins up to the Nyquist frequency, as from the FFT.
+# FFT_BACKEND: Optional. The FFT implementation, see fft_backends.py.
+#              Defaults to DEFAULT_FFT_BACKEND.
+# NORMALIZE: Optional. Whether the output is divided by the window sum, True
+#            by default.
+# STREAMING: Optional. If True, samples are sent on as soon as no later frame
+#            can overlap them.
+#
+# Example AGDL configuration:
+#
+# ISTFT {
+#   inputs
+#   {
+#       <FREQUENCIES> frequencies
+#       <FINAL_INPUT> finished
+#   }
+#   outputs
+#   {
+#       <OUTPUT_DATA> output_data
+#   }
+#   configs
+#   {
+#       <FFT_LENGTH> 1024
+#       <HOP> 256
+#       <HALF_SPECTRUM> True
+#   }
+# }
+
+class ISTFT(Transformer):
+    optional_inputs = ("FINAL_INPUT",)
+
+    def __init__(self):
+        super(ISTFT, self).__init__()
+
+    def initialize(self, configs):
+        # Input Keys.
+        self.frequencies_key = "FREQUENCIES";
+        self.final_input_key = "FINAL_INPUT";
+
+        # Output Keys.
+        self.output_data_key = "OUTPUT_DATA";
+        self.input_consumed_key = "INPUT_CONSUMED";
+
+        # Option Keys.
+        self.fft_length_key = "FFT_LENGTH";
+        self.hop_key = "HOP";
+        self.window_key = "WINDOW";
+        self.analysis_window_key = "ANALYSIS_WINDOW";
+        self.fft_shift_key = "FFT_SHIFT";
+        self.half_spectrum_key = "HALF_SPECTRUM";
+        self.fft_backend_key = "FFT_BACKEND";
+        self.normalize_key = "NORMALIZE";
+        self.streaming_key = "STREAMING";
+
+        # Retrieve options
+        assert configs[self.fft_length_key] != None;
+        assert configs[self.hop_key] != None;
+        self.fft_length = configs[self.fft_length_key];
+        self.hop = configs[self.hop_key];
+        assert 0 < self.hop <= self.fft_length;
+        self.window = configs.get(self.window_key, "HANN");
+        assert self.window in PERIODIC_WINDOW_TYPES;
+        self.analysis_window = configs.get(self.analysis_window_key, self.window);
+        assert self.analysis_window in PERIODIC_WINDOW_TYPES;
+        self.fft_shift = configs.get(self.fft_shift_key, True) == True;
+        if self.fft_shift:
+            assert self.fft_length % 2 == 0;
+        self.half_spectrum = configs.get(self.half_spectrum_key) == True;
+        self.backend = get_fft_backend(configs.get(self.fft_backend_key));
+        self.normalize = configs.get(self.normalize_key, True) == True;
+        self.streaming = configs.get(self.streaming_key) == True;
+
+        # The frames are overlap-added in blocks of hop samples.
+        self.blocks_per_frame = -(-self.fft_length // self.hop);
+
+        # The overlap of the last frame with the next input, and the window
+        # sum over it.
+        self.overlap = np.zeros((self.fft_length - self.hop,), dtype=np.float64);
+        self.overlap_weights = np.zeros((self.fft_length - self.hop,), dtype=np.float64);
+        # The completed samples, collected until the final input.
+        self.completed = [];
+
+        # Sent on the final input only.
+        self.outputs[self.output_data_key] = None;
+
+        # Prepare ready inputs for graph execution
+        self.ready_inputs[self.frequencies_key] = False;
+        self.ready_inputs[self.final_input_key] = False;
+
+    def compute(self):
+        frequencies = np.asarray(self.inputs[self.frequencies_key]);
+        final_input = self.inputs.get(self.final_input_key);
+        if self.final_input_key not in self.wired_inputs:
+            final_input = True;
+        spectra = frequencies.reshape(-1, frequencies.shape[-1]);
+
+        if spectra.shape[0] == 0:
+            frames = np.zeros((0, self.fft_length), dtype=np.float64);
+        elif self.half_spectrum:
+            assert spectra.shape[-1] == self.fft_length / 2 + 1;
+            frames = self.backend.irfft(spectra, self.fft_length);
+        else:
+            assert spectra.shape[-1] == self.fft_length;
+            frames = np.real(self.backend.ifft(spectra));
+
+        window = get_periodic_window(self.window, self.fft_length);
+        if self.fft_shift:
+            frames = window_fftshift(frames, window, window_first=False, in_place=True);
+        else:
+            frames *= window;
+
+        # The samples before the start of the next frame are complete.
+        num_frames = frames.shape[0];
+        output = self.overlap_add(frames, self.overlap);
+        complete = num_frames * self.hop;
+        self.overlap = output[complete:];
+        output = output[:complete];
+
+        if self.normalize:
+            weights = window * get_periodic_window(self.analysis_window, self.fft_length);
+            window_sum = self.overlap_add(np.broadcast_to(weights, frames.shape), self.overlap_weights);
+            self.overlap_weights = window_sum[complete:];
+            window_sum = window_sum[:complete];
+
+        if final_input == True:
+            # Flush the overlap of the last frame.
+            output = np.concatenate([output, self.overlap]);
+            if self.normalize:
+                window_sum = np.concatenate([window_sum, self.overlap_weights]);
+            self.overlap = np.zeros_like(self.overlap);
+            self.overlap_weights = np.zeros_like(self.overlap_weights);
+
+        if self.normalize:
+            nonzero = window_sum > 1e-10;
+            output[nonzero] /= window_sum[nonzero];
+        output = np.clip(output, -32768, 32767).astype(np.int16);
+
+        self.outputs[self.input_consumed_key] = True;
+        if self.streaming:
+            self.outputs[self.output_data_key] = output;
+        else:
+            self.completed.append(output);
+            if final_input == True:
+                self.outputs[self.output_data_key] = np.concatenate(self.completed);
+                self.completed = [];
+        if final_input == True:
+            # Nothing is sent to the producer after the final input.
+            self.outputs[self.input_consumed_key] = None;
+
+    # Returns the overlap-add of the frames, shape (frames, FFT_LENGTH), at
+    # offsets of hop samples, with the overlap of the previous call added to
+    # the start. The result has (frames - 1) * hop + FFT_LENGTH samples.
+    def overlap_add(self, frames, overlap):
+        num_frames = frames.shape[0];
+        num_blocks = num_frames + self.blocks_per_frame - 1;
+        buffer = np.zeros((num_blocks * self.hop,), dtype=np.float64);
+        buffer[:overlap.shape[0]] = overlap;
+
+        blocks = buffer.reshape(num_blocks, self.hop);
+        for block in range(self.blocks_per_frame):
+            start = block * self.hop;
+            end = min(start + self.hop, self.fft_length);
+            blocks[block:block + num_frames, :end - start] += frames[:, start:end];
+        return buffer[:(num_frames - 1) * self.hop + self.fft_length];
@@ -0,0 +1,63 @@
+import numpy as np
+
+# Overlap-save FFT convolution of a signal with one or more FIR filters of
+# the same length, shared by the FIRFilter and the FilterBank.
+#
+# The input is cut into overlapping segments of segment_length samples that
+# start every segment_length - filter_length + 1 samples; all segments are
+# transformed with one batched FFT, multiplied with the spectrum of a
+# filter, transformed back, and the wrapped around first filter_length - 1
+# samples of each are discarded. The result is the 'valid' part of the
+# convolution, i.e. the samples that do not depend on samples before the
+# input. The segment spectra can be shared between several filters, so a
+# filter bank only computes one inverse FFT per band.
+
+class OverlapSave(object):
+    # coefficients: the taps of one filter, or of one filter per row.
+    def __init__(self, coefficients, backend):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.filter_length = self.coefficients.shape[-1]
+        self.backend = backend
+        # Spectra of the zero padded coefficients per segment length.
+        self.coefficient_spectra = {}
+
+    # Returns the spectra of the segments of the input, shape (segments,
+    # bins), and their length, for num_outputs output samples.
+    def transform(self, extended, num_outputs):
+        overlap = self.filter_length - 1
+        # Segments of about four times the filter length keep the share of
+        # discarded samples low; short inputs fit into a single segment.
+        segment_length = 1 << (min(4 * self.filter_length, extended.shape[0]) - 1).bit_length()
+        step = segment_length - overlap
+        num_segments = -(-num_outputs // step)
+
+        padded = np.zeros((num_segments * step + overlap,), dtype=np.float64)
+        padded[:extended.shape[0]] = extended
+        starts = np.arange(num_segments) * step
+        segments = padded[starts[:, np.newaxis] + np.arange(segment_length)]
+        return self.backend.rfft(segments), segment_length
+
+    # Returns the num_outputs filtered samples of the segment spectra, with
+    # the filter in the given row of the coefficients if there are several.
+    def filter(self, spectra, segment_length, num_outputs, row=None):
+        spectrum = self.coefficient_spectrum(segment_length)
+        if row is not None:
+            spectrum = spectrum[row]
+        filtered = self.backend.irfft(spectra * spectrum, segment_length)[:, self.filter_length - 1:]
+        return filtered.reshape(-1)[:num_outputs]
+
+    # Returns the num_outputs samples of the 'valid' convolution of extended
+    # with a single filter.
+    def convolve(self, extended, num_outputs):
+        spectra, segment_length = self.transform(extended, num_outputs)
+        return self.filter(spectra, segment_length, num_outputs)
+
+    # Returns the spectra of the coefficients zero padded to segment_length.
+    def coefficient_spectrum(self, segment_length):
+        spectrum = self.coefficient_spectra.get(segment_length)
+        if spectrum is None:
+            padded = np.zeros(self.coefficients.shape[:-1] + (segment_length,), dtype=np.float64)
+            padded[..., :self.filter_length] = self.coefficients
+            spectrum = self.backend.rfft(padded)
+            self.coefficient_spectra[segment_length] = spectrum
+        return spectrum
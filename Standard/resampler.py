@@ -0,0 +1,175 @@
+import numpy as np
+from fractions import gcd
+from scipy import signal
+from transformer import *
+from filter_design import *
+
+# This module is responsible for changing the sampling rate of an input
+# audio sample by a rational factor UP / DOWN, so that expensive processing
+# downstream can run on fewer samples.
+#
+# Conceptually the input is upsampled by inserting UP - 1 zeros after every
+# sample, lowpass filtered below the lower of the two Nyquist frequencies
+# and every DOWN-th sample is kept. The polyphase implementation of
+# scipy.signal.upfirdn only computes the kept samples, in one pass over the
+# input: output n is the dot product of the input samples up to
+# (n * DOWN) / UP with phase (n * DOWN) % UP of the filter.
+#
+# The lowpass filter is a Kaiser windowed sinc filter (see filter_design.py)
+# with HALF_LENGTH zero crossings on each side, which delays the output by
+# HALF_LENGTH * max(UP, DOWN) / DOWN output samples. The input samples the
+# next outputs depend on are kept between calls to compute(), so resampling
+# a signal block by block gives the same result as resampling it at once.
+#
+# Decimator and Interpolator are Resamplers configured with a single
+# integer FACTOR.
+#
+##########
+# Inputs #
+##########
+# SAMPLES: A set of samples to resample.
+# SAMPLING_RATE: The sampling rate of the audio sample.
+#
+###########
+# Outputs #
+###########
+# RESAMPLED_SAMPLES: A vector of audio samples at the new sampling rate.
+# SAMPLING_RATE: The new sampling rate, SAMPLING_RATE * UP / DOWN rounded to
+#                an integer, for the downstream transformers.
+#
+###########
+# Configs #
+###########
+# UP: The upsampling factor of a Resampler.
+# DOWN: The downsampling factor of a Resampler.
+# FACTOR: The factor of a Decimator (DOWN) or Interpolator (UP).
+# HALF_LENGTH: Optional. The number of zero crossings of the filter on each
+#              side, 10 by default. Longer filters have a sharper cutoff.
+# KAISER_BETA: Optional. The beta parameter of the Kaiser window, 5.0 by
+#              default.
+#
+# Example AGDL configuration:
+#
+# Decimator {
+#   inputs
+#   {
+#       <SAMPLES> data
+#       <SAMPLING_RATE> sampling_rate
+#   }
+#   outputs
+#   {
+#       <RESAMPLED_SAMPLES> low_rate_data
+#       <SAMPLING_RATE> low_sampling_rate
+#   }
+#   configs
+#   {
+#       <FACTOR> 4
+#   }
+# }
+
+class Resampler(Transformer):
+    # The sampling rate is delivered once by the wav reader.
+    sticky_inputs = ("SAMPLING_RATE",)
+
+    def __init__(self):
+        super(Resampler, self).__init__()
+
+    def initialize(self, configs):
+        # Input Keys.
+        self.samples_key = "SAMPLES";
+        self.sampling_rate_key = "SAMPLING_RATE";
+
+        # Output Keys.
+        self.resampled_samples_key = "RESAMPLED_SAMPLES";
+        self.output_sampling_rate_key = "SAMPLING_RATE";
+
+        # Option Keys.
+        self.up_key = "UP";
+        self.down_key = "DOWN";
+        self.half_length_key = "HALF_LENGTH";
+        self.kaiser_beta_key = "KAISER_BETA";
+
+        up, down = self.get_factors(configs);
+        assert up > 0 and down > 0;
+
+        # Local variables.
+        divisor = gcd(up, down);
+        self.up = up / divisor;
+        self.down = down / divisor;
+        self.half_length = configs.get(self.half_length_key, 10);
+        assert self.half_length > 0;
+        self.kaiser_beta = configs.get(self.kaiser_beta_key, 5.0);
+
+        # The lowpass filter at the upsampled rate.
+        self.coefficients = None;
+        self.taps_per_phase = None;
+        # The input samples from history_start on, which is a multiple of
+        # down, so the outputs of upfirdn fall on the output grid.
+        self.sample_history = None;
+        self.history_start = None;
+        # The number of input samples received and outputs produced so far.
+        self.num_inputs = 0;
+        self.num_outputs = 0;
+
+        # Prepare ready inputs for graph execution
+        self.ready_inputs[self.samples_key] = False;
+        self.ready_inputs[self.sampling_rate_key] = False;
+
+    # Returns the (up, down) factors from the configs.
+    def get_factors(self, configs):
+        assert configs[self.up_key] != None;
+        assert configs[self.down_key] != None;
+        return configs[self.up_key], configs[self.down_key];
+
+    def compute(self):
+        # Load inputs.
+        samples = self.inputs[self.samples_key]
+        sampling_rate = self.inputs[self.sampling_rate_key]
+
+        if self.coefficients is None:
+            self.compute_coefficients();
+
+        extended = np.concatenate([self.sample_history, np.asarray(samples, dtype=np.float64)]);
+        extended_start = self.history_start;
+        self.num_inputs += samples.shape[0];
+
+        # Output n is complete once input (n * down) / up has been received.
+        # Output k of upfirdn is output k + offset of the whole signal.
+        end = -(-self.num_inputs * self.up // self.down);
+        offset = extended_start * self.up / self.down;
+        resampled = signal.upfirdn(self.coefficients, extended, self.up, self.down);
+        resampled = resampled[self.num_outputs - offset:end - offset];
+        self.num_outputs = end;
+
+        # Keep the taps_per_phase - 1 samples the next outputs depend on.
+        self.history_start = (self.num_inputs - (self.taps_per_phase - 1)) // self.down * self.down;
+        self.sample_history = extended[self.history_start - extended_start:].copy();
+
+        self.outputs[self.resampled_samples_key] = np.clip(resampled, -32768, 32767).astype(np.int16);
+        self.outputs[self.output_sampling_rate_key] = int(round(sampling_rate * self.up / float(self.down)));
+
+    def compute_coefficients(self):
+        # Cut off at the lower Nyquist frequency of the input and output,
+        # relative to the upsampled rate.
+        max_factor = max(self.up, self.down);
+        filter_length = 2 * self.half_length * max_factor + 1;
+        self.coefficients = design_fir_filter("LOWPASS", filter_length, 2 * max_factor,
+                                              low_cutoff=1, window="KAISER",
+                                              beta=self.kaiser_beta) * self.up;
+        self.taps_per_phase = -(-filter_length // self.up);
+
+        # The signal starts after zeros.
+        self.history_start = -(-(self.taps_per_phase - 1) // self.down) * -self.down;
+        self.sample_history = np.zeros((-self.history_start,), dtype=np.float64);
+
+class Decimator(Resampler):
+
+    def get_factors(self, configs):
+        assert configs["FACTOR"] != None;
+        return 1, configs["FACTOR"];
+
+class Interpolator(Resampler):
+
+    def get_factors(self, configs):
+        assert configs["FACTOR"] != None;
+        return configs["FACTOR"], 1;
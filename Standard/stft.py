@@ -0,0 +1,183 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from transformer import *
+from fft_backends import *
+from windows import *
+
+# This module is responsible for the short-time Fourier transform of a
+# whole signal, or of a stream of blocks of it, in a single graph cycle per
+# input. It replaces the chain
+#
+#   AudioSplitter -> VocoderAnalyzer -> FFT
+#
+# which runs one graph cycle per frame (or per FRAMES_PER_CYCLE frames).
+# The frames are strided views of the input, so no frame matrix is copied
+# out of the signal: the window and the FFT shift are applied in one pass
+# that writes the windowed frames (see windows.py), which are transformed
+# by batched FFT calls of STFT_CHUNK_FRAMES frames, small enough to stay in
+# the cache between the two steps.
+#
+# The frames are the ones of an AudioSplitter with SPLIT_OFFSET HOP: frame
+# i starts at sample i * HOP, and only frames that end before the last
+# sample of the signal are transformed, so a frame that ends exactly at the
+# last sample is dropped as by the splitter. A signal shorter than
+# FFT_LENGTH gives a single zero-padded frame. The samples from the start
+# of the next frame on are kept between calls to compute(), so transforming
+# a signal block by block gives the same frames as transforming it at once.
+#
+##########
+# Inputs #
+##########
+# SAMPLES: The samples to transform, the whole signal or the next block.
+# FINAL_INPUT: Optional. Whether the samples are the last block of the
+#              signal, e.g. the FINISHED output of an AudioSplitter. If not
+#              linked, every input is a whole signal.
+#
+###########
+# Outputs #
+###########
+# FREQUENCIES: A 2-D array with the spectrum of one frame per row, as sent
+#              by an FFT in block mode. Empty if no frame was completed.
+# FINISHED: True after the last block, e.g. for the FINAL_INPUT of an
+#           AudioOverlapMerger.
+#
+###########
+# Configs #
+###########
+# FFT_LENGTH: The length of the frames and of the FFT.
+# HOP: The offset in samples between consecutive frames, as the
+#      SPLIT_OFFSET of an AudioSplitter.
+# WINDOW: Optional. The periodic window applied to the frames, HANN by
+#         default as in the VocoderAnalyzer (see windows.py).
+# FFT_SHIFT: Optional. Whether the halves of the windowed frames are swapped
+#            before the FFT, as in the VocoderAnalyzer. True by default.
+# HALF_SPECTRUM: Optional. If True, only the FFT_LENGTH / 2 + 1 bins up to
+#                the Nyquist frequency are computed, as in the FFT.
+# FFT_BACKEND: Optional. The FFT implementation, see fft_backends.py.
+#              Defaults to DEFAULT_FFT_BACKEND.
+#
+# Example AGDL configuration:
+#
+# STFT {
+#   inputs
+#   {
+#       <SAMPLES> data
+#   }
+#   outputs
+#   {
+#       <FREQUENCIES> frequencies
+#       <FINISHED> finished
+#   }
+#   configs
+#   {
+#       <FFT_LENGTH> 1024
+#       <HOP> 256
+#       <HALF_SPECTRUM> True
+#   }
+# }
+
+# The number of frames windowed and transformed at once.
+STFT_CHUNK_FRAMES = 32
+
+class STFT(Transformer):
+    optional_inputs = ("FINAL_INPUT",)
+
+    def __init__(self):
+        super(STFT, self).__init__()
+
+    def initialize(self, configs):
+        # Input Keys.
+        self.samples_key = "SAMPLES";
+        self.final_input_key = "FINAL_INPUT";
+
+        # Output Keys.
+        self.frequencies_key = "FREQUENCIES";
+        self.finished_key = "FINISHED";
+
+        # Option Keys.
+        self.fft_length_key = "FFT_LENGTH";
+        self.hop_key = "HOP";
+        self.window_key = "WINDOW";
+        self.fft_shift_key = "FFT_SHIFT";
+        self.half_spectrum_key = "HALF_SPECTRUM";
+        self.fft_backend_key = "FFT_BACKEND";
+
+        # Retrieve options
+        assert configs[self.fft_length_key] != None;
+        assert configs[self.hop_key] != None;
+        self.fft_length = configs[self.fft_length_key];
+        self.hop = configs[self.hop_key];
+        # Consecutive frames overlap or touch, so the next frame always
+        # starts within the kept samples.
+        assert 0 < self.hop <= self.fft_length;
+        self.window = configs.get(self.window_key, "HANN");
+        assert self.window in PERIODIC_WINDOW_TYPES;
+        self.fft_shift = configs.get(self.fft_shift_key, True) == True;
+        if self.fft_shift:
+            assert self.fft_length % 2 == 0;
+        self.half_spectrum = configs.get(self.half_spectrum_key) == True;
+        self.backend = get_fft_backend(configs.get(self.fft_backend_key));
+        self.num_bins = self.fft_length / 2 + 1 if self.half_spectrum else self.fft_length;
+
+        # The samples from the start of the next frame on.
+        self.sample_history = None;
+        # The number of frames transformed since the start of the signal.
+        self.num_frames_sent = 0;
+
+        # Prepare ready inputs for graph execution
+        self.ready_inputs[self.samples_key] = False;
+        self.ready_inputs[self.final_input_key] = False;
+
+    def compute(self):
+        samples = np.asarray(self.inputs[self.samples_key]);
+        final_input = self.inputs.get(self.final_input_key);
+        if self.final_input_key not in self.wired_inputs:
+            final_input = True;
+
+        # Only a carried remainder is copied in front of the block.
+        if self.sample_history is not None and self.sample_history.shape[0] > 0:
+            samples = np.concatenate([self.sample_history, samples]);
+
+        frames = self.frame(samples);
+        num_frames = frames.shape[0];
+        if final_input == True:
+            if self.num_frames_sent == 0 and num_frames == 0 and samples.shape[0] > 0:
+                # The splitter sends a short signal as one zero-padded frame.
+                frames = np.zeros((1, self.fft_length), dtype=samples.dtype);
+                frames[0, :samples.shape[0]] = samples;
+                num_frames = 1;
+            self.sample_history = None;
+            self.num_frames_sent = 0;
+        else:
+            self.sample_history = samples[num_frames * self.hop:].copy();
+            self.num_frames_sent += num_frames;
+
+        spectra = np.empty((num_frames, self.num_bins), dtype=np.complex128);
+        if num_frames > 0:
+            window = get_periodic_window(self.window, self.fft_length, window_dtype(frames.dtype));
+            for start in range(0, num_frames, STFT_CHUNK_FRAMES):
+                chunk = frames[start:start + STFT_CHUNK_FRAMES];
+                if self.fft_shift:
+                    windowed = window_fftshift(chunk, window, window_first=True);
+                else:
+                    windowed = chunk * window;
+                if self.half_spectrum:
+                    spectra[start:start + STFT_CHUNK_FRAMES] = self.backend.rfft(windowed);
+                else:
+                    spectra[start:start + STFT_CHUNK_FRAMES] = self.backend.fft(windowed);
+
+        self.outputs[self.frequencies_key] = spectra;
+        self.outputs[self.finished_key] = final_input == True;
+
+    # Returns the frames that end before the last sample as a read-only
+    # strided view, shape (frames, FFT_LENGTH). A frame that ends at the last
+    # sample is only complete once more samples follow.
+    def frame(self, samples):
+        num_frames = 0;
+        if samples.shape[0] > self.fft_length:
+            num_frames = -(-(samples.shape[0] - self.fft_length) // self.hop);
+        stride = samples.strides[0];
+        frames = as_strided(samples, shape=(num_frames, self.fft_length),
+                            strides=(stride * self.hop, stride));
+        frames.flags.writeable = False;
+        return frames;
@@ -1,10 +1,46 @@
 import numpy as np
-from collections import namedtuple
+from collections import namedtuple, deque
 
 # The base class for all modules used in the computational graph. 
+#
+# Transformers declare their inputs in initialize() by adding them to
+# ready_inputs, together with their initial ready state. When a transformer
+# is linked as a child, every declared input is resolved to a bit of an
+# integer ready mask. A transformer is ready to execute once every bit of
+# its ready mask is set; afterwards all inputs are cleared except the ones
+# listed in sticky_inputs, which are delivered once and kept for the whole
+# run (e.g. the INPUT_DATA of an AudioSplitter).
+#
+# Each parent precomputes its outgoing edges as tuples
+# (output key, child, input bit, input key, last), where last marks the
+# final link of a connection after which the child's readiness is checked,
+# so notifyChildren() is a single loop without dictionary scans.
+#
+# Optionally, the inputs of a transformer are bounded FIFO queues (see
+# setFifoCapacity, called for the FIFO_CAPACITY config of an AGDL file),
+# so that producers can run ahead of their consumers, e.g. an AudioSplitter
+# without a READY link that emits the next split while earlier ones are
+# still being processed further down the graph. Arriving values are
+# queued, and once every input holds a value the transformer is armed with
+# the oldest value of each queue. A transformer is armed at most once at a
+# time, and is not armed while one of the queues it feeds is full, which
+# stalls its producers (backpressure) until the consumer takes a value.
 
 class Transformer(object):
 
+    # Inputs that are not cleared after the transformer becomes ready.
+    sticky_inputs = ()
+
+    # Inputs that do not need to be linked. An optional input without a
+    # parent is always ready.
+    optional_inputs = ()
+
+    # Inputs that take a block of frames, i.e. a 2-D array with one frame
+    # per row as emitted by an AudioSplitter with FRAMES_PER_CYCLE, and the
+    # outputs that carry a block when such an input receives one.
+    block_inputs = ()
+    block_outputs = ()
+
 # Every transformer receives input from it's predecessors in
 # the graph, and sends an output. Modules can also have config settings
 # that are provided at the high level graph description.
@@ -15,50 +51,242 @@ class Transformer(object):
         self.children = []
         self.child_tag_connections = []
         self.ready_inputs = {}
+        self.name = None
 
         self.ChildTagConnection = namedtuple('ChildTagConnection', 'child tag_map');
 
+        # Compiled edge model, see resolveInputSlots() and addChild().
+        self.input_bits = None
+        self.ready_mask = 0
+        self.full_mask = 0
+        self.sticky_mask = 0
+        self.edges = []
+        self.wired_inputs = set()
+
+        # FIFO inputs, see setFifoCapacity().
+        self.fifos = None
+        self.fifo_capacity = None
+        self.fifo_producers = {}
+        self.armed = False
+        self.blocked = False
+
     def Initialize(self, configs):
         return True;
 
     def Compute(self):
         return True;
 
+    # Called once the graph has finished running, e.g. to complete and
+    # close an output file.
     def Close(self):
         return True;
 
+    # Sets the unique name of the transformer within its graph, as assigned
+    # by the graph generator, e.g. audio_splitter2.
+    def setName(self, name):
+        self.name = name;
+
+    # Sets an input directly, e.g. on a graph root. A key that initialize()
+    # did not declare is stored without affecting readiness.
     def setInput(self, key, value):
-        self.inputs[key] = value;
-        self.ready_inputs[key] = True;
+        if self.fifos is not None and key in self.fifos:
+            self.fifos[key].append(value);
+        else:
+            self.inputs[key] = value;
+        self.ready_mask |= self.resolveInputSlots().get(key, 0);
 
     def getOutput(self, key):
         return self.outputs[key]
 
+    # Resolves the declared inputs to bits of the ready mask. Called when the
+    # transformer is linked as a child, i.e. after initialize().
+    def resolveInputSlots(self):
+        if self.input_bits is not None:
+            return self.input_bits;
+
+        self.input_bits = {};
+        for slot, key in enumerate(sorted(self.ready_inputs.keys())):
+            self.input_bits[key] = 1 << slot;
+        self.full_mask = (1 << len(self.input_bits)) - 1;
+
+        self.ready_mask = 0;
+        self.sticky_mask = 0;
+        sticky_inputs = self.findStickyInputs();
+        for key, bit in self.input_bits.iteritems():
+            if self.ready_inputs[key] == True or key in self.optional_inputs:
+                self.ready_mask |= bit;
+            if key in sticky_inputs or key in self.optional_inputs:
+                self.sticky_mask |= bit;
+        return self.input_bits;
+
+    # Records that an input is linked to a parent and returns its bit. Once
+    # an optional input is linked it behaves like any other input.
+    def wireInput(self, key, parent):
+        input_bits = self.resolveInputSlots();
+        if key not in input_bits:
+            # A linked input that initialize() did not declare is waited for
+            # like a declared one, as with the ready_inputs dictionary.
+            self.ready_inputs[key] = False;
+            input_bits[key] = 1 << len(input_bits);
+            self.full_mask |= input_bits[key];
+            if key in self.findStickyInputs():
+                self.sticky_mask |= input_bits[key];
+            elif self.fifos is not None:
+                self.fifos[key] = deque();
+        bit = input_bits[key];
+        if key in self.optional_inputs and key not in self.wired_inputs:
+            if key not in self.findStickyInputs():
+                self.sticky_mask &= ~bit;
+            if self.ready_inputs[key] != True:
+                self.ready_mask &= ~bit;
+        self.wired_inputs.add(key);
+        self.fifo_producers.setdefault(key, []).append(parent);
+        return bit;
+
+    # Whether the value of an input may be written to in place: the array
+    # must own its data, i.e. not be a view into a larger signal such as
+    # the frames of an AudioSplitter, and no other input may be linked to
+    # the output it comes from.
+    def isInputExclusive(self, key):
+        value = self.inputs.get(key);
+        if not isinstance(value, np.ndarray) or not value.flags.writeable or not value.flags.owndata:
+            return False;
+        for producer in self.fifo_producers.get(key, ()):
+            for parent_key, child, bit, child_key, last in producer.edges:
+                if child is self and child_key == key:
+                    for other_key, other, other_bit, other_child_key, other_last in producer.edges:
+                        if other_key == parent_key and (other is not self or other_child_key != key):
+                            return False;
+        return True;
+
+    # Returns the outputs that carry a block of frames regardless of the
+    # inputs, e.g. the OUTPUT_DATA of an AudioSplitter in block mode.
+    def blockOutputs(self):
+        return ();
+
+    # Turns every input that is not sticky into a FIFO queue. Producers are
+    # not armed while the queue holds capacity values.
+    def setFifoCapacity(self, capacity):
+        assert capacity > 0;
+        sticky_inputs = self.findStickyInputs();
+        self.fifo_capacity = capacity;
+        self.fifos = {};
+        for key, ready in self.ready_inputs.iteritems():
+            if key not in sticky_inputs:
+                self.fifos[key] = deque();
+                if ready == True:
+                    self.fifos[key].append(self.inputs.get(key));
+
+    # Returns the declared sticky inputs. Transformers that still override
+    # resetReadyInputs() to clear only some entries of ready_inputs are
+    # supported by running the override once on a copy of the ready state.
+    def findStickyInputs(self):
+        sticky_inputs = set(self.sticky_inputs);
+        if type(self).resetReadyInputs.__func__ is not Transformer.resetReadyInputs.__func__:
+            saved = dict(self.ready_inputs);
+            for key in saved:
+                self.ready_inputs[key] = True;
+            self.resetReadyInputs();
+            sticky_inputs.update(key for key, value in self.ready_inputs.iteritems() if value == True);
+            self.ready_inputs.clear();
+            self.ready_inputs.update(saved);
+        return sticky_inputs;
+
     def addChild(self, child, tag_map):
         self.children.append(child);
         self.child_tag_connections.append(self.ChildTagConnection(child, tag_map))
-    
+
+        child.resolveInputSlots();
+        links = sorted(tag_map.iteritems());
+        if not links:
+            self.edges.append((None, child, 0, None, True));
+        for idx, (parent_key, child_key) in enumerate(links):
+            bit = child.wireInput(child_key, self);
+            self.edges.append((parent_key, child, bit, child_key, idx == len(links) - 1));
+
+    # Delivers the outputs to the children and returns the transformers that
+    # became ready to execute, clearing their non-sticky inputs. Besides
+    # children, these are this transformer itself if it has more work, and
+    # producers that were stalled on a FIFO queue that now has room.
     def notifyChildren(self):
         ready_children = [];
-        for child_tag_connection in self.child_tag_connections:
-            child = child_tag_connection.child;
-            tag_map = child_tag_connection.tag_map;
-            for parent_key, child_key in tag_map.iteritems():
-                if (self.outputs[parent_key] != None):
-                    child.setInput(child_key, self.outputs[parent_key]);
-            if child.readyToExecute():
-                ready_children.append(child);
-                child.resetReadyInputs();
-        
+        outputs = self.outputs;
+        for parent_key, child, bit, child_key, last in self.edges:
+            value = outputs.get(parent_key);
+            if value is not None:
+                if child.fifos is None:
+                    child.inputs[child_key] = value;
+                else:
+                    child.fifos[child_key].append(value);
+                child.ready_mask |= bit;
+            if last and child.ready_mask == child.full_mask:
+                if child.fifos is None:
+                    ready_children.append(child);
+                    child.ready_mask &= child.sticky_mask;
+                elif child.armInputs(ready_children):
+                    ready_children.append(child);
+
+        if self.fifos is not None:
+            self.armed = False;
+            if self.ready_mask == self.full_mask and self.armInputs(ready_children):
+                ready_children.append(self);
+        elif self.hasPendingOutput():
+            if self.canOutput():
+                ready_children.append(self);
+            else:
+                self.blocked = True;
+
         return ready_children;
 
-    def readyToExecute(self):
-        for key, ready_value in self.ready_inputs.iteritems():
-            if ready_value == False:
-                return False;
-        
+    # Whether the transformer should execute again without new inputs, e.g.
+    # an AudioSplitter that has not emitted its final split.
+    def hasPendingOutput(self):
+        return False;
+
+    # Whether every FIFO queue fed by this transformer has room.
+    def canOutput(self):
+        for parent_key, child, bit, child_key, last in self.edges:
+            if child.fifos is not None and child_key in child.fifos:
+                if len(child.fifos[child_key]) >= child.fifo_capacity:
+                    return False;
         return True;
 
+    # Takes the oldest value of every FIFO input as the input of the next
+    # compute(). Returns False if the transformer is already armed or is
+    # stalled on a full queue of a child. Producers that were stalled on the
+    # queues that now have room are appended to ready.
+    def armInputs(self, ready):
+        if self.armed:
+            return False;
+        if not self.canOutput():
+            self.blocked = True;
+            return False;
+
+        for key, queue in self.fifos.iteritems():
+            if queue:
+                self.inputs[key] = queue.popleft();
+                for producer in self.fifo_producers.get(key, ()):
+                    if producer.blocked:
+                        producer.wake(ready);
+            if not queue:
+                self.ready_mask &= self.sticky_mask | ~self.input_bits[key];
+        self.armed = True;
+        return True;
+
+    # Retries a transformer that was stalled on a full queue.
+    def wake(self, ready):
+        self.blocked = False;
+        if self.fifos is not None:
+            if self.ready_mask == self.full_mask and self.armInputs(ready):
+                ready.append(self);
+        elif self.hasPendingOutput():
+            if self.canOutput():
+                ready.append(self);
+            else:
+                self.blocked = True;
+
+    def readyToExecute(self):
+        return self.ready_mask == self.full_mask;
+
     def resetReadyInputs(self):
-        for key, value in self.ready_inputs.iteritems():
-            self.ready_inputs[key] = False;
+        self.ready_mask &= self.sticky_mask;
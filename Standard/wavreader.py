@@ -16,6 +16,9 @@ from transformer import *
 # Configs #
 ###########
 # FILENAME: The filename of the audio wav file.
+# MMAP: Optional. If True, the samples are memory-mapped instead of read,
+#       so only the pages that are currently being processed are resident
+#       and files of any length can be streamed through the graph.
 #
 # Example AGDL configuration:
 #
@@ -42,15 +45,17 @@ class WavReader(Transformer):
 
         # Option Keys.
         self.file_name_key = "FILENAME";
+        self.mmap_key = "MMAP";
       
         # Retrieve options
         assert configs[self.file_name_key] != None;
         self.file = configs[self.file_name_key];
+        self.mmap = configs.get(self.mmap_key) == True;
 
     def compute(self):
         # Wavefile.read returns un-normalized data
         # as an numpy array.
-        sampling_rate, data = wavfile.read(self.file);
+        sampling_rate, data = wavfile.read(self.file, mmap=self.mmap);
         
         # Construct outputs.
         self.outputs[self.sampling_rate_key] = sampling_rate;
@@ -1,3 +1,4 @@
+import struct
 import numpy as np
 from scipy.io import wavfile
 from transformer import *
@@ -7,13 +8,18 @@ from transformer import *
 ###########
 # Inputs #
 ###########
-# DATA: The vector of samples to be written to the output file.
+# DATA: The vector of samples to be written to the output file. In
+#       streaming mode, the next block of samples to append to the file.
 # SAMPLING_RATE: The sampling rate of the audio file.
 #
 ###########
 # Configs #
 ###########
 # FILENAME: The filename of the output audio wav file.
+# STREAMING: Optional. If True, every received block of samples is appended
+#            to the file, e.g. from a merger in streaming mode. The sizes in
+#            the header are written once when the file is closed, which the
+#            GraphRunner does at the end of the run (see Close).
 #
 # Example AGDL configuration:
 # WavWriter {
@@ -39,10 +45,25 @@ class WavWriter(Transformer):
 
         # Option Keys.
         self.file_name_key = "FILENAME";
+        self.streaming_key = "STREAMING";
 
         # Retrieve options
         assert configs[self.file_name_key] != None;
         self.filename = configs[self.file_name_key];
+        self.streaming = configs.get(self.streaming_key) == True;
+
+        # Local variables for streaming.
+        self.file = None;
+        self.dtype = None;
+        self.data_size = 0;
+        self.sampling_rate = None;
+        # An empty array of the type and channels of the samples, for the header.
+        self.header_data = None;
+
+        # In streaming mode the sampling rate is received once, but the
+        # writer executes for every block.
+        if self.streaming:
+            self.sticky_inputs = (self.sampling_rate_key,);
 
         # Prepare ready inputs for graph execution
         self.ready_inputs[self.data_key] = False;
@@ -51,4 +72,48 @@ class WavWriter(Transformer):
     def compute(self): 
         data = self.inputs[self.data_key]; 
         sampling_rate = self.inputs[self.sampling_rate_key];
-        wavfile.write(self.filename, sampling_rate, data);
+        if self.streaming:
+            self.write_block(sampling_rate, data);
+        else:
+            wavfile.write(self.filename, sampling_rate, data);
+
+    # Appends a block of samples to the output file. The first block opens
+    # the file and writes a header with empty sizes, see Close.
+    def write_block(self, sampling_rate, data):
+        data = np.asarray(data)
+        if self.file is None:
+            self.file = open(self.filename, 'wb');
+            self.file.write(wav_header(sampling_rate, data, 0));
+            self.dtype = data.dtype;
+            self.data_size = 0;
+            self.sampling_rate = sampling_rate;
+            self.header_data = data[:0];
+        data = data.astype(self.dtype.newbyteorder('<'), copy=False);
+        self.file.write(data.tobytes());
+        self.data_size += data.nbytes;
+
+    # Writes the sizes of the samples into the header and closes the file
+    # of streaming mode. Called by the GraphRunner at the end of the run.
+    def Close(self):
+        if self.file is not None:
+            self.file.seek(0);
+            self.file.write(wav_header(self.sampling_rate, self.header_data, self.data_size));
+            self.file.close();
+            self.file = None;
+        return True;
+
+# Returns the RIFF header of a PCM (or IEEE float) wav file holding
+# data_size bytes of samples of the same type and channels as data.
+def wav_header(sampling_rate, data, data_size):
+    if data.dtype.kind == 'f':
+        format_tag = 3;
+    else:
+        format_tag = 1;
+    channels = 1 if data.ndim == 1 else data.shape[1];
+    bytes_per_sample = data.dtype.itemsize;
+    block_align = channels * bytes_per_sample;
+    fmt_chunk = struct.pack('<HHIIHH', format_tag, channels, sampling_rate,
+                            sampling_rate * block_align, block_align, 8 * bytes_per_sample);
+    return (b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt_chunk) + 8 + data_size) + b'WAVE' +
+            b'fmt ' + struct.pack('<I', len(fmt_chunk)) + fmt_chunk +
+            b'data' + struct.pack('<I', data_size));
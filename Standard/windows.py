@@ -0,0 +1,124 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+
+# Window functions shared by the transformers, selected by name:
+#
+#   RECTANGULAR: All ones, i.e. no windowing.
+#   HANN:        Hann (raised cosine) window, about 31 dB sidelobe
+#                attenuation, zero at both ends.
+#   HAMMING:     Hamming window, about 43 dB sidelobe attenuation.
+#   BLACKMAN:    Blackman window, about 58 dB sidelobe attenuation.
+#   KAISER:      Kaiser window, the attenuation is traded against the
+#                transition width with its beta parameter (0 is rectangular,
+#                5 is similar to Hamming, 8.6 is similar to Blackman).
+#
+# The windows of create_window() are symmetric, as needed for linear phase
+# FIR filters. The windows of get_periodic_window() are periodic, i.e. one
+# sample of a window of length + 1, as needed for the frames of a short-time
+# Fourier transform: overlapping periodic Hann windows add up to a constant.
+# SQRT_HANN is the square root of the periodic Hann window; applied before
+# the analysis and after the resynthesis, frames overlapping by half add up
+# to the input. Periodic windows are cached by type, length and dtype and
+# shared between callers, and therefore read-only.
+
+WINDOW_TYPES = ('RECTANGULAR', 'HANN', 'HAMMING', 'BLACKMAN', 'KAISER')
+PERIODIC_WINDOW_TYPES = ('RECTANGULAR', 'HANN', 'SQRT_HANN', 'HAMMING', 'BLACKMAN')
+
+DEFAULT_KAISER_BETA = 8.6
+
+# Maximum number of periodic windows kept in the cache.
+WINDOW_CACHE_SIZE = 64
+
+window_cache = OrderedDict()
+window_cache_lock = threading.Lock()
+
+# Returns a window of the given type and length as a float64 array.
+def create_window(window_type, length, beta=None):
+    if window_type == 'RECTANGULAR':
+        return np.ones((length,), dtype=np.float64)
+    if window_type == 'HANN':
+        return np.hanning(length)
+    if window_type == 'HAMMING':
+        return np.hamming(length)
+    if window_type == 'BLACKMAN':
+        return np.blackman(length)
+    if window_type == 'KAISER':
+        if beta is None:
+            beta = DEFAULT_KAISER_BETA
+        return np.kaiser(length, beta)
+    raise ValueError('Unknown window ' + str(window_type) + ', expected one of ' +
+                     ', '.join(WINDOW_TYPES))
+
+# Returns the beta of a Kaiser window for a filter with the given stopband
+# attenuation in dB (Kaiser's empirical formula).
+def kaiser_beta(attenuation):
+    if attenuation > 50:
+        return 0.1102 * (attenuation - 8.7)
+    if attenuation >= 21:
+        return 0.5842 * (attenuation - 21) ** 0.4 + 0.07886 * (attenuation - 21)
+    return 0.0
+
+# Returns the periodic window of the given type and length as a read-only
+# array of the given dtype.
+def get_periodic_window(window_type, length, dtype=np.float64):
+    dtype = np.dtype(dtype)
+    key = (window_type, length, dtype.str)
+
+    with window_cache_lock:
+        window = window_cache.pop(key, None)
+        if window is None:
+            window = compute_periodic_window(window_type, length).astype(dtype)
+            window.flags.writeable = False
+            if len(window_cache) >= WINDOW_CACHE_SIZE:
+                window_cache.popitem(last=False)
+        # The most recently used window is kept at the end.
+        window_cache[key] = window
+    return window
+
+def compute_periodic_window(window_type, length):
+    phase = 2.0 * np.pi * np.arange(length) / length
+    if window_type == 'RECTANGULAR':
+        return np.ones((length,), dtype=np.float64)
+    if window_type == 'HANN':
+        return 0.5 - 0.5 * np.cos(phase)
+    if window_type == 'SQRT_HANN':
+        return np.sqrt(0.5 - 0.5 * np.cos(phase))
+    if window_type == 'HAMMING':
+        return 0.54 - 0.46 * np.cos(phase)
+    if window_type == 'BLACKMAN':
+        return 0.42 - 0.5 * np.cos(phase) + 0.08 * np.cos(2.0 * phase)
+    raise ValueError('Unknown periodic window ' + str(window_type) + ', expected one of ' +
+                     ', '.join(PERIODIC_WINDOW_TYPES))
+
+# Returns the dtype of the window for samples of the given dtype: single
+# precision samples keep single precision, all others use float64.
+def window_dtype(samples_dtype):
+    if np.dtype(samples_dtype) in (np.dtype(np.float32), np.dtype(np.complex64)):
+        return np.float32
+    return np.float64
+
+# Swaps the halves of the frames along the last axis (an FFT shift of an
+# even length) and multiplies them by the window, in a single pass into a
+# new array, or into samples itself if in_place is set. With window_first
+# the window is applied to the frames before the shift, otherwise after it.
+def window_fftshift(samples, window, window_first=True, in_place=False):
+    n = samples.shape[-1]
+    half = n / 2
+    assert n % 2 == 0 and window.shape[0] == n
+    if window_first:
+        # The output starts with the second half of the windowed frame.
+        low_window, high_window = window[half:], window[:half]
+    else:
+        low_window, high_window = window[:half], window[half:]
+
+    if in_place:
+        first_half = samples[..., :half] * high_window
+        np.multiply(samples[..., half:], low_window, out=samples[..., :half])
+        samples[..., half:] = first_half
+        return samples
+
+    output = np.empty(samples.shape, dtype=np.result_type(samples.dtype, window.dtype))
+    np.multiply(samples[..., half:], low_window, out=output[..., :half])
+    np.multiply(samples[..., :half], high_window, out=output[..., half:])
+    return output
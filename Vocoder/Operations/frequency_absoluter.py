@@ -8,7 +8,9 @@ from transformer import *
 ##########
 # Inputs #
 ##########
-# FREQUENCIES: A vector of complex frequency intensities to operate on.
+# FREQUENCIES: A vector of complex frequency intensities to operate on, or
+#              a 2-D array with one vector per frame. Full and half spectra
+#              (from an FFT in half spectrum mode) are both supported.
 #
 ###########
 # Outputs #
@@ -29,6 +31,10 @@ from transformer import *
 # }
 
 class FrequencyAbsoluter(Transformer):
+    # Elementwise, so a block is handled like a single frame.
+    block_inputs = ("FREQUENCIES",)
+    block_outputs = ("ABSOLUTE_FREQUENCIES",)
+
     def __init__(self):
         super(FrequencyAbsoluter, self).__init__()
 
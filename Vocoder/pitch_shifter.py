@@ -9,18 +9,34 @@ from transformer import *
 ##########
 # Inputs #
 ##########
-# INPUT_FREQUENCIES: Computed frequencies processed from FFT. 
+# INPUT_FREQUENCIES: Computed frequencies processed from FFT. Either the full
+#                    spectrum of FFT_LENGTH bins or, from an FFT in half
+#                    spectrum mode, the FFT_LENGTH / 2 + 1 bins up to the
+#                    Nyquist frequency. In block mode, a 2-D array with one
+#                    spectrum per consecutive frame.
 #
 ###########
 # Outputs #
 ###########
-# OUTPUT_FREQUENCIES: Computed frequencies with pitch shifting applied
+# OUTPUT_FREQUENCIES: Computed frequencies with pitch shifting applied, of
+#                     the same shape as the input.
 #
 ###########
 # Configs #
 ###########
 # FFT_LENGTH : The length of the performed FFT on input samples.
 # PITCH_SHIFT_FACTOR: The scaling factor to be applied for phase shifting.
+# ANALYSIS_HOPSIZE: The offset in samples between the input frames, as the
+#                   SPLIT_OFFSET of the AudioSplitter.
+# SYNTHESIS_HOPSIZE: Optional. The offset in samples between the output
+#                    frames, as the OFFSET of the merger. Defaults to the
+#                    ANALYSIS_HOPSIZE.
+#
+# All bins of a frame are processed at once. For a block of frames the
+# phase differences between consecutive frames are accumulated with a
+# cumulative sum over the frames. The phases of the last frame are kept
+# between calls to compute(), so a signal processed frame by frame or block
+# by block gives the same result.
 #
 # Example AGDL configuration:
 #
@@ -37,10 +53,16 @@ from transformer import *
 #   {
 #       <FFT_LENGTH> fft_length
 #       <PITCH_SHIFT_FACTOR> pitch_shift_factor
+#       <ANALYSIS_HOPSIZE> 256
+#       <SYNTHESIS_HOPSIZE> 256
 #   }
 # }
 
 class PitchShifter(Transformer):
+    # The rows of a block are shifted as consecutive frames.
+    block_inputs = ("INPUT_FREQUENCIES",)
+    block_outputs = ("OUTPUT_FREQUENCIES",)
+
     def __init__(self):
         super(PitchShifter, self).__init__()
 
@@ -54,46 +76,64 @@ class PitchShifter(Transformer):
         # Option Keys.
         self.fft_length_key = "FFT_LENGTH"
         self.pitch_shift_factor_key = "PITCH_SHIFT_FACTOR"
+        self.analysis_hopsize_key = "ANALYSIS_HOPSIZE"
+        self.synthesis_hopsize_key = "SYNTHESIS_HOPSIZE"
 
         # Local variables.
+        assert configs.get(self.analysis_hopsize_key) != None
         self.fft_length = configs[self.fft_length_key]
         self.pitch_shift_factor = configs[self.pitch_shift_factor_key]
-        self.omega = np.zeros((self.fft_length,),dtype=np.float)
-        self.prev_phase = np.zeros((self.fft_length,),dtype=np.float)
-        self.new_phase = np.zeros((self.fft_length,),dtype=np.float)
+        self.analysis_hopsize = configs[self.analysis_hopsize_key]
+        self.synthesis_hopsize = configs.get(self.synthesis_hopsize_key, self.analysis_hopsize)
 
-        # Holds the "expected" phase offset between two same frequency bins of different fft frames.
-        for i in range(0, self.fft_length):
-            self.omega[i] = (2 * np.pi * i * self.analysis_hopsize) / self.fft_length;
+        # The phase advance of the output per radian of input phase advance.
+        self.phase_scale = self.pitch_shift_factor * float(self.synthesis_hopsize) / self.analysis_hopsize
+
+        # The phase state is allocated for the number of bins of the first input.
+        self.num_bins = None
             
         # Prepare ready inputs for graph execution
         self.ready_inputs[self.input_frequencies_key] = False;
 
     def compute(self):
-        np.set_printoptions(threshold=np.inf)
-
         # Retrieve inputs.
-        freq = self.inputs[self.input_frequencies_key]
-        assert freq.shape[0] == self.fft_length
+        freq = np.asarray(self.inputs[self.input_frequencies_key])
+        if self.num_bins is None:
+            self.initialize_phases(freq.shape[-1])
+        assert freq.shape[-1] == self.num_bins
 
-        # Define output.
-        output_freq = np.zeros((self.fft_length,), dtype=np.complex)
+        # Process a single frame as a block of one frame.
+        frames = freq.reshape(-1, self.num_bins)
+        if frames.shape[0] == 0:
+            self.outputs[self.output_frequencies_key] = np.zeros(freq.shape, dtype=np.complex);
+            return
 
-        magnitude = np.abs(freq)
-        phase = np.angle(freq)
+        magnitude = np.abs(frames)
+        phase = np.angle(frames)
 
         # Compute the new phase based of expected 1) the previous computed phase for this
         # frequency window 2) the difference in phase between this phase and previous phase
         # shifted by scaling factor.
-        
-        for i in range(0, self.fft_length):
-            delta_phase = self.omega[i] + self.phasewrap(phase[i] - self.prev_phase[i] - self.omega[i])
-            self.prev_phase[i] = phase[i]
-            self.new_phase[i] = self.phasewrap(self.new_phase[i] + delta_phase*self.pitch_shift_factor)
-            output_freq[i] = magnitude[i] * np.exp(np.complex(self.new_phase[i]))
-        
-        self.outputs[self.output_frequencies_key] = output_freq;
+        previous_phase = np.vstack([self.prev_phase[np.newaxis, :], phase[:-1]])
+        delta_phase = self.omega + self.phasewrap(phase - previous_phase - self.omega)
+        new_phase = self.new_phase + np.cumsum(self.phasewrap(delta_phase * self.phase_scale), axis=0)
+        new_phase = self.phasewrap(new_phase)
+
+        self.prev_phase = phase[-1].copy()
+        self.new_phase = new_phase[-1].copy()
+
+        output_freq = magnitude * np.exp(1j * new_phase)
+        self.outputs[self.output_frequencies_key] = output_freq.reshape(freq.shape);
+
+    def initialize_phases(self, num_bins):
+        assert num_bins in (self.fft_length, self.fft_length / 2 + 1)
+        self.num_bins = num_bins
+        self.prev_phase = np.zeros((num_bins,),dtype=np.float)
+        self.new_phase = np.zeros((num_bins,),dtype=np.float)
+
+        # Holds the "expected" phase offset between two same frequency bins of different fft frames.
+        self.omega = (2 * np.pi * np.arange(num_bins) * self.analysis_hopsize) / float(self.fft_length);
 
     # Wraps the phase between negative PI and positive Pi.
     def phasewrap(self, phase):
-        return np.mod(phase + np.pi, -2.0 * np.pi) + np.pi;
\ No newline at end of file
+        return np.mod(phase + np.pi, -2.0 * np.pi) + np.pi;
@@ -1,5 +1,7 @@
 import numpy as np
+from fractions import gcd
 from transformer import *
+from filter_design import *
 
 # Performs linear interpolation after phase
 # vocoding is complete. This is done when the
@@ -8,10 +10,21 @@ from transformer import *
 # be the floor of the fft length multipled by
 # the ratio of analysis to synthesis hopsize.
 #
+# The interpolation positions, taps and weights only depend on the configs
+# and are computed once at initialization. The output samples of all frames
+# are then gathered and blended in a single vectorized expression.
+#
+# In SINC mode each output sample is interpolated from 2 * HALF_LENGTH input
+# samples with a Kaiser windowed sinc kernel, lowpass filtered below the
+# output Nyquist frequency when the grain is shortened. The output
+# positions fall on a limited number of fractional offsets, one polyphase
+# kernel per offset, and the kernels are cached (see filter_design.py).
+#
 ##########
 # Inputs #
 ##########
-# INPUT_SAMPLES: Input samples after phase vocoding.
+# INPUT_SAMPLES: Input samples after phase vocoding. A 2-D array of frames
+#                is processed row by row.
 #
 ###########
 # Outputs #
@@ -25,7 +38,11 @@ from transformer import *
 #             samples must equal to this length.
 # ANALYSIS_HOPSIZE: Numerator to the stretch factor for interpolation. 
 # SYNTHESIS_HOPSIZE: Denominator to the stretch factor for interpolation.
-#
+# INTERPOLATION: Optional. LINEAR (default) or SINC.
+# HALF_LENGTH: Optional. The number of input samples on each side of an
+#              output sample in SINC mode, 8 by default.
+# KAISER_BETA: Optional. The beta parameter of the Kaiser window of the SINC
+#              kernels, 8.6 by default.
 #
 # Example AGDL configuration:
 #
@@ -49,7 +66,13 @@ from transformer import *
 #   }
 # }
 
+INTERPOLATION_TYPES = ("LINEAR", "SINC")
+
 class VocoderLinearInterpolator(Transformer):
+    # Every row of a block is interpolated with the same taps.
+    block_inputs = ("INPUT_SAMPLES",)
+    block_outputs = ("OUTPUT_SAMPLES",)
+
     def __init__(self):
         super(VocoderLinearInterpolator, self).__init__()
 
@@ -64,9 +87,26 @@ class VocoderLinearInterpolator(Transformer):
         self.fft_length_key = "FFT_LENGTH"
         self.analysis_hopsize_key = "ANALYSIS_HOPSIZE"
         self.synthesis_hopsize_key = "SYNTHESIS_HOPSIZE"
+        self.interpolation_key = "INTERPOLATION"
+        self.half_length_key = "HALF_LENGTH"
+        self.kaiser_beta_key = "KAISER_BETA"
 
         # Local variables.
+        assert configs.get(self.analysis_hopsize_key) != None
+        assert configs.get(self.synthesis_hopsize_key) != None
         self.fft_length = configs[self.fft_length_key]
+        self.analysis_hopsize = configs[self.analysis_hopsize_key]
+        self.synthesis_hopsize = configs[self.synthesis_hopsize_key]
+        self.interpolation = configs.get(self.interpolation_key, "LINEAR")
+        assert self.interpolation in INTERPOLATION_TYPES
+        self.half_length = configs.get(self.half_length_key, 8)
+        assert self.half_length > 0
+        self.kaiser_beta = configs.get(self.kaiser_beta_key, DEFAULT_KAISER_BETA)
+
+        if self.interpolation == "LINEAR":
+            self.compute_linear_tables()
+        else:
+            self.compute_sinc_tables()
 
         # Prepare ready inputs for graph.
         self.ready_inputs[self.input_samples_key] = False
@@ -74,23 +114,54 @@ class VocoderLinearInterpolator(Transformer):
     def compute(self):
         # Retrieve inputs.
         samples = self.inputs[self.input_samples_key]
-        n = samples.shape[0]
+        n = samples.shape[-1]
         assert n == self.fft_length
 
         # Use linear interpolation to generate the output grain after
-        # shifting/hanning.
-        lx = int(np.floor(n * self.analysis_hopsize / self.synthesis_hopsize))
-        x = np.arange(0,lx) * float(n) / float(lx)
+        # shifting/hanning. The input is padded with zeros for the taps
+        # beyond its ends.
+        pad_width = [(0, 0)] * (samples.ndim - 1) + [(self.padding, self.padding)]
+        grain1 = np.pad(samples, pad_width, 'constant', constant_values=0)
+        if self.interpolation == "LINEAR":
+            grain2 = grain1[..., self.ix] * self.dx1 + grain1[..., self.ix1] * self.dx
+        else:
+            grain2 = np.einsum('...ij,ij->...i', grain1[..., self.taps], self.weights)
+
+        self.outputs[self.output_samples_key] = grain2
+
+    # Computes the input positions of the output samples, the output length
+    # and the numerator and denominator of the step between them.
+    def compute_positions(self):
+        n = self.fft_length
+        lx = int(np.floor(n * self.analysis_hopsize / float(self.synthesis_hopsize)))
+        assert lx > 0
+        divisor = gcd(n, lx)
+        self.lx = lx
+        # The position of output sample k is k * step_numerator / step_denominator.
+        self.step_numerator = n / divisor
+        self.step_denominator = lx / divisor
+
+    def compute_linear_tables(self):
+        self.compute_positions()
+        self.padding = 1
+        x = np.arange(0, self.lx) * float(self.fft_length) / float(self.lx)
         ix = np.floor(x).astype(int)
-        ix1 = ix + 1
-        dx = x - ix
-        dx1 = 1 - dx
+        self.dx = x - ix
+        self.dx1 = 1 - self.dx
+        self.ix = ix + self.padding
+        self.ix1 = self.ix + 1
 
-        grain1 = np.append(samples, [0])
-        grain2 = np.zeros((lx,),dtype=np.float)
-        
-        for i in range(0, lx):
-            grain2[i] = grain1[ix[i]] * dx1[i] + grain1[ix1[i]] * dx[i]
+    def compute_sinc_tables(self):
+        self.compute_positions()
+        self.padding = self.half_length
+        k = np.arange(0, self.lx)
+        ix = k * self.step_numerator // self.step_denominator
+        phases = k * self.step_numerator % self.step_denominator
 
-        self.outputs[self.output_samples_key] = grain2
-        
\ No newline at end of file
+        # Lowpass filter below the output Nyquist frequency when shortening.
+        cutoff = min(1.0, float(self.lx) / self.fft_length)
+        kernels = design_polyphase_kernels(self.step_denominator, self.half_length, cutoff,
+                                           self.kaiser_beta)
+        self.taps = (ix[:, np.newaxis] + self.padding +
+                     np.arange(1 - self.half_length, self.half_length + 1))
+        self.weights = kernels[phases]
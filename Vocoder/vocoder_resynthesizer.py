@@ -1,5 +1,6 @@
 import numpy as np
 from transformer import *
+from windows import *
 
 # Performs resynthesis after phase vocoding.
 # Undos FFT shifting and windowing done by
@@ -9,7 +10,8 @@ from transformer import *
 ##########
 # Inputs #
 ##########
-# INPUT_SAMPLES: Input samples after phase vocoding.
+# INPUT_SAMPLES: Input samples after phase vocoding. A 2-D array of frames
+#                is processed row by row.
 #
 ###########
 # Outputs #
@@ -21,6 +23,18 @@ from transformer import *
 ###########
 # FFT_LENGTH: Expected length of FFT operation. The shape of the input
 #             samples must equal to this length.
+# WINDOW: Optional. The periodic window, HANN (default), SQRT_HANN, HAMMING,
+#         BLACKMAN or RECTANGULAR (see windows.py). Use SQRT_HANN for both
+#         the VocoderAnalyzer and the VocoderResynthesizer so that frames
+#         overlapping by half add up to the input.
+# IN_PLACE: Optional. Writes the output into the input array if it is a
+#           writable floating point array that owns its data and is not
+#           sent to any other transformer, False by default. Otherwise, e.g.
+#           for the frames of an AudioSplitter, which are views into the
+#           input signal, the output is a new array.
+#
+# The window is cached (see windows.py) and applied together with the FFT
+# shift in a single pass over the frames.
 #
 # Example AGDL configuration:
 #
@@ -42,6 +56,10 @@ from transformer import *
 # }
 
 class VocoderResynthesizer(Transformer):
+    # The window broadcasts over the rows of a block.
+    block_inputs = ("INPUT_SAMPLES",)
+    block_outputs = ("OUTPUT_SAMPLES",)
+
     def __init__(self):
         super(VocoderResynthesizer, self).__init__()
 
@@ -54,9 +72,14 @@ class VocoderResynthesizer(Transformer):
 
         # Option Keys.
         self.fft_length_key = "FFT_LENGTH"
+        self.window_key = "WINDOW"
+        self.in_place_key = "IN_PLACE"
 
         # Local variables.
         self.fft_length = configs[self.fft_length_key]
+        self.window = configs.get(self.window_key, "HANN")
+        assert self.window in PERIODIC_WINDOW_TYPES
+        self.in_place = configs.get(self.in_place_key) == True
 
         # Prepare ready inputs for graph.
         self.ready_inputs[self.input_samples_key] = False
@@ -67,17 +90,13 @@ class VocoderResynthesizer(Transformer):
 
         # Assume for now that the shape of the input samples is exactly
         # equal to the intended FFT length. 
-        n = samples.shape[0]
+        n = samples.shape[-1]
         assert n == self.fft_length
         assert self.fft_length % 2 == 0
 
-        # FFT shift.
-        output = np.concatenate([samples[n/2:], samples[0:n/2]])
-
-        # Apply a Hanning window to the samples as postprocessing.
-        # TODO: Move hanning window function to a separate helper class.
-        for i in range(0, n):
-            window_value = -0.5 * np.cos(2.0 * np.pi * float(i) / float(self.fft_length)) + 0.5
-            output[i] = output[i] * window_value
-
-        self.outputs[self.output_samples_key] = output
\ No newline at end of file
+        # FFT shift and apply the window to the samples as postprocessing.
+        window = get_periodic_window(self.window, n, window_dtype(samples.dtype))
+        in_place = (self.in_place and self.isInputExclusive(self.input_samples_key)
+                    and samples.dtype == np.result_type(samples.dtype, window.dtype))
+        output = window_fftshift(samples, window, window_first=False, in_place=in_place)
+        self.outputs[self.output_samples_key] = output